@@ -2,12 +2,12 @@ from fastapi import FastAPI
 from src.auth import auth_routes
 from src.entregas import entregas_routes
 from src.notification import notification_routes
-from src.db import models
 from src.db.database import engine
+from src.db.migrations import run_migrations
 from src.scrapers.scrapper_data_model import StandardizedDeliveryData
 from src.configs.logger_config import logger
 
-models.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI()
 
@@ -0,0 +1,8 @@
+from src.worker.supervisor import main
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nEncerrando o worker.")
@@ -22,6 +22,15 @@ SCRAPER_URLS = {
     "viaverde": "http://viaverde.supplytrack.com.br/",
 }
 
+# Mensagens com que o site informa que não achou a NF (regex, sem distinção de
+# maiúsculas); uma espera que expira com uma delas na tela vira erro "not_found"
+NOT_FOUND_MESSAGES = {
+    "default": (
+        r"n[aã]o (foi |foram )?(encontrad|localizad)"
+        r"|nenhum(a)? (resultado|registro|documento|nota|encomenda)"
+    ),
+}
+
 BROWSER_CONFIG = {
     "headless": True,  # Mude para False para ver o navegador em ação
     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -37,8 +46,201 @@ TIMEOUTS = {
     "Brasspress_wait": 60000,
 }
 
-SCREENSHOT_ENABLED = True  # Habilita/desabilita a captura de tela em caso de erro
-SCREENSHOT_DIR = "debug_screenshots"  # Diretório para salvar as capturas de tela
+BROWSER_POOL_CONFIG = {
+    "enabled": True,  # Reaproveita navegadores entre execuções (False = um navegador por execução)
+    "browsers_per_carrier": 1,  # Navegadores Chromium isolados por transportadora
+    "contexts_per_browser": 4,  # Contextos simultâneos permitidos em cada navegador
+    "max_uses_per_browser": 200,  # Recicla o navegador após N contextos
+    "health_check_interval": 60,  # segundos entre verificações de saúde (0 = desativado)
+    "idle_timeout": 600,  # segundos até fechar um navegador ocioso (0 = nunca)
+}
+
+WARM_PAGE_POOL_CONFIG = {
+    "enabled": True,  # Mantém páginas já abertas (e logadas) na URL de cada transportadora
+    # Páginas aquecidas por transportadora, somando todas as chaves (logins)
+    "pages_per_carrier": {"default": 1},
+    "max_idle_seconds": 240,  # Descarta páginas paradas há mais tempo que isso
+    "sweep_interval_seconds": 60,  # Intervalo da varredura que libera páginas vencidas (0 = desativada)
+}
+
+# Bloqueio de requisições desnecessárias (imagens, fontes, analytics, pixels)
+# Cada transportadora sobrescreve as chaves da política "default"
+ROUTE_POLICIES = {
+    "default": {
+        "enabled": True,
+        "block_resource_types": ["image", "media", "font"],
+        "block_url_patterns": [
+            r"google-analytics\.com",
+            r"googletagmanager\.com",
+            r"doubleclick\.net",
+            r"googleadservices\.com",
+            r"facebook\.(net|com)/.*(tr|fbevents)",
+            r"ads\.linkedin\.com",
+            r"snap\.licdn\.com",
+            r"hotjar\.com",
+            r"clarity\.ms",
+            r"tiktok\.com",
+            r"rdstation",
+        ],
+        "allow_url_patterns": [r"recaptcha", r"hcaptcha", r"challenges\.cloudflare"],
+    },
+    "braspress": {
+        # Mantém imagens: o anti-bot da Braspress é sensível a páginas "vazias"
+        "block_resource_types": ["media", "font"],
+    },
+}
+
+# Tamanho médio estimado (bytes) de cada tipo de recurso bloqueado
+ROUTE_BLOCK_ESTIMATED_BYTES = {
+    "image": 40_000,
+    "media": 250_000,
+    "font": 35_000,
+    "script": 60_000,
+    "stylesheet": 20_000,
+    "xhr": 2_000,
+    "fetch": 2_000,
+    "other": 5_000,
+}
+
+# Captura das respostas JSON/XHR do próprio site (opt-in por transportadora)
+# Caminhos usam notação com pontos sobre o JSON (ex.: "data.eventos")
+# Se nenhuma resposta casar em "wait_ms", o scraper volta a ler o DOM
+RESPONSE_CAPTURE_RULES = {
+    "accert": {
+        "enabled": False,
+        "url_patterns": [r"/api/.*(rastreamento|tracking|encomenda)"],
+        "wait_ms": 5000,
+        "fields": {
+            "events_path": "eventos",
+            "timestamp": "dataHora",
+            "status": "descricao",
+            "cidade": "cidade",
+            "estado": "uf",
+            "detalhes": "observacao",
+            "previsao_entrega_path": "previsaoEntrega",
+        },
+    },
+    "jamef": {
+        "enabled": False,
+        "url_patterns": [r"/api/.*(rastreamento|tracking|historico)"],
+        "wait_ms": 5000,
+        "fields": {
+            "events_path": "historico",
+            "timestamp": "data",
+            "status": "status",
+            "cidade": "municipioDestino",
+            "estado": "estadoDestino",
+            "detalhes": "municipioOrigem",
+            "previsao_entrega_path": "previsaoEntrega",
+        },
+    },
+}
+
+# Caminho rápido sem navegador: endpoints HTTP que já devolvem o rastreamento em JSON
+# O JSON é interpretado com os "fields" de RESPONSE_CAPTURE_RULES da transportadora
+# Placeholders: {cnpj}, {nota_fiscal}, {n_rastreio} e as variantes *_digits
+# Ex.: "accert": {
+#     "url": "https://cliente.accertlogistica.com.br/api/rastreamento",
+#     "method": "GET",
+#     "params": {"cnpj": "{cnpj_digits}", "notaFiscal": "{nota_fiscal_digits}"},
+#     "timeout": 15,  # segundos
+# },
+HTTP_TRACKING_ENDPOINTS = {}
+
+# Sessões persistidas (cookies/localStorage) por transportadora e credencial
+SESSION_STATE_CONFIG = {
+    "enabled": True,
+    "dir": ".sessions",  # Contém cookies de login: não versionar
+    "max_age_hours": 12,  # Sessões mais antigas são descartadas
+    "carriers": ["viaverde", "braspress"],
+}
+
+# Limites por transportadora aplicados a todo job de scraping do processo,
+# independentemente de quantos clientes chamam /entrega/scrap
+CARRIER_RATE_LIMITS = {
+    # rate_per_minute: ritmo do token bucket; burst: jobs liberados de uma vez;
+    # max_in_flight: jobs simultâneos
+    "default": {"rate_per_minute": 30, "burst": 4, "max_in_flight": 4},
+    # Braspress bloqueia consultas seguidas: 1 a cada 3 minutos
+    "braspress": {"rate_per_minute": 1 / 3, "burst": 1, "max_in_flight": 1},
+}
+
+# Circuit breaker por transportadora: com muitas falhas recentes os jobs falham
+# imediatamente (CircuitOpenError) e são reagendados após o cooldown
+CIRCUIT_BREAKER_CONFIG = {
+    "default": {
+        "enabled": True,
+        "window_size": 10,  # Últimos resultados considerados
+        "min_calls": 5,  # Mínimo de resultados antes de avaliar a taxa
+        "failure_rate": 0.6,  # Taxa de falhas que abre o circuito
+        "cooldown_seconds": 300,  # Tempo aberto antes de testar novamente
+        "half_open_max_calls": 1,  # Jobs de teste no estado semiaberto
+        "max_reschedules": 3,  # Reagendamentos de um job antes de falhar
+    },
+}
+
+# Cache dos resultados normalizados, por (transportadora, NF, CNPJ)
+RESULT_CACHE_CONFIG = {
+    "enabled": True,
+    "max_entries": 1000,  # Os menos usados recentemente são descartados
+    "ttl_seconds": {"default": 600},  # Validade por transportadora
+}
+
+# Agendamento adaptativo: quando cada entrega deve ser consultada novamente
+REFRESH_SCHEDULE_CONFIG = {
+    "enabled": True,
+    "status_finais": ["entregue"],  # Não são mais consultadas
+    # (idade máxima da última movimentação em horas, intervalo em horas)
+    "faixas": [(24, 1), (72, 4), (240, 12)],
+    "intervalo_dormente_horas": 24,  # Sem movimentação há mais tempo que isso
+    # Perto da previsão de entrega (ou atrasada) usa a faixa mais frequente
+    "janela_previsao_dias": 1,
+    # NF não encontrada: backoff exponencial
+    "nao_encontrado_base_horas": 2,
+    "nao_encontrado_max_horas": 48,
+}
+
+# Worker de scraping (run_worker.py): consome a fila de scraping_tasks
+WORKER_CONFIG = {
+    "max_concurrency": 8,  # Tarefas executadas ao mesmo tempo
+    "poll_interval_seconds": 2,  # Intervalo entre consultas à fila
+    "status_file": ".worker_status.json",  # Estado publicado para a API
+    # Processos de worker: "auto" = um por núcleo, limitado pela RAM disponível
+    "processes": "auto",
+    "max_processes": 8,
+    "memory_per_process_mb": 1024,  # Worker + navegadores do pool
+    "shutdown_timeout_seconds": 120,  # Espera as tarefas em andamento terminarem
+    # Lease das tarefas: sem heartbeat por lease_seconds, outro worker as retoma
+    "lease_seconds": 300,
+    "heartbeat_interval_seconds": 60,
+    # Tarefas dessas transportadoras com as mesmas credenciais rodam em lote,
+    # numa única sessão do navegador (um login só)
+    "batch_carriers": ["viaverde"],
+    "max_batch_size": 10,
+}
+
+# Gravação agrupada dos resultados do worker: vários resultados por transação
+RESULT_WRITER_CONFIG = {
+    "enabled": True,  # False = uma transação por resultado
+    "max_batch": 50,  # Resultados por transação
+    "flush_interval_ms": 200,  # Espera máxima para completar um lote
+}
+
+# Artefatos de falha: screenshot JPEG + snapshot HTML, gravados em segundo plano
+ARTIFACTS_CONFIG = {
+    "enabled": True,  # Habilita/desabilita a captura em caso de erro
+    "dir": "debug_screenshots",  # Diretório dos artefatos
+    "screenshot_quality": 50,  # Qualidade JPEG (0-100)
+    "full_page": False,  # Apenas a área visível: bem mais rápido e leve
+    "capture_html": True,  # Salva também o HTML da página
+    "capture_timeout_ms": 3000,  # Tempo máximo da captura no job que falhou
+    "max_total_mb": 200,  # Cota em disco; os mais antigos são removidos
+    "max_age_days": 7,  # Artefatos mais antigos são removidos
+    "max_per_minute": 10,  # Limite por transportadora
+    "max_pending": 20,  # Capturas aguardando gravação; excedentes são descartadas
+    # Fração das falhas capturadas, por transportadora
+    "sample_rates": {"default": 1.0},
+}
 
 # ------------------
 
@@ -51,4 +253,19 @@ CAMINHO_PLANILHA_ENTREGAS = "entregas.xlsx"
 BASE_URL = "http://127.0.0.1:8000"
 ENDPOINT_SCRAPING = f"{BASE_URL}/entrega/scrap"
 ENDPOINT_NOTIFICACAO = f"{BASE_URL}/notification/send-notifications"
+ENDPOINT_SCRAPING_DUE = f"{BASE_URL}/entrega/scrap/due"
 BRASPRESS_DELAY_SECONDS = 180  # em segundos
+
+# Pipelines do orquestrador, um por transportadora, executados em paralelo
+ORCHESTRATOR_PIPELINES = {
+    "default": {
+        "delay_seconds": 0,  # Intervalo mínimo entre envios
+        "max_in_flight": 10,  # Entregas acompanhadas ao mesmo tempo
+        "retry_budget": 10,  # Reenvios permitidos para toda a transportadora
+    },
+    "braspress": {
+        "delay_seconds": BRASPRESS_DELAY_SECONDS,
+        "max_in_flight": 1,
+        "retry_budget": 3,
+    },
+}
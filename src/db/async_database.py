@@ -0,0 +1,52 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from src.configs.config import settings
+
+# Async drivers for the URL of the synchronous engine (database.py)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def to_async_url(database_url: str):
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases.")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def configure_sqlite(engine):
+    """Transaction handling for SQLite async engines (savepoints, locking)."""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_on_connect(dbapi_connection, connection_record):
+        # O SQLAlchemy passa a emitir BEGIN/SAVEPOINT (o driver os ignoraria)
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        # WAL: leituras não bloqueiam a escrita; espera o lock em vez de falhar
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _sqlite_on_begin(conn):
+        # Reserva a escrita no início: evita o "database is locked" imediato ao
+        # promover uma transação de leitura para escrita
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+async_engine = create_async_engine(to_async_url(settings.database_url))
+if async_engine.dialect.name == "sqlite":
+    configure_sqlite(async_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
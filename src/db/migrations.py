@@ -0,0 +1,366 @@
+"""
+Versioned schema migrations.
+
+``create_all`` only creates missing tables, so columns, indexes and
+constraints added to existing tables never reached databases created by an
+older version. ``run_migrations`` creates the missing tables and then applies,
+in order, every migration newer than the version recorded in
+``schema_version``, each in its own transaction.
+
+Migrations are idempotent (columns and indexes are checked before being
+created), so on a new database, where ``create_all`` already built the
+current schema, they only record their version.
+"""
+
+import json
+from sqlalchemy import bindparam, delete, func, inspect, select, update
+from sqlalchemy.engine import Connection, Engine
+from src.configs.logger_config import logger
+from src.db import models
+
+
+def _column_names(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_columns(conn: Connection, model, columns: dict):
+    """
+    Adds the model's columns missing from its table.
+
+    Args:
+        columns: Column name -> extra DDL (e.g. ``"DEFAULT 0 NOT NULL"``).
+    """
+    table = model.__table__
+    existing = _column_names(conn, table.name)
+    for name, extra in columns.items():
+        if name in existing:
+            continue
+        column_type = table.c[name].type.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(
+            f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type} {extra}".strip()
+        )
+        logger.info(f"[MIGRATION] Column {table.name}.{name} added.")
+
+
+def _create_indexes(conn: Connection, model, exclude: tuple = ()):
+    """
+    Creates the model's missing indexes, except ``exclude`` and those on
+    columns a later migration adds (that migration creates them).
+    """
+    existing = _column_names(conn, model.__table__.name)
+    for index in model.__table__.indexes:
+        if index.name in exclude or not {c.name for c in index.columns} <= existing:
+            continue
+        index.create(bind=conn, checkfirst=True)
+
+
+def _scraping_task_queue_columns(conn: Connection):
+    _add_columns(
+        conn,
+        models.ScrapingTask,
+        {
+            "transportadora": "",
+            "numero_nf": "",
+            "cnpj_destinatario": "",
+            "payload": "",
+            "user_id": "",
+            "available_at": "",
+            "reagendamentos": "DEFAULT 0 NOT NULL",
+            "lease_owner": "",
+            "lease_expires_at": "",
+            "heartbeat_at": "",
+        },
+    )
+    # O índice único de tarefa ativa só vem depois da deduplicação (versão 5)
+    _create_indexes(conn, models.ScrapingTask, exclude=("uq_scraping_tasks_ativa",))
+
+
+def _movimentacao_chave_and_historico_hash(conn: Connection):
+    from src.entregas.entregas_crud import movimentacao_chave
+
+    _add_columns(conn, models.EntregaMovimentacao, {"chave": ""})
+    _add_columns(conn, models.Entrega, {"historico_hash": ""})
+
+    # Preenche a chave das movimentações existentes; repetidas ficam nulas
+    table = models.EntregaMovimentacao.__table__
+    rows = conn.execute(
+        select(
+            table.c.id,
+            table.c.entrega_id,
+            table.c.movimento,
+            table.c.dt_movimento,
+            table.c.localizacao,
+            table.c.detalhes,
+        )
+        .where(table.c.chave.is_(None))
+        .order_by(table.c.id)
+    ).all()
+    vistas = set()
+    updates = []
+    for row in rows:
+        chave = movimentacao_chave(
+            row.movimento, row.dt_movimento, row.localizacao, row.detalhes
+        )
+        if (row.entrega_id, chave) in vistas:
+            continue
+        vistas.add((row.entrega_id, chave))
+        updates.append({"row_id": row.id, "nova_chave": chave})
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(chave=bindparam("nova_chave")),
+            updates,
+        )
+        logger.info(f"[MIGRATION] {len(updates)} movement keys filled in.")
+
+
+# Tabelas que apontam para a entrega (além das movimentações)
+_ENTREGA_REFERENCES = (
+    models.MovimentacaoNotificacao,
+    models.NotificacaoLog,
+    models.ScrapingTask,
+    models.AgendamentoScraping,
+)
+
+
+def _merge_duplicate_entregas(conn: Connection):
+    """
+    Merges deliveries repeated by (transportadora, numero_nf) into the oldest
+    one: movements, notifications, tasks and schedules are repointed to it,
+    movements it already has are dropped and the copies are deleted.
+    """
+    entregas = models.Entrega.__table__
+    repetidas = conn.execute(
+        select(entregas.c.transportadora, entregas.c.numero_nf)
+        .group_by(entregas.c.transportadora, entregas.c.numero_nf)
+        .having(func.count() > 1)
+    ).all()
+    for transportadora, numero_nf in repetidas:
+        mantida, *copias = conn.execute(
+            select(entregas.c.id)
+            .where(
+                entregas.c.transportadora == transportadora,
+                entregas.c.numero_nf == numero_nf,
+            )
+            .order_by(entregas.c.id)
+        ).scalars()
+        for copia in copias:
+            _merge_entrega(conn, copia, mantida)
+        # O histórico mudou: o próximo scrape recalcula o hash
+        conn.execute(
+            update(entregas).where(entregas.c.id == mantida).values(historico_hash=None)
+        )
+        logger.info(
+            f"[MIGRATION] Deliveries {copias} merged into {mantida} "
+            f"({transportadora} NF {numero_nf})."
+        )
+
+
+def _merge_entrega(conn: Connection, copia: int, mantida: int):
+    entregas = models.Entrega.__table__
+    movimentacoes = models.EntregaMovimentacao.__table__
+
+    # Movimentações que a mantida já tem são descartadas (chave natural)
+    chaves = set(
+        conn.execute(
+            select(movimentacoes.c.chave).where(
+                movimentacoes.c.entrega_id == mantida,
+                movimentacoes.c.chave.isnot(None),
+            )
+        ).scalars()
+    )
+    for mov_id, chave in conn.execute(
+        select(movimentacoes.c.id, movimentacoes.c.chave)
+        .where(movimentacoes.c.entrega_id == copia)
+        .order_by(movimentacoes.c.id)
+    ).all():
+        if chave is not None and chave in chaves:
+            conn.execute(delete(movimentacoes).where(movimentacoes.c.id == mov_id))
+            continue
+        chaves.add(chave)
+        conn.execute(
+            update(movimentacoes)
+            .where(movimentacoes.c.id == mov_id)
+            .values(entrega_id=mantida)
+        )
+    for model in _ENTREGA_REFERENCES:
+        table = model.__table__
+        conn.execute(
+            update(table).where(table.c.entrega_id == copia).values(entrega_id=mantida)
+        )
+    conn.execute(delete(entregas).where(entregas.c.id == copia))
+
+
+def _hot_path_indexes(conn: Connection):
+    _merge_duplicate_entregas(conn)
+    _create_indexes(conn, models.Entrega)
+    _create_indexes(conn, models.EntregaMovimentacao)
+    _create_indexes(conn, models.MovimentacaoNotificacao)
+
+
+def _scraping_task_credentials(conn: Connection):
+    from src.utils.credentials_crypto import encrypt_credentials
+
+    _add_columns(conn, models.ScrapingTask, {"credentials_enc": ""})
+
+    # Tira as credenciais em texto puro do payload das tarefas já enfileiradas;
+    # só as ativas ainda precisam delas, criptografadas
+    table = models.ScrapingTask.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.status, table.c.payload).where(
+            table.c.payload.like('%"credentials"%')
+        )
+    ).all()
+    updates = []
+    for row in rows:
+        try:
+            payload = json.loads(row.payload)
+        except ValueError:
+            continue
+        credentials = payload.pop("credentials", None)
+        if credentials is None:
+            continue
+        ativa = row.status in ("PENDING", "IN_PROGRESS")
+        updates.append(
+            {
+                "row_id": row.id,
+                "novo_payload": json.dumps(payload),
+                "novas_credenciais": (
+                    encrypt_credentials(credentials) if ativa else None
+                ),
+            }
+        )
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(
+                payload=bindparam("novo_payload"),
+                credentials_enc=bindparam("novas_credenciais"),
+            ),
+            updates,
+        )
+        logger.info(
+            f"[MIGRATION] Credentials removed from {len(updates)} task payloads."
+        )
+
+
+def _scraping_task_active_unique(conn: Connection):
+    from src.entregas.entregas_crud import ACTIVE_TASK_STATUSES
+
+    # Antes do índice único: só a tarefa ativa mais antiga de cada entrega fica
+    table = models.ScrapingTask.__table__
+    rows = conn.execute(
+        select(
+            table.c.id,
+            table.c.task_id,
+            table.c.transportadora,
+            table.c.numero_nf,
+            table.c.cnpj_destinatario,
+        )
+        .where(table.c.status.in_(ACTIVE_TASK_STATUSES))
+        .order_by(table.c.id)
+    ).all()
+    mantidas = {}
+    updates = []
+    for row in rows:
+        chave = (row.transportadora, row.numero_nf, row.cnpj_destinatario)
+        if chave not in mantidas:
+            mantidas[chave] = row.task_id
+            continue
+        updates.append(
+            {
+                "row_id": row.id,
+                "erro": f"Duplicada da tarefa {mantidas[chave]}.",
+            }
+        )
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(
+                status="FAILED",
+                error_message=bindparam("erro"),
+                credentials_enc=None,
+                lease_owner=None,
+                lease_expires_at=None,
+            ),
+            updates,
+        )
+        logger.info(f"[MIGRATION] {len(updates)} duplicate active tasks failed.")
+    _create_indexes(conn, models.ScrapingTask)
+
+
+def _scraping_task_options_hash(conn: Connection):
+    from src.entregas.entregas_crud import ACTIVE_TASK_STATUSES
+    from src.utils.credentials_crypto import decrypt_credentials, options_fingerprint
+
+    _add_columns(conn, models.ScrapingTask, {"opcoes_hash": "DEFAULT '' NOT NULL"})
+
+    # Tarefas ativas recebem o digest das opções com que foram pedidas
+    table = models.ScrapingTask.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.payload, table.c.credentials_enc).where(
+            table.c.status.in_(ACTIVE_TASK_STATUSES)
+        )
+    ).all()
+    updates = []
+    for row in rows:
+        try:
+            bypass_cache = json.loads(row.payload or "{}").get("bypass_cache", False)
+            credentials = decrypt_credentials(row.credentials_enc)
+        except Exception:
+            continue
+        updates.append(
+            {
+                "row_id": row.id,
+                "novo_hash": options_fingerprint(credentials, bypass_cache),
+            }
+        )
+    if updates:
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(opcoes_hash=bindparam("novo_hash")),
+            updates,
+        )
+
+    # O índice único passa a incluir as opções
+    conn.exec_driver_sql("DROP INDEX IF EXISTS uq_scraping_tasks_ativa")
+    _create_indexes(conn, models.ScrapingTask)
+
+
+# (versão, descrição, função) em ordem; nunca altere uma migração já aplicada
+MIGRATIONS = [
+    (1, "scraping task queue and lease columns", _scraping_task_queue_columns),
+    (
+        2,
+        "movement natural key and history hash",
+        _movimentacao_chave_and_historico_hash,
+    ),
+    (3, "hot path indexes and entregas natural key", _hot_path_indexes),
+    (4, "encrypted scraping task credentials", _scraping_task_credentials),
+    (5, "one active scraping task per delivery", _scraping_task_active_unique),
+    (6, "scraping task options fingerprint", _scraping_task_options_hash),
+]
+
+
+def run_migrations(engine: Engine):
+    """Creates missing tables and applies pending migrations."""
+    models.Base.metadata.create_all(bind=engine)
+
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(models.SchemaVersion.version)).scalars())
+
+    for version, descricao, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"[MIGRATION] Applying {version}: {descricao}.")
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                models.SchemaVersion.__table__.insert().values(
+                    version=version, descricao=descricao
+                )
+            )
@@ -9,6 +9,9 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Boolean,
+    Index,
+    UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
@@ -40,6 +43,15 @@ class Usuario(Base):
 
 class Entrega(Base):
     __tablename__ = "entregas"
+    # Chave natural das buscas por (transportadora, numero_nf[, cnpj_destinatario])
+    __table_args__ = (
+        Index(
+            "uq_entregas_transportadora_numero_nf",
+            "transportadora",
+            "numero_nf",
+            unique=True,
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     transportadora = Column(String(100), nullable=False)
@@ -50,6 +62,8 @@ class Entrega(Base):
     status = Column(String(100))
     previsao_entrega_inicial = Column(Date)
     previsao_entrega = Column(Date)
+    # Hash do histórico normalizado: detecta mudanças sem ler as movimentações
+    historico_hash = Column(String(64))
 
     criado_em = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     atualizado_em = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
@@ -76,6 +90,15 @@ class NotificacaoLog(Base):
 
 class MovimentacaoNotificacao(Base):
     __tablename__ = "movimentacao_notificacao"
+    # Índice parcial: só as pendentes, que são as consultadas
+    __table_args__ = (
+        Index(
+            "ix_movimentacao_notificacao_pendentes",
+            "status",
+            postgresql_where=text("status = 'nao notificado'"),
+            sqlite_where=text("status = 'nao notificado'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     entrega_id = Column(Integer, ForeignKey("entregas.id"), nullable=False)
@@ -86,6 +109,21 @@ class MovimentacaoNotificacao(Base):
 
 class EntregaMovimentacao(Base):
     __tablename__ = "entrega_movimentacoes"
+    __table_args__ = (
+        # Chave natural: a mesma movimentação não é gravada duas vezes por entrega
+        Index(
+            "uq_entrega_movimentacoes_entrega_chave",
+            "entrega_id",
+            "chave",
+            unique=True,
+        ),
+        # Movimentações de uma entrega e a mais recente (agendamento)
+        Index(
+            "ix_entrega_movimentacoes_entrega_dt",
+            "entrega_id",
+            "dt_movimento",
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     movimento = Column(String(255), nullable=False)
@@ -93,6 +131,8 @@ class EntregaMovimentacao(Base):
     dt_movimento = Column(DateTime(timezone=True))
     localizacao = Column(String(255))
     detalhes = Column(Text)
+    # Hash de (movimento, dt_movimento, localizacao, detalhes)
+    chave = Column(String(64))
 
     # Chave estrangeira para a tabela de entregas
     entrega_id = Column(Integer, ForeignKey("entregas.id"), nullable=False)
@@ -109,6 +149,30 @@ class EntregaMovimentacao(Base):
 
 class ScrapingTask(Base):
     __tablename__ = "scraping_tasks"
+    __table_args__ = (
+        # Tarefa ativa da mesma entrega (deduplicação)
+        Index(
+            "ix_scraping_tasks_entrega_status",
+            "transportadora",
+            "numero_nf",
+            "cnpj_destinatario",
+            "status",
+        ),
+        # Tarefas prontas para o worker
+        Index("ix_scraping_tasks_status_available_at", "status", "available_at"),
+        # No máximo uma tarefa ativa por entrega e opções, entre todos os
+        # processos da API
+        Index(
+            "uq_scraping_tasks_ativa",
+            "transportadora",
+            "numero_nf",
+            "cnpj_destinatario",
+            "opcoes_hash",
+            unique=True,
+            postgresql_where=text("status IN ('PENDING', 'IN_PROGRESS')"),
+            sqlite_where=text("status IN ('PENDING', 'IN_PROGRESS')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     task_id = Column(String(255), unique=True, nullable=False, index=True)
@@ -116,12 +180,62 @@ class ScrapingTask(Base):
     entrega_id = Column(Integer, ForeignKey("entregas.id"), nullable=True)
     retries = Column(Integer, ForeignKey("entregas.id"), default=0)
     error_message = Column(Text, nullable=True)
+
+    # Fila durável: o worker executa as tarefas PENDING com available_at vencido
+    transportadora = Column(String(100))
+    numero_nf = Column(String(50))
+    cnpj_destinatario = Column(String(18))
+    payload = Column(Text)  # EntregaScrapRequest em JSON, sem as credenciais
+    # Credenciais criptografadas; apagadas quando a tarefa termina
+    credentials_enc = Column(Text)
+    # Digest das credenciais e do bypass_cache: pedidos só se juntam a uma
+    # tarefa ativa feita com as mesmas opções
+    opcoes_hash = Column(String(32), default="", nullable=False)
+    user_id = Column(Integer, ForeignKey("usuarios.id"))
+    available_at = Column(DateTime(timezone=True), default=datetime.utcnow, index=True)
+    reagendamentos = Column(Integer, default=0, nullable=False)
+
+    # Lease do worker que executa a tarefa, renovado por heartbeats; leases
+    # vencidos são retomados por outro worker
+    lease_owner = Column(String(255))
+    lease_expires_at = Column(DateTime(timezone=True), index=True)
+    heartbeat_at = Column(DateTime(timezone=True))
     created_at = Column(
         DateTime(timezone=True), default=datetime.utcnow, nullable=False
     )
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.utcnow)
 
 
+class AgendamentoScraping(Base):
+    __tablename__ = "agendamentos_scraping"
+    __table_args__ = (
+        UniqueConstraint("transportadora", "numero_nf", "cnpj_destinatario"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    transportadora = Column(String(100), nullable=False)
+    numero_nf = Column(String(50), nullable=False)
+    cnpj_destinatario = Column(String(18))
+    entrega_id = Column(Integer, ForeignKey("entregas.id"), nullable=True)
+
+    # Nulo quando a entrega não precisa mais ser consultada (ex.: entregue)
+    proximo_scrape_em = Column(DateTime(timezone=True), index=True)
+    ultimo_scrape_em = Column(DateTime(timezone=True))
+    nao_encontrado_consecutivos = Column(Integer, default=0, nullable=False)
+    motivo = Column(String(100))
+
+
+class SchemaVersion(Base):
+    # Migrações aplicadas (src/db/migrations.py)
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    descricao = Column(String(255), nullable=False)
+    aplicado_em = Column(
+        DateTime(timezone=True), default=datetime.utcnow, nullable=False
+    )
+
+
 # As tabelas de notificação podem ser adicionadas de forma similar se necessário...
 
 # --- COMO USAR (Exemplo) ---
@@ -0,0 +1,425 @@
+"""
+Async CRUD for the scraping path (worker), on ``AsyncSession``.
+
+Mirrors the functions of ``entregas_crud`` the worker needs so browser waits
+and database writes interleave on the same event loop. The functions that
+persist a scrape result only flush: the caller commits, which lets the
+``ResultWriter`` group many results in one transaction. Queue operations
+(claim, heartbeat, reschedule) commit on their own.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.configs.logger_config import logger
+from src.db import models
+from src.entregas import entregas_models
+from src.entregas.entregas_crud import (
+    build_movimentacao_rows,
+    get_initial_status,
+    historico_hash,
+)
+
+
+async def get_entrega(db: AsyncSession, entrega_id: int):
+    # Relê a linha: ela pode ter sido alterada por UPDATE na mesma transação
+    return await db.get(models.Entrega, entrega_id, populate_existing=True)
+
+
+def _dialect_insert(db: AsyncSession, model):
+    """INSERT supporting ON CONFLICT for the session's database."""
+    module = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return module.insert(model)
+
+
+async def upsert_entrega(
+    db: AsyncSession,
+    entrega: entregas_models.EntregaCreate,
+    user_id: int,
+    novo_hash: Optional[str] = None,
+):
+    """
+    Creates the delivery with ``INSERT ... ON CONFLICT (transportadora,
+    numero_nf) DO NOTHING RETURNING``, so concurrent workers never duplicate
+    it. A new delivery is written with its movements and pending notification
+    in the same transaction. An existing one is only read back; it is updated
+    (with ``atualizado_em``/``atualizado_por_id``) only when the scrape brings
+    a different ``previsao_entrega``. Does not commit.
+
+    Returns:
+        Tuple (row with id, status and historico_hash, created). For an
+        existing delivery ``historico_hash`` is the stored (previous) value.
+    """
+    if novo_hash is None:
+        novo_hash = historico_hash(entrega.historico)
+    stmt = (
+        _dialect_insert(db, models.Entrega)
+        .values(
+            transportadora=entrega.transportadora,
+            codigo_rastreio=entrega.codigo_rastreio,
+            numero_nf=entrega.numero_nf,
+            cliente=entrega.cliente,
+            cnpj_destinatario=entrega.cnpj_destinatario,
+            status=get_initial_status(entrega.historico),
+            previsao_entrega_inicial=entrega.previsao_entrega_inicial,
+            previsao_entrega=entrega.previsao_entrega,
+            historico_hash=novo_hash,
+            criado_por_id=user_id,
+        )
+        .on_conflict_do_nothing(index_elements=["transportadora", "numero_nf"])
+        .returning(
+            models.Entrega.id, models.Entrega.status, models.Entrega.historico_hash
+        )
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is not None:
+        await insert_movimentacoes(db, row.id, entrega.historico, user_id)
+        db.add(models.MovimentacaoNotificacao(entrega_id=row.id))
+        await db.flush()
+        return row, True
+
+    # Já existia: só grava se a previsão mudou, sem tocar a auditoria à toa
+    existing = (
+        await db.execute(
+            select(
+                models.Entrega.id,
+                models.Entrega.status,
+                models.Entrega.historico_hash,
+                models.Entrega.previsao_entrega,
+            ).where(
+                models.Entrega.transportadora == entrega.transportadora,
+                models.Entrega.numero_nf == entrega.numero_nf,
+            )
+        )
+    ).one()
+    if (
+        entrega.previsao_entrega is not None
+        and entrega.previsao_entrega != existing.previsao_entrega
+    ):
+        await db.execute(
+            update(models.Entrega)
+            .where(models.Entrega.id == existing.id)
+            .values(
+                previsao_entrega=entrega.previsao_entrega,
+                atualizado_em=datetime.utcnow(),
+                atualizado_por_id=user_id,
+            )
+        )
+    return existing, False
+
+
+async def get_movimentacoes(db: AsyncSession, entrega_id: int) -> list:
+    result = await db.execute(
+        select(models.EntregaMovimentacao).where(
+            models.EntregaMovimentacao.entrega_id == entrega_id
+        )
+    )
+    return list(result.scalars().all())
+
+
+def _insert_ignoring_duplicates(db: AsyncSession):
+    """INSERT that skips movements already stored (natural key conflict)."""
+    return _dialect_insert(db, models.EntregaMovimentacao).on_conflict_do_nothing(
+        index_elements=["entrega_id", "chave"]
+    )
+
+
+async def insert_movimentacoes(
+    db: AsyncSession, entrega_id: int, historico: list, user_id: int
+) -> int:
+    """
+    Bulk-inserts movements in one statement, without committing. Movements
+    already stored for the delivery are skipped by the natural key.
+
+    Returns:
+        How many movements were actually inserted.
+    """
+    rows = build_movimentacao_rows(historico, entrega_id, user_id)
+    if not rows:
+        return 0
+    # RETURNING só traz as linhas inseridas; rowcount de executemany não é
+    # confiável em todos os drivers
+    result = await db.execute(
+        _insert_ignoring_duplicates(db).returning(models.EntregaMovimentacao.id),
+        rows,
+    )
+    return len(result.all())
+
+
+async def add_new_movimentacoes(
+    db: AsyncSession,
+    entrega_id: int,
+    novos_movimentos: list,
+    status: str,
+    novo_hash: str,
+    user_id: int,
+) -> int:
+    """
+    Persists only the movements not stored yet, the new status, the history
+    hash and the pending notification. Does not commit. When every movement
+    was already stored (e.g. by a concurrent worker) only the hash is saved.
+
+    Returns:
+        How many movements were inserted.
+    """
+    inserted = await insert_movimentacoes(db, entrega_id, novos_movimentos, user_id)
+    if not inserted:
+        await update_historico_hash(db, entrega_id, novo_hash)
+        await db.flush()
+        return 0
+    await db.execute(
+        update(models.Entrega)
+        .where(models.Entrega.id == entrega_id)
+        .values(status=status, historico_hash=novo_hash, atualizado_por_id=user_id)
+    )
+    db.add(models.MovimentacaoNotificacao(entrega_id=entrega_id))
+    await db.flush()
+    return inserted
+
+
+async def update_historico_hash(db: AsyncSession, entrega_id: int, novo_hash: str):
+    await db.execute(
+        update(models.Entrega)
+        .where(models.Entrega.id == entrega_id)
+        .values(historico_hash=novo_hash)
+    )
+
+
+async def get_ultima_movimentacao_dt(db: AsyncSession, entrega_id: int):
+    return await db.scalar(
+        select(func.max(models.EntregaMovimentacao.dt_movimento)).where(
+            models.EntregaMovimentacao.entrega_id == entrega_id
+        )
+    )
+
+
+async def get_agendamento_scraping(
+    db: AsyncSession, transportadora: str, numero_nf: str, cnpj_destinatario: str
+):
+    result = await db.execute(
+        select(models.AgendamentoScraping).where(
+            models.AgendamentoScraping.transportadora == transportadora,
+            models.AgendamentoScraping.numero_nf == numero_nf,
+            models.AgendamentoScraping.cnpj_destinatario == cnpj_destinatario,
+        )
+    )
+    return result.scalars().first()
+
+
+async def save_agendamento_scraping(
+    db: AsyncSession,
+    transportadora: str,
+    numero_nf: str,
+    cnpj_destinatario: str,
+    **values,
+):
+    db_agendamento = await get_agendamento_scraping(
+        db, transportadora, numero_nf, cnpj_destinatario
+    )
+    if not db_agendamento:
+        db_agendamento = models.AgendamentoScraping(
+            transportadora=transportadora,
+            numero_nf=numero_nf,
+            cnpj_destinatario=cnpj_destinatario,
+        )
+        db.add(db_agendamento)
+    for key, value in values.items():
+        setattr(db_agendamento, key, value)
+    await db.flush()
+    return db_agendamento
+
+
+async def get_scraping_task(db: AsyncSession, task_id: str):
+    result = await db.execute(
+        select(models.ScrapingTask).where(models.ScrapingTask.task_id == task_id)
+    )
+    return result.scalars().first()
+
+
+def _task_held_by(task_id: str, owner: Optional[str]):
+    """Filter of the task, restricted to ``owner``'s lease when given."""
+    condition = models.ScrapingTask.task_id == task_id
+    if owner is not None:
+        condition = and_(condition, models.ScrapingTask.lease_owner == owner)
+    return condition
+
+
+async def finish_scraping_task(
+    db: AsyncSession,
+    task_id: str,
+    status: str,
+    owner: Optional[str] = None,
+    **values,
+) -> bool:
+    """
+    Final status (SUCCESS/FAILED): the task's credentials and lease are
+    erased. With ``owner`` the task is only updated while that worker still
+    holds its lease (it may have expired and been reclaimed by another one).
+
+    Returns:
+        Whether the task was updated.
+    """
+    result = await db.execute(
+        update(models.ScrapingTask)
+        .where(_task_held_by(task_id, owner))
+        .values(
+            status=status,
+            credentials_enc=None,
+            lease_owner=None,
+            lease_expires_at=None,
+            **values,
+        )
+    )
+    return result.rowcount > 0
+
+
+def _claimable_task_filter(now: datetime):
+    return and_(
+        models.ScrapingTask.payload.isnot(None),
+        or_(
+            and_(
+                models.ScrapingTask.status == "PENDING",
+                models.ScrapingTask.available_at <= now,
+            ),
+            # Worker died or stalled: its lease expired without heartbeats
+            and_(
+                models.ScrapingTask.status == "IN_PROGRESS",
+                or_(
+                    models.ScrapingTask.lease_expires_at.is_(None),
+                    models.ScrapingTask.lease_expires_at < now,
+                ),
+            ),
+        ),
+    )
+
+
+async def claim_scraping_tasks(
+    db: AsyncSession,
+    limit: int,
+    owner: str,
+    lease_seconds: float,
+    exclude_transportadoras: Sequence[str] = (),
+) -> list:
+    """
+    Leases up to ``limit`` due tasks to ``owner``: PENDING tasks whose
+    ``available_at`` passed and IN_PROGRESS tasks whose lease expired.
+    Uses ``FOR UPDATE SKIP LOCKED`` on Postgres; elsewhere (SQLite) each row
+    is taken with a conditional UPDATE that re-checks it is still claimable.
+    Tasks of ``exclude_transportadoras`` are left to other workers.
+
+    Returns:
+        The claimed tasks, oldest first.
+    """
+    now = datetime.utcnow()
+    lease = {
+        "status": "IN_PROGRESS",
+        "lease_owner": owner,
+        "lease_expires_at": now + timedelta(seconds=lease_seconds),
+        "heartbeat_at": now,
+    }
+    candidates = select(models.ScrapingTask.id, models.ScrapingTask.status).where(
+        _claimable_task_filter(now)
+    )
+    if exclude_transportadoras:
+        candidates = candidates.where(
+            or_(
+                models.ScrapingTask.transportadora.is_(None),
+                func.lower(models.ScrapingTask.transportadora).notin_(
+                    [carrier.lower() for carrier in exclude_transportadoras]
+                ),
+            )
+        )
+    candidates = candidates.order_by(models.ScrapingTask.available_at).limit(limit)
+
+    if db.get_bind().dialect.name == "postgresql":
+        claimed = (await db.execute(candidates.with_for_update(skip_locked=True))).all()
+        if claimed:
+            await db.execute(
+                update(models.ScrapingTask)
+                .where(models.ScrapingTask.id.in_([row.id for row in claimed]))
+                .values(**lease)
+            )
+    else:
+        claimed = []
+        for row in (await db.execute(candidates)).all():
+            result = await db.execute(
+                update(models.ScrapingTask)
+                .where(models.ScrapingTask.id == row.id, _claimable_task_filter(now))
+                .values(**lease)
+            )
+            if result.rowcount == 1:
+                claimed.append(row)
+    await db.commit()
+
+    if not claimed:
+        return []
+    reclaimed = sum(1 for row in claimed if row.status == "IN_PROGRESS")
+    if reclaimed:
+        logger.warning(f"{owner} reclaimed {reclaimed} task(s) with expired lease.")
+    result = await db.execute(
+        select(models.ScrapingTask)
+        .where(models.ScrapingTask.id.in_([row.id for row in claimed]))
+        .order_by(models.ScrapingTask.available_at)
+    )
+    return list(result.scalars().all())
+
+
+async def renew_scraping_task_leases(
+    db: AsyncSession, owner: str, task_ids: list, lease_seconds: float
+) -> int:
+    """
+    Heartbeat: extends the lease of the running tasks still owned by
+    ``owner``.
+
+    Returns:
+        How many leases were renewed.
+    """
+    if not task_ids:
+        return 0
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(models.ScrapingTask)
+        .where(
+            models.ScrapingTask.task_id.in_(task_ids),
+            models.ScrapingTask.lease_owner == owner,
+            models.ScrapingTask.status == "IN_PROGRESS",
+        )
+        .values(
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now,
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def reschedule_scraping_task(
+    db: AsyncSession,
+    task_id: str,
+    delay_seconds: float,
+    error_message: str,
+    owner: Optional[str] = None,
+) -> bool:
+    """
+    Puts the task back in the queue after ``delay_seconds``, releasing its
+    lease (only while ``owner`` holds it, when given).
+
+    Returns:
+        Whether the task was rescheduled.
+    """
+    result = await db.execute(
+        update(models.ScrapingTask)
+        .where(_task_held_by(task_id, owner))
+        .values(
+            status="PENDING",
+            error_message=error_message,
+            available_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+            reagendamentos=func.coalesce(models.ScrapingTask.reagendamentos, 0) + 1,
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+    )
+    await db.commit()
+    return result.rowcount > 0
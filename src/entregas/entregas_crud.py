@@ -1,7 +1,11 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from src.db import models
 from src.entregas import entregas_models
+from src.utils.credentials_crypto import encrypt_credentials, options_fingerprint
 from datetime import datetime
+import hashlib
+import json
 
 
 def get_entrega(db: Session, entrega_id: int):
@@ -35,16 +39,69 @@ def get_entrega_by_transportadora_and_nf(
     )
 
 
-def create_entrega(db: Session, entrega: entregas_models.EntregaCreate, user_id: int):
+def get_initial_status(historico: list) -> str:
     status = "em andamento"
-    if entrega.historico:
-        for movimento in entrega.historico:
+    if historico:
+        for movimento in historico:
             if ("entregue" or "realizada") in movimento.get("status", "").lower():
                 status = "entregue"
                 break
             if ("REALIZADA") in movimento.get("status", ""):
                 status = "entregue"
                 break
+    return status
+
+
+def movimentacao_chave(
+    movimento: str, dt_movimento: datetime, localizacao: str, detalhes: str
+) -> str:
+    """Natural key of a movement: hash of its content, stable across scrapes."""
+    if dt_movimento is not None:
+        dt_movimento = dt_movimento.replace(tzinfo=None).isoformat()
+    raw = json.dumps([movimento, dt_movimento, localizacao, detalhes])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_movimentacao_row(movimento_data: dict, entrega_id: int, user_id: int):
+    local = movimento_data.get("local")
+    localizacao_str = f"{local['cidade']} - {local['estado']}" if local else None
+    dt_movimento_str = movimento_data.get("timestamp")
+    dt_movimento = (
+        datetime.fromisoformat(dt_movimento_str) if dt_movimento_str else None
+    )
+    return {
+        "movimento": movimento_data["status"],
+        "dt_movimento": dt_movimento,
+        "localizacao": localizacao_str,
+        "detalhes": movimento_data.get("detalhes"),
+        "chave": movimentacao_chave(
+            movimento_data["status"],
+            dt_movimento,
+            localizacao_str,
+            movimento_data.get("detalhes"),
+        ),
+        "entrega_id": entrega_id,
+        "criado_por_id": user_id,
+    }
+
+
+def build_movimentacao_rows(historico: list, entrega_id: int, user_id: int) -> list:
+    """Rows for a bulk insert, without repeated movements."""
+    rows = {}
+    for movimento_data in historico or []:
+        row = build_movimentacao_row(movimento_data, entrega_id, user_id)
+        rows.setdefault(row["chave"], row)
+    return list(rows.values())
+
+
+def historico_hash(historico: list) -> str:
+    """Content hash of a history, independent of order and repeated events."""
+    chaves = sorted(row["chave"] for row in build_movimentacao_rows(historico, 0, 0))
+    return hashlib.sha256("\n".join(chaves).encode("utf-8")).hexdigest()
+
+
+def create_entrega(db: Session, entrega: entregas_models.EntregaCreate, user_id: int):
+    status = get_initial_status(entrega.historico)
 
     db_entrega = models.Entrega(
         transportadora=entrega.transportadora,
@@ -55,31 +112,16 @@ def create_entrega(db: Session, entrega: entregas_models.EntregaCreate, user_id:
         status=status,
         previsao_entrega_inicial=entrega.previsao_entrega_inicial,
         previsao_entrega=entrega.previsao_entrega,
+        historico_hash=historico_hash(entrega.historico),
         criado_por_id=user_id,
     )
     db.add(db_entrega)
     db.commit()
     db.refresh(db_entrega)
 
-    if entrega.historico:
-        for movimento_data in entrega.historico:
-            local = movimento_data.get("local")
-            localizacao_str = (
-                f"{local['cidade']} - {local['estado']}" if local else None
-            )
-            dt_movimento_str = movimento_data.get("timestamp")
-            dt_movimento = (
-                datetime.fromisoformat(dt_movimento_str) if dt_movimento_str else None
-            )
-            db_movimentacao = models.EntregaMovimentacao(
-                movimento=movimento_data["status"],
-                dt_movimento=dt_movimento,
-                localizacao=localizacao_str,
-                detalhes=movimento_data.get("detalhes"),
-                entrega_id=db_entrega.id,
-                criado_por_id=user_id,
-            )
-            db.add(db_movimentacao)
+    rows = build_movimentacao_rows(entrega.historico, db_entrega.id, user_id)
+    if rows:
+        db.execute(insert(models.EntregaMovimentacao), rows)
         db.commit()
 
     create_movimentacao_notificacao(db, db_entrega.id)
@@ -87,28 +129,6 @@ def create_entrega(db: Session, entrega: entregas_models.EntregaCreate, user_id:
     return db_entrega
 
 
-def add_movimentacoes_to_entrega(
-    db: Session, entrega_id: int, historico: list, user_id: int
-):
-    for movimento_data in historico:
-        local = movimento_data.get("local")
-        localizacao_str = f"{local['cidade']} - {local['estado']}" if local else None
-        dt_movimento_str = movimento_data.get("timestamp")
-        dt_movimento = (
-            datetime.fromisoformat(dt_movimento_str) if dt_movimento_str else None
-        )
-        db_movimentacao = models.EntregaMovimentacao(
-            movimento=movimento_data["status"],
-            dt_movimento=dt_movimento,
-            localizacao=localizacao_str,
-            detalhes=movimento_data.get("detalhes"),
-            entrega_id=entrega_id,
-            criado_por_id=user_id,
-        )
-        db.add(db_movimentacao)
-    db.commit()
-
-
 def create_movimentacao_notificacao(db: Session, entrega_id: int):
     db_movimentacao_notificacao = models.MovimentacaoNotificacao(
         entrega_id=entrega_id,
@@ -133,3 +153,75 @@ def update_entrega(
     db.commit()
     db.refresh(db_entrega)
     return db_entrega
+
+
+def get_agendamento_scraping(
+    db: Session, transportadora: str, numero_nf: str, cnpj_destinatario: str
+):
+    return (
+        db.query(models.AgendamentoScraping)
+        .filter(
+            models.AgendamentoScraping.transportadora == transportadora,
+            models.AgendamentoScraping.numero_nf == numero_nf,
+            models.AgendamentoScraping.cnpj_destinatario == cnpj_destinatario,
+        )
+        .first()
+    )
+
+
+ACTIVE_TASK_STATUSES = ("PENDING", "IN_PROGRESS")
+
+
+def create_scraping_task(
+    db: Session,
+    task_id: str,
+    scrap_request: entregas_models.EntregaScrapRequest,
+    user_id: int,
+):
+    db_task = models.ScrapingTask(
+        task_id=task_id,
+        status="PENDING",
+        transportadora=scrap_request.transportadora,
+        numero_nf=scrap_request.numero_nf,
+        cnpj_destinatario=scrap_request.cnpj_destinatario,
+        payload=scrap_request.model_dump_json(exclude={"credentials"}),
+        credentials_enc=encrypt_credentials(scrap_request.credentials),
+        opcoes_hash=options_fingerprint(
+            scrap_request.credentials, scrap_request.bypass_cache
+        ),
+        user_id=user_id,
+        available_at=datetime.utcnow(),
+    )
+    db.add(db_task)
+    db.commit()
+    db.refresh(db_task)
+    return db_task
+
+
+def get_scraping_task(db: Session, task_id: str):
+    return (
+        db.query(models.ScrapingTask)
+        .filter(models.ScrapingTask.task_id == task_id)
+        .first()
+    )
+
+
+def get_active_scraping_task(
+    db: Session,
+    transportadora: str,
+    numero_nf: str,
+    cnpj_destinatario: str,
+    opcoes_hash: str,
+):
+    return (
+        db.query(models.ScrapingTask)
+        .filter(
+            models.ScrapingTask.transportadora == transportadora,
+            models.ScrapingTask.numero_nf == numero_nf,
+            models.ScrapingTask.cnpj_destinatario == cnpj_destinatario,
+            models.ScrapingTask.opcoes_hash == opcoes_hash,
+            models.ScrapingTask.status.in_(ACTIVE_TASK_STATUSES),
+        )
+        .order_by(models.ScrapingTask.created_at)
+        .first()
+    )
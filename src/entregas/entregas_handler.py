@@ -1,10 +1,20 @@
-from sqlalchemy.orm import Session
-from src.entregas import entregas_crud, entregas_models
-from src.db import database
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.entregas import (
+    entregas_async_crud,
+    entregas_crud,
+    entregas_models,
+    entregas_scheduler,
+)
+from src.db.async_database import AsyncSessionLocal
 from src.scrapers import runner
+from src.scrapers.circuit_breaker import CircuitOpenError, get_breaker
 from src.configs.logger_config import logger
 from datetime import datetime
-from src.db.models import ScrapingTask  # Import ScrapingTask
+
+
+class LeaseLostError(Exception):
+    """The worker's lease on the task expired and another worker took it."""
 
 
 def get_movimento_tuple(movimento):
@@ -30,136 +40,299 @@ def get_movimento_tuple(movimento):
         )
 
 
-def scrap_and_save(
-    scrap_request: entregas_models.EntregaScrapRequest, user_id: int, task_id: str
+async def agendar_proximo_scraping(
+    db: AsyncSession, scrap_request: entregas_models.EntregaScrapRequest, **kwargs
 ):
-    db: Session = database.SessionLocal()
+    """Updates the adaptive refresh schedule; never fails the task."""
     try:
-        logger.info(
-            f"Starting scraping for {scrap_request.transportadora} - NF {scrap_request.numero_nf} (Task ID: {task_id})"
+        async with db.begin_nested():
+            await entregas_scheduler.record_scrape_result(
+                db,
+                scrap_request.transportadora,
+                scrap_request.numero_nf,
+                scrap_request.cnpj_destinatario,
+                **kwargs,
+            )
+    except Exception as e:
+        logger.warning(f"Failed to update refresh schedule: {e}")
+
+
+async def _mark_task_failed(
+    db: AsyncSession, task_id: str, error_msg: str, owner: str = None
+) -> bool:
+    marked = await entregas_async_crud.finish_scraping_task(
+        db, task_id, "FAILED", owner, error_message=error_msg
+    )
+    if not marked:
+        logger.warning(f"Task {task_id} is no longer leased by {owner}; not failed.")
+    return marked
+
+
+async def fail_task(task_id: str, error_msg: str, writer=None, owner: str = None):
+    await _write(writer, _mark_task_failed, task_id, error_msg, owner)
+
+
+async def _write(writer, apply, *args):
+    """Runs ``apply(db, *args)`` through the worker's ResultWriter, if any."""
+    if writer is not None:
+        return await writer.submit(apply, *args)
+    async with AsyncSessionLocal() as db:
+        result = await apply(db, *args)
+        await db.commit()
+        return result
+
+
+async def reschedule_task(task_id: str, error: CircuitOpenError, owner: str = None):
+    """
+    Puts a task rejected by an open carrier circuit back in the queue, to run
+    once the cooldown is over, or fails it after ``max_reschedules``.
+    """
+    max_reschedules = get_breaker(error.carrier).config["max_reschedules"]
+    async with AsyncSessionLocal() as db:
+        db_task = await entregas_async_crud.get_scraping_task(db, task_id)
+        if db_task and (db_task.reagendamentos or 0) >= max_reschedules:
+            error_msg = (
+                f"{error} Task {task_id} excedeu {max_reschedules} reagendamentos."
+            )
+            logger.error(error_msg)
+            await _mark_task_failed(db, task_id, error_msg, owner)
+            await db.commit()
+            return
+        if await entregas_async_crud.reschedule_scraping_task(
+            db, task_id, error.retry_after, str(error), owner
+        ):
+            logger.warning(f"{error} Task {task_id} reagendada.")
+
+
+def _scraper_kwargs(scrap_request: entregas_models.EntregaScrapRequest) -> dict:
+    return {
+        "transportadora": scrap_request.transportadora,
+        "numero_nf": scrap_request.numero_nf,
+        "cnpj_destinatario": scrap_request.cnpj_destinatario,
+        "credentials": scrap_request.credentials,
+        "bypass_cache": scrap_request.bypass_cache,
+    }
+
+
+async def run_task(
+    scrap_request: entregas_models.EntregaScrapRequest,
+    user_id: int,
+    task_id: str,
+    writer=None,
+    owner: str = None,
+):
+    """
+    Runs a claimed task on the caller's event loop (the scraping worker),
+    including its database writes. With a ``ResultWriter`` the result is
+    committed together with those of other tasks. With ``owner`` (the lease
+    holder) the result is dropped if the lease was lost meanwhile.
+    """
+    logger.info(
+        f"Starting scraping for {scrap_request.transportadora} - NF {scrap_request.numero_nf} (Task ID: {task_id})"
+    )
+    try:
+        scraped_data = await runner.run_scraper(**_scraper_kwargs(scrap_request))
+    except CircuitOpenError as e:
+        await reschedule_task(task_id, e, owner)
+        return
+    except Exception as e:
+        error_msg = f"An error occurred during the scrap and save process (Task ID: {task_id}): {e}"
+        logger.error(error_msg, exc_info=True)
+        await fail_task(task_id, error_msg, writer, owner)
+        return
+    await _write(
+        writer,
+        apply_scraped_data,
+        scrap_request,
+        user_id,
+        task_id,
+        scraped_data,
+        owner,
+    )
+
+
+async def run_task_batch(batch: list, writer=None, owner: str = None):
+    """
+    Runs claimed tasks of one carrier that share the recipient, credentials
+    and cache flag in a single browser session (one login for Via Verde).
+    Each result is then applied like in ``run_task``.
+
+    Args:
+        batch: ``(scrap_request, user_id, task_id)`` tuples.
+    """
+    first = batch[0][0]
+    task_ids = [task_id for _, _, task_id in batch]
+    logger.info(
+        f"Starting batch scraping for {first.transportadora} - "
+        f"{len(batch)} NFs (Task IDs: {task_ids})"
+    )
+    try:
+        results = await runner.run_scraper_many(
+            transportadora=first.transportadora,
+            numeros_nf=[scrap_request.numero_nf for scrap_request, _, _ in batch],
+            cnpj_destinatario=first.cnpj_destinatario,
+            credentials=first.credentials,
+            bypass_cache=first.bypass_cache,
         )
-        # Update task status to IN_PROGRESS (optional, PENDING is fine for start)
-        db_task = db.query(ScrapingTask).filter(ScrapingTask.task_id == task_id).first()
-        if db_task:
-            db_task.status = "IN_PROGRESS"
-            db.add(db_task)
-            db.commit()
-            db.refresh(db_task)
-
-        import asyncio
-
-        scraped_data = asyncio.run(
-            runner.run_scraper(
-                transportadora=scrap_request.transportadora,
-                numero_nf=scrap_request.numero_nf,
-                cnpj_destinatario=scrap_request.cnpj_destinatario,
-                credentials=scrap_request.credentials,
+    except CircuitOpenError as e:
+        for task_id in task_ids:
+            await reschedule_task(task_id, e, owner)
+        return
+    except Exception as e:
+        logger.error(
+            f"An error occurred during the batch scrap (Task IDs: {task_ids}): {e}",
+            exc_info=True,
+        )
+        await asyncio.gather(
+            *(
+                fail_task(
+                    task_id,
+                    f"An error occurred during the scrap and save process (Task ID: {task_id}): {e}",
+                    writer,
+                    owner,
+                )
+                for task_id in task_ids
             )
         )
-
-        if scraped_data and scraped_data.get("informacoes_gerais"):
-            logger.info(
-                f"Scraping successful for {scrap_request.transportadora} - NF {scrap_request.numero_nf}. Data: {scraped_data}"
+        return
+    await asyncio.gather(
+        *(
+            _write(
+                writer,
+                apply_scraped_data,
+                scrap_request,
+                user_id,
+                task_id,
+                results[scrap_request.numero_nf],
+                owner,
             )
+            for scrap_request, user_id, task_id in batch
+        )
+    )
+
 
-            info = scraped_data["informacoes_gerais"]
-            existing_entrega = entregas_crud.get_entrega_by_transportadora_and_nf(
-                db, info["transportadora"], info["numero_nf"]
+async def apply_scraped_data(
+    db: AsyncSession,
+    scrap_request: entregas_models.EntregaScrapRequest,
+    user_id: int,
+    task_id: str,
+    scraped_data: dict,
+    owner: str = None,
+):
+    """
+    Writes one scrape result (delivery, movements, task status, schedule)
+    without committing. Errors roll back only this result's SAVEPOINT and
+    mark the task as failed; a result whose lease was lost is dropped.
+    """
+    try:
+        async with db.begin_nested():
+            await _apply_scraped_data(
+                db, scrap_request, user_id, task_id, scraped_data, owner
             )
+    except LeaseLostError as e:
+        logger.warning(f"Result of task {task_id} dropped: {e}")
+    except Exception as e:
+        error_msg = f"An error occurred during the scrap and save process (Task ID: {task_id}): {e}"
+        logger.error(error_msg, exc_info=True)
+        await _mark_task_failed(db, task_id, error_msg, owner)
+
 
-            entrega_id = None
-            if existing_entrega:
-                logger.info("Entrega já existe")
-                entrega_id = existing_entrega.id
-                # Delivery exists, check for new movements
-                scraped_movimentos = set()
-                if scraped_data.get("historico"):
-                    scraped_movimentos = {
-                        get_movimento_tuple(m) for m in scraped_data["historico"]
-                    }
-
-                db_movimentos = {
-                    get_movimento_tuple(m) for m in existing_entrega.movimentacoes
-                }
-
-                if scraped_movimentos != db_movimentos:
-                    # New movements found, update delivery
-                    if scraped_data.get("historico"):
-                        # This is not efficient, but it's the simplest way to update
-                        entregas_crud.delete_movimentacoes_by_entrega_id(
-                            db, existing_entrega.id
-                        )
-                        entregas_crud.add_movimentacoes_to_entrega(
-                            db, existing_entrega.id, scraped_data["historico"], user_id
-                        )
-                        new_status = existing_entrega.status
-                        if scraped_data.get("historico"):
-                            has_entregue = any(
-                                ("entregue" or "realizada")
-                                in m.get("status", "").lower()
-                                for m in scraped_data["historico"]
-                            )
-                            if has_entregue:
-                                new_status = "entregue"
-                            else:
-                                new_status = scraped_data["historico"][0]["status"]
-
-                        update_data = entregas_models.EntregaUpdate(status=new_status)
-                        entregas_crud.update_entrega(
-                            db, existing_entrega.id, update_data, user_id
-                        )
-                        entregas_crud.create_movimentacao_notificacao(
-                            db, existing_entrega.id
-                        )
-                        logger.info(
-                            f"Delivery {existing_entrega.id} updated with new movements."
-                        )
+async def _apply_scraped_data(
+    db: AsyncSession,
+    scrap_request: entregas_models.EntregaScrapRequest,
+    user_id: int,
+    task_id: str,
+    scraped_data: dict,
+    owner: str = None,
+):
+    if scraped_data and scraped_data.get("informacoes_gerais"):
+        logger.info(
+            f"Scraping successful for {scrap_request.transportadora} - NF {scrap_request.numero_nf}. Data: {scraped_data}"
+        )
+
+        info = scraped_data["informacoes_gerais"]
+        historico = scraped_data.get("historico") or []
+        entrega_data = entregas_models.EntregaCreate(
+            transportadora=info["transportadora"],
+            codigo_rastreio=info["codigo_rastreio"],
+            numero_nf=info["numero_nf"],
+            cliente=info.get("destinatario"),
+            cnpj_destinatario=info.get("cnpj_destinatario"),
+            previsao_entrega=info.get("previsao_entrega"),
+            previsao_entrega_inicial=info.get("previsao_entrega"),
+            historico=scraped_data.get("historico"),
+        )
+        ultima_movimentacao = max(
+            (
+                dt
+                for dt in (get_movimento_tuple(m)[1] for m in historico)
+                if dt is not None
+            ),
+            default=None,
+        )
+
+        # Cria ou localiza a entrega em um único comando (seguro entre workers)
+        novo_hash = entregas_crud.historico_hash(historico)
+        entrega, created = await entregas_async_crud.upsert_entrega(
+            db, entrega_data, user_id, novo_hash
+        )
+        entrega_id = entrega.id
+
+        if created:
+            logger.info("New delivery created.")
+        elif entrega.historico_hash == novo_hash:
+            # Same history as the last scrape: movements are not read
+            logger.info(f"No new movements for delivery {entrega_id}.")
+        else:
+            # Persist only the movements not stored yet
+            db_movimentos = {
+                get_movimento_tuple(m)
+                for m in await entregas_async_crud.get_movimentacoes(db, entrega_id)
+            }
+            novos_movimentos = [
+                m for m in historico if get_movimento_tuple(m) not in db_movimentos
+            ]
+
+            if novos_movimentos:
+                has_entregue = any(
+                    ("entregue" or "realizada") in m.get("status", "").lower()
+                    for m in historico
+                )
+                if has_entregue:
+                    new_status = "entregue"
                 else:
-                    logger.info(f"No new movements for delivery {existing_entrega.id}.")
-            else:
-                # Delivery does not exist, create it
-                entrega_data = entregas_models.EntregaCreate(
-                    transportadora=info["transportadora"],
-                    codigo_rastreio=info["codigo_rastreio"],
-                    numero_nf=info["numero_nf"],
-                    cliente=info.get("destinatario"),
-                    cnpj_destinatario=info.get("cnpj_destinatario"),
-                    previsao_entrega=info.get("previsao_entrega"),
-                    previsao_entrega_inicial=info.get("previsao_entrega"),
-                    historico=scraped_data.get("historico"),
+                    new_status = historico[0]["status"]
+
+                inserted = await entregas_async_crud.add_new_movimentacoes(
+                    db, entrega_id, novos_movimentos, new_status, novo_hash, user_id
                 )
-                new_entrega = entregas_crud.create_entrega(
-                    db=db, entrega=entrega_data, user_id=user_id
+                logger.info(
+                    f"Delivery {entrega_id} updated with {inserted} new movements."
+                )
+            else:
+                await entregas_async_crud.update_historico_hash(
+                    db, entrega_id, novo_hash
                 )
-                entrega_id = new_entrega.id
-                logger.info("New delivery created.")
+                logger.info(f"No new movements for delivery {entrega_id}.")
 
-            # Update task status to SUCCESS
-            if db_task:
-                db_task.status = "SUCCESS"
-                db_task.entrega_id = entrega_id
-                db.add(db_task)
-                db.commit()
-                db.refresh(db_task)
+        # Update task status to SUCCESS (rolls everything back if the lease was lost)
+        if not await entregas_async_crud.finish_scraping_task(
+            db, task_id, "SUCCESS", owner, entrega_id=entrega_id
+        ):
+            raise LeaseLostError(f"task {task_id} is no longer leased by {owner}")
 
-        else:
-            error_msg = f"Scraping failed for {scrap_request.transportadora} - NF {scrap_request.numero_nf}: {scraped_data.get('erro')}"
-            logger.error(error_msg)
-            if db_task:
-                db_task.status = "FAILED"
-                db_task.error_message = error_msg
-                db.add(db_task)
-                db.commit()
-                db.refresh(db_task)
+        await agendar_proximo_scraping(
+            db,
+            scrap_request,
+            entrega=await entregas_async_crud.get_entrega(db, entrega_id),
+            ultima_movimentacao=ultima_movimentacao,
+        )
 
-    except Exception as e:
-        error_msg = f"An error occurred during the scrap and save process (Task ID: {task_id}): {e}"
-        logger.error(error_msg, exc_info=True)
-        if db_task:
-            db_task.status = "FAILED"
-            db_task.error_message = error_msg
-            db.add(db_task)
-            db.commit()
-            db.refresh(db_task)
-    finally:
-        db.close()
+    else:
+        error_msg = f"Scraping failed for {scrap_request.transportadora} - NF {scrap_request.numero_nf}: {scraped_data.get('erro')}"
+        logger.error(error_msg)
+        if not await _mark_task_failed(db, task_id, error_msg, owner):
+            return
+
+        if entregas_scheduler.is_not_found(scraped_data):
+            await agendar_proximo_scraping(db, scrap_request, nao_encontrado=True)
@@ -39,3 +39,14 @@ class EntregaScrapRequest(BaseModel):
     numero_nf: str
     cnpj_destinatario: str
     credentials: Optional[dict] = None
+    bypass_cache: bool = False
+
+
+class EntregaRef(BaseModel):
+    transportadora: str
+    numero_nf: str
+    cnpj_destinatario: str
+
+
+class EntregaScrapDueRequest(BaseModel):
+    entregas: List[EntregaRef]
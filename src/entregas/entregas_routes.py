@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, status
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from src.entregas import entregas_models, entregas_service
 from src.db import database
@@ -11,15 +11,12 @@ router = APIRouter()
 @router.post("/scrap", status_code=status.HTTP_202_ACCEPTED)
 def scrap_entrega(
     scrap_request: entregas_models.EntregaScrapRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(database.get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
-    task_id = entregas_service.initiate_scraping(
-        scrap_request, background_tasks, db, current_user.id
-    )
+    task_id = entregas_service.initiate_scraping(scrap_request, db, current_user.id)
     return {
-        "message": "Scraping process initiated in the background.",
+        "message": "Scraping task queued for the worker.",
         "task_id": task_id,
     }
 
@@ -33,6 +30,29 @@ def get_scraping_status(
     return entregas_service.get_scraping_status(task_id, db)
 
 
+@router.post("/scrap/due")
+def get_due_entregas(
+    due_request: entregas_models.EntregaScrapDueRequest,
+    db: Session = Depends(database.get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    return entregas_service.get_due_entregas(due_request, db)
+
+
+@router.get("/scrap/breakers")
+def get_scraping_breakers(
+    current_user: Usuario = Depends(get_current_user),
+):
+    return entregas_service.get_breaker_states()
+
+
+@router.get("/scrap/cache")
+def get_scraping_cache_stats(
+    current_user: Usuario = Depends(get_current_user),
+):
+    return entregas_service.get_result_cache_stats()
+
+
 @router.post(
     "/", response_model=entregas_models.EntregaOut, status_code=status.HTTP_201_CREATED
 )
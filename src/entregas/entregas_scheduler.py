@@ -0,0 +1,183 @@
+"""
+Adaptive refresh scheduling of deliveries.
+
+Every scrape result updates the delivery's ``AgendamentoScraping`` with the
+next time it is worth scraping again, so the orchestrator spends browser
+capacity where changes are likely:
+
+- deliveries in a final status (``entregue``) are not scraped anymore;
+- the interval grows with the age of the last movement (``faixas``);
+- deliveries close to or past ``previsao_entrega`` use the shortest interval;
+- NFs the carrier does not find are backed off exponentially.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from src.configs.config import REFRESH_SCHEDULE_CONFIG
+from src.configs.logger_config import logger
+from src.db import models
+from src.entregas import entregas_async_crud, entregas_crud
+
+NOT_FOUND_ERROR_TYPES = {"not_found"}
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def is_not_found(scraped_data: Optional[dict]) -> bool:
+    """Whether a failed scrape means the carrier had no data for the NF."""
+    erro = (scraped_data or {}).get("erro") or {}
+    return erro.get("tipo") in NOT_FOUND_ERROR_TYPES
+
+
+def compute_next_scrape(
+    status: Optional[str],
+    ultima_movimentacao: Optional[datetime],
+    previsao_entrega: Optional[date],
+    nao_encontrado: int = 0,
+    agora: Optional[datetime] = None,
+) -> tuple[Optional[datetime], str]:
+    """
+    Compute when a delivery should be scraped again.
+
+    Args:
+        status: Current ``Entrega.status``.
+        ultima_movimentacao: Date of the most recent movement.
+        previsao_entrega: Expected delivery date.
+        nao_encontrado: Consecutive scrapes that did not find the NF.
+        agora: Reference time (UTC, naive).
+
+    Returns:
+        Tuple (next scrape time or None to stop scraping, reason).
+    """
+    config = REFRESH_SCHEDULE_CONFIG
+    agora = agora or datetime.utcnow()
+
+    if status and status.lower() in config["status_finais"]:
+        return None, status.lower()
+
+    if nao_encontrado:
+        horas = min(
+            config["nao_encontrado_base_horas"] * 2 ** (nao_encontrado - 1),
+            config["nao_encontrado_max_horas"],
+        )
+        return agora + timedelta(hours=horas), "nao encontrado"
+
+    motivo = "dormente"
+    horas = config["intervalo_dormente_horas"]
+    ultima_movimentacao = _as_utc_naive(ultima_movimentacao)
+    if ultima_movimentacao is not None:
+        idade_horas = (agora - ultima_movimentacao).total_seconds() / 3600
+        for idade_maxima, intervalo in config["faixas"]:
+            if idade_horas <= idade_maxima:
+                horas, motivo = intervalo, f"movimentacao < {idade_maxima}h"
+                break
+
+    janela = timedelta(days=config["janela_previsao_dias"])
+    if previsao_entrega and agora.date() >= previsao_entrega - janela:
+        mais_frequente = config["faixas"][0][1]
+        if mais_frequente < horas:
+            horas, motivo = mais_frequente, "previsao de entrega"
+
+    return agora + timedelta(hours=horas), motivo
+
+
+async def record_scrape_result(
+    db: AsyncSession,
+    transportadora: str,
+    numero_nf: str,
+    cnpj_destinatario: str,
+    entrega: Optional[models.Entrega] = None,
+    nao_encontrado: bool = False,
+    ultima_movimentacao: Optional[datetime] = None,
+):
+    """
+    Reschedule a delivery after a scrape. Call with the saved ``entrega``
+    after a success, or with ``nao_encontrado=True`` when the carrier did not
+    find the NF. ``ultima_movimentacao`` saves the query for the latest
+    movement when the caller already knows it.
+    """
+    agendamento = await entregas_async_crud.get_agendamento_scraping(
+        db, transportadora, numero_nf, cnpj_destinatario
+    )
+    consecutivos = 0
+    if nao_encontrado and agendamento:
+        consecutivos = agendamento.nao_encontrado_consecutivos + 1
+    elif nao_encontrado:
+        consecutivos = 1
+
+    values = {}
+    status = previsao = None
+    if entrega is not None:
+        status, previsao = entrega.status, entrega.previsao_entrega
+        if ultima_movimentacao is None:
+            ultima_movimentacao = await entregas_async_crud.get_ultima_movimentacao_dt(
+                db, entrega.id
+            )
+        values["entrega_id"] = entrega.id
+
+    agora = datetime.utcnow()
+    proximo, motivo = compute_next_scrape(
+        status, ultima_movimentacao, previsao, consecutivos, agora
+    )
+    await entregas_async_crud.save_agendamento_scraping(
+        db,
+        transportadora,
+        numero_nf,
+        cnpj_destinatario,
+        proximo_scrape_em=proximo,
+        ultimo_scrape_em=agora,
+        nao_encontrado_consecutivos=consecutivos,
+        motivo=motivo,
+        **values,
+    )
+    logger.info(
+        f"[{transportadora.upper()}] NF {numero_nf}: próximo scraping em "
+        f"{proximo.isoformat() if proximo else 'nunca'} ({motivo})."
+    )
+
+
+def filter_due(db: Session, entregas: list, agora: Optional[datetime] = None) -> dict:
+    """
+    Split the deliveries an orchestrator run would scrape into those due now
+    and those that can be skipped.
+
+    Args:
+        entregas: Dicts with transportadora, numero_nf and cnpj_destinatario.
+
+    Returns:
+        Dict with the ``due`` deliveries and the ``skipped`` ones (with their
+        next scrape time and reason).
+    """
+    agora = agora or datetime.utcnow()
+    due, skipped = [], []
+    for entrega in entregas:
+        agendamento = None
+        if REFRESH_SCHEDULE_CONFIG["enabled"]:
+            agendamento = entregas_crud.get_agendamento_scraping(
+                db,
+                entrega["transportadora"],
+                entrega["numero_nf"],
+                entrega["cnpj_destinatario"],
+            )
+        if agendamento is None or agendamento.ultimo_scrape_em is None:
+            due.append(entrega)
+            continue
+
+        proximo = _as_utc_naive(agendamento.proximo_scrape_em)
+        if proximo is not None and proximo <= agora:
+            due.append(entrega)
+        else:
+            skipped.append(
+                {
+                    **entrega,
+                    "proximo_scrape_em": proximo,
+                    "motivo": agendamento.motivo,
+                }
+            )
+    return {"due": due, "skipped": skipped}
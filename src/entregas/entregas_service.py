@@ -1,25 +1,57 @@
 import uuid
-from fastapi import BackgroundTasks, HTTPException, status
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from src.entregas import entregas_crud, entregas_models
+from src.entregas import entregas_crud, entregas_models, entregas_scheduler
 from src.db.models import ScrapingTask
-from src.entregas.entregas_handler import scrap_and_save
+from src.configs.logger_config import logger
+from src.scrapers.circuit_breaker import breaker_states
+from src.scrapers.result_cache import result_cache
+from src.utils.credentials_crypto import options_fingerprint
+from src.worker.worker_status import read_status
 
 
 def initiate_scraping(
     scrap_request: entregas_models.EntregaScrapRequest,
-    background_tasks: BackgroundTasks,
     db: Session,
     user_id: int,
 ):
-    task_id = str(uuid.uuid4())
-    db_task = ScrapingTask(task_id=task_id, status="PENDING")
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    """
+    Enqueues a scraping task for the worker (``run_worker.py``). Duplicate
+    submissions attach to the task already PENDING or IN_PROGRESS for the
+    same (transportadora, numero_nf, cnpj) made with the same credentials and
+    ``bypass_cache``; the partial unique index ``uq_scraping_tasks_ativa``
+    settles races between API processes.
+    """
+    active_task = _get_active_task(db, scrap_request)
+    if active_task is None:
+        task_id = str(uuid.uuid4())
+        try:
+            entregas_crud.create_scraping_task(db, task_id, scrap_request, user_id)
+            return task_id
+        except IntegrityError:
+            # Outro processo enfileirou a mesma entrega entre a busca e o INSERT
+            db.rollback()
+            active_task = _get_active_task(db, scrap_request)
+            if active_task is None:
+                raise
 
-    background_tasks.add_task(scrap_and_save, scrap_request, user_id, task_id)
-    return task_id
+    logger.info(
+        f"Scraping of {scrap_request.transportadora} - NF "
+        f"{scrap_request.numero_nf} already in flight; "
+        f"reusing task {active_task.task_id}."
+    )
+    return active_task.task_id
+
+
+def _get_active_task(db: Session, scrap_request: entregas_models.EntregaScrapRequest):
+    return entregas_crud.get_active_scraping_task(
+        db,
+        scrap_request.transportadora,
+        scrap_request.numero_nf,
+        scrap_request.cnpj_destinatario,
+        options_fingerprint(scrap_request.credentials, scrap_request.bypass_cache),
+    )
 
 
 def get_scraping_status(task_id: str, db: Session):
@@ -34,6 +66,23 @@ def get_scraping_status(task_id: str, db: Session):
     }
 
 
+def get_due_entregas(due_request: entregas_models.EntregaScrapDueRequest, db: Session):
+    return entregas_scheduler.filter_due(
+        db, [entrega.model_dump() for entrega in due_request.entregas]
+    )
+
+
+def get_breaker_states():
+    # Scraping runs in the worker; report its state when it is published
+    worker_status = read_status()
+    return worker_status["breakers"] if worker_status else breaker_states()
+
+
+def get_result_cache_stats():
+    worker_status = read_status()
+    return worker_status["cache"] if worker_status else result_cache.stats()
+
+
 def create_new_entrega(
     entrega: entregas_models.EntregaCreate, db: Session, user_id: int
 ):
@@ -41,6 +90,13 @@ def create_new_entrega(
         return entregas_crud.create_entrega(db=db, entrega=entrega, user_id=user_id)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except IntegrityError:
+        # Chave natural (transportadora, numero_nf) já cadastrada
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Entrega já cadastrada para esta transportadora e NF.",
+        )
 
 
 def get_entrega_details(entrega_id: int, db: Session):
@@ -0,0 +1,50 @@
+"""
+Async CRUD for the notification path, on ``AsyncSession``.
+"""
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from src.db import models
+
+
+async def get_pending_notifications(db: AsyncSession):
+    result = await db.execute(
+        select(models.MovimentacaoNotificacao).where(
+            models.MovimentacaoNotificacao.status == "nao notificado"
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def get_entregas_by_ids(db: AsyncSession, entrega_ids: list):
+    if not entrega_ids:
+        return []
+    result = await db.execute(
+        select(models.Entrega)
+        .options(selectinload(models.Entrega.movimentacoes))
+        .where(models.Entrega.id.in_(set(entrega_ids)))
+    )
+    return list(result.scalars().all())
+
+
+async def create_notification_log(
+    db: AsyncSession, detalhes: str, status: str, entrega_id: int, user_id: int
+):
+    db_log = models.NotificacaoLog(
+        detalhes=detalhes, status=status, entrega_id=entrega_id, criado_por_id=user_id
+    )
+    db.add(db_log)
+    await db.commit()
+    return db_log
+
+
+async def update_movimentacoes_notificacao(
+    db: AsyncSession, movimentacao_ids: list, notificacao_id: int, status: str
+):
+    await db.execute(
+        update(models.MovimentacaoNotificacao)
+        .where(models.MovimentacaoNotificacao.id.in_(movimentacao_ids))
+        .values(notificacao_id=notificacao_id, status=status)
+    )
+    await db.commit()
@@ -1,8 +1,9 @@
 import os
+import asyncio
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from src.notification import notification_crud
-from src.db import database, models
+from src.notification import notification_async_crud
+from src.db import models
+from src.db.async_database import AsyncSessionLocal
 from src.configs.logger_config import logger
 from src.utils.html_email_constructor import build_email_html
 from datetime import datetime
@@ -40,51 +41,62 @@ def get_status_emoji(entrega: models.Entrega):
     return "Em andamento 🔵"
 
 
-def process_pending_notifications(user_id: int):
+async def process_pending_notifications(user_id: int):
     """Processes all pending notifications."""
     load_dotenv()
     SMTP_USER = os.getenv("SMTP_USER")
     LOGO_URL = os.getenv("LOGO_URL")
-    db: Session = database.SessionLocal()
-    try:
-        pending_notifications = notification_crud.get_pending_notifications(db)
-        if not pending_notifications:
-            logger.info("No pending notifications to process.")
-            return
+    async with AsyncSessionLocal() as db:
+        try:
+            pending_notifications = (
+                await notification_async_crud.get_pending_notifications(db)
+            )
+            if not pending_notifications:
+                logger.info("No pending notifications to process.")
+                return
 
-        deliveries_by_carrier = defaultdict(list)
-        for mov in pending_notifications:
-            entrega = (
-                db.query(models.Entrega)
-                .filter(models.Entrega.id == mov.entrega_id)
-                .first()
+            # Uma única consulta para todas as entregas pendentes
+            entregas = await notification_async_crud.get_entregas_by_ids(
+                db, [mov.entrega_id for mov in pending_notifications]
             )
-            if entrega:
-                deliveries_by_carrier[entrega.transportadora].append(entrega)
+            entregas_by_id = {entrega.id: entrega for entrega in entregas}
 
-        now = datetime.now()
-        html_email = build_email_html(
-            deliveries_by_carrier, now, get_status_emoji, logo_url=LOGO_URL
-        )
+            deliveries_by_carrier = defaultdict(list)
+            for mov in pending_notifications:
+                entrega = entregas_by_id.get(mov.entrega_id)
+                if entrega:
+                    deliveries_by_carrier[entrega.transportadora].append(entrega)
 
-        send_notification_email("Atualização de Entregas", html_email, SMTP_USER)
+            now = datetime.now()
+            html_email = build_email_html(
+                deliveries_by_carrier, now, get_status_emoji, logo_url=LOGO_URL
+            )
 
-        log = notification_crud.create_notification_log(
-            db, detalhes=html_email, status="enviado", entrega_id=None, user_id=user_id
-        )
+            # O envio via requests é bloqueante: roda fora do event loop
+            await asyncio.to_thread(
+                send_notification_email,
+                "Atualização de Entregas",
+                html_email,
+                SMTP_USER,
+            )
 
-        for mov in pending_notifications:
-            notification_crud.update_movimentacao_notificacao(
-                db, mov.id, log.id, "notificado"
+            log = await notification_async_crud.create_notification_log(
+                db,
+                detalhes=html_email,
+                status="enviado",
+                entrega_id=None,
+                user_id=user_id,
             )
 
-        logger.info(
-            f"{len(pending_notifications)} notifications processed successfully."
-        )
+            await notification_async_crud.update_movimentacoes_notificacao(
+                db, [mov.id for mov in pending_notifications], log.id, "notificado"
+            )
+            logger.info(
+                f"{len(pending_notifications)} notifications processed successfully."
+            )
 
-    except Exception as e:
-        logger.error(
-            f"An error occurred during notification processing: {e}", exc_info=True
-        )
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(
+                f"An error occurred during notification processing: {e}",
+                exc_info=True,
+            )
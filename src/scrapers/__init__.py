@@ -6,6 +6,7 @@ All scrapers inherit from BaseScraper and follow a consistent interface.
 """
 
 from .base_scraper import BaseScraper
+from .browser_pool import BrowserPool, get_browser_pool, shutdown_browser_pool
 from ..configs.config import BROWSER_CONFIG, TIMEOUTS, SCRAPER_URLS
 from .scrapper_data_model import ScraperResponse, ErrorInfo
 
@@ -14,10 +15,14 @@ from .accert_scraper import AccertScraper
 from .jamef_scraper import JamefScraper
 from .braspress_scraper import BrasspressScraper
 from .viaverde_scraper import ViaVerdeScraper
+from .http_scraper import HttpTrackingScraper
 
 __all__ = [
     # Base classes and utilities
     "BaseScraper",
+    "BrowserPool",
+    "get_browser_pool",
+    "shutdown_browser_pool",
     "BROWSER_CONFIG",
     "TIMEOUTS",
     "SCRAPER_URLS",
@@ -28,4 +33,5 @@ __all__ = [
     "JamefScraper",
     "BrasspressScraper",
     "ViaVerdeScraper",
+    "HttpTrackingScraper",
 ]
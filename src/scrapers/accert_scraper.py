@@ -1,6 +1,6 @@
 from ..configs.logger_config import logger
 from .base_scraper import BaseScraper
-from ..configs.config import SCRAPER_URLS, TIMEOUTS
+from ..configs.config import TIMEOUTS
 from .scrapper_data_model import ScraperResponse
 
 
@@ -26,7 +26,7 @@ class AccertScraper(BaseScraper):
 
         # 1. Acessar página de rastreamento
         logger.info(f"{log_prefix} - Acessando a página de rastreamento da ACCERT")
-        await page.goto(SCRAPER_URLS["accert"], timeout=TIMEOUTS["page_load"])
+        await self.open_landing_page(page)
 
         # 2. Preencher CNPJ
         logger.info(f"{log_prefix} - Preenchendo CNPJ: {cnpj}")
@@ -34,8 +34,8 @@ class AccertScraper(BaseScraper):
 
         # 3. Preencher Nota Fiscal
         logger.info(f"{log_prefix} - Preenchendo Nota Fiscal: {nota_fiscal}")
-        nota_fiscal_input = await page.wait_for_selector(
-            "#notaFiscal", timeout=TIMEOUTS["selector_wait"]
+        nota_fiscal_input = await self.waits.selector(
+            page, "#notaFiscal", timeout=TIMEOUTS["selector_wait"]
         )
         await nota_fiscal_input.fill(nota_fiscal)
 
@@ -45,20 +45,31 @@ class AccertScraper(BaseScraper):
 
         # 5. Aguardar resultado e clicar em "Ver detalhes"
         logger.info(f"{log_prefix} - Aguardando resultados e clicando em Ver detalhes")
-        elemento_chave = page.locator("span.text-base.font-semibold").first
-        await elemento_chave.wait_for(timeout=TIMEOUTS["element_wait"])
+        await self.waits.selector(
+            page, "span.text-base.font-semibold", timeout=TIMEOUTS["element_wait"]
+        )
         await page.click('button:has-text("Ver detalhes")')
 
         # 6. Extrair informações da entrega
         logger.info(f"{log_prefix} - Extraindo informações da entrega")
         seletor_container = ".border-separation"
-        await page.wait_for_selector(
-            seletor_container, timeout=TIMEOUTS["selector_wait"]
+        await self.waits.selector(
+            page, seletor_container, timeout=TIMEOUTS["selector_wait"]
+        )
+        extraido = await self.extract(
+            page, {"detalhes": {"root": seletor_container, "fields": {"texto": {}}}}
         )
-        detalhes_texto = await page.inner_text(seletor_container)
+        detalhes_texto = (extraido["detalhes"] or {}).get("texto") or ""
 
         # Retornar dados estruturados
         dados = {"detalhes": detalhes_texto.strip()}
 
+        # JSON do backend, se capturado: o normalizador o prefere e volta ao
+        # texto da página quando não consegue mapeá-lo
+        capturas = await self.captured_payloads()
+        if capturas:
+            logger.info(f"{log_prefix} - Resposta JSON capturada")
+            dados["capturas"] = capturas
+
         logger.info(f"{log_prefix} - Dados extraídos: {dados}")
         return self.success_response(dados)
@@ -0,0 +1,150 @@
+"""
+Failure artifacts (compressed screenshot + HTML snapshot) with bounded cost.
+
+Only the browser-side capture (a JPEG of the viewport and ``page.content()``,
+both capped by ``capture_timeout_ms``) runs on the failing job; writing to disk
+and enforcing the retention policy happen on a single background writer
+thread. Captures are sampled per carrier, limited per minute and dropped when
+the writer is behind, so failure storms neither slow the scraper queue nor
+fill the disk: the directory is kept under ``max_total_mb`` and files older
+than ``max_age_days`` are evicted, oldest first.
+"""
+
+import asyncio
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from playwright.async_api import Page
+from ..configs.logger_config import logger
+from ..configs.config import ARTIFACTS_CONFIG
+
+
+class ArtifactStore:
+    """Samples, captures and asynchronously persists failure artifacts."""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = {**ARTIFACTS_CONFIG, **(config or {})}
+        self.directory = Path(self.config["dir"])
+        self._writer = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="artifact-writer"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._recent: dict[str, deque] = {}
+        self.stats = {"captured": 0, "sampled_out": 0, "rate_limited": 0, "dropped": 0}
+
+    def should_capture(self, carrier: str) -> bool:
+        """Apply the carrier sampling rate and per-minute limit."""
+        if not self.config["enabled"]:
+            return False
+        rates = self.config["sample_rates"]
+        if random.random() >= rates.get(carrier, rates.get("default", 1.0)):
+            self.stats["sampled_out"] += 1
+            return False
+
+        now = time.monotonic()
+        recent = self._recent.setdefault(carrier, deque())
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        if len(recent) >= self.config["max_per_minute"]:
+            self.stats["rate_limited"] += 1
+            return False
+        recent.append(now)
+        return True
+
+    async def capture(self, page: Optional[Page], carrier: str, error_type: str):
+        """
+        Capture the failing page and queue it for writing. Never raises.
+
+        Args:
+            page: The page of the failed job (must still be open).
+            carrier: Scraper name, used for sampling and file names.
+            error_type: Type of error (used in file names).
+        """
+        if page is None or page.is_closed() or not self.should_capture(carrier):
+            return
+
+        timeout_ms = self.config["capture_timeout_ms"]
+        grabs = [
+            page.screenshot(
+                type="jpeg",
+                quality=self.config["screenshot_quality"],
+                full_page=self.config["full_page"],
+                timeout=timeout_ms,
+            )
+        ]
+        if self.config["capture_html"]:
+            grabs.append(page.content())
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(*grabs, return_exceptions=True), timeout_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"[{carrier.upper()}] Artifact capture timed out.")
+            return
+
+        files = {}
+        if isinstance(results[0], bytes):
+            files["jpg"] = results[0]
+        if len(results) > 1 and isinstance(results[1], str):
+            files["html"] = results[1].encode("utf-8")
+        if files:
+            self.submit(carrier, error_type, files)
+
+    def submit(self, carrier: str, error_type: str, files: dict[str, bytes]):
+        """Hand captured bytes to the writer thread, dropping them if it is behind."""
+        with self._lock:
+            if self._pending >= self.config["max_pending"]:
+                self.stats["dropped"] += 1
+                logger.warning(f"[{carrier.upper()}] Artifact writer busy, dropped.")
+                return
+            self._pending += 1
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        stem = f"{carrier}_{error_type}_{timestamp}_{uuid.uuid4().hex[:6]}"
+        self._writer.submit(self._write, stem, files)
+        self.stats["captured"] += 1
+
+    def _write(self, stem: str, files: dict[str, bytes]):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for extension, content in files.items():
+                (self.directory / f"{stem}.{extension}").write_bytes(content)
+            logger.info(f"Artifacts saved: {self.directory / stem}.*")
+            self.enforce_retention()
+        except Exception as e:
+            logger.error(f"Failed to save artifacts {stem}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def enforce_retention(self):
+        """Evict artifacts past ``max_age_days``, then oldest ones over quota."""
+        entries = []
+        for path in self.directory.iterdir():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        max_age = self.config["max_age_days"] * 86400
+        max_bytes = self.config["max_total_mb"] * 1024 * 1024
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for mtime, size, path in entries:
+            if total <= max_bytes and not (max_age and now - mtime > max_age):
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+artifact_store = ArtifactStore()
@@ -2,23 +2,40 @@
 Base scraper class with common functionality for all scrapers.
 """
 
+import re
 from abc import ABC, abstractmethod
 from datetime import datetime
-from pathlib import Path
 from typing import Optional
 from playwright.async_api import (
     async_playwright,
     Browser,
+    BrowserContext,
     Page,
     TimeoutError as PlaywrightTimeoutError,
 )
 from ..configs.logger_config import logger
 from ..configs.config import (
     BROWSER_CONFIG,
-    SCREENSHOT_DIR,
-    SCREENSHOT_ENABLED,
+    BROWSER_POOL_CONFIG,
+    NOT_FOUND_MESSAGES,
+    SCRAPER_URLS,
+    SESSION_STATE_CONFIG,
+    TIMEOUTS,
+    WARM_PAGE_POOL_CONFIG,
 )
 from .scrapper_data_model import ScraperResponse, ErrorInfo
+from .browser_pool import BrowserPool, ContextLease, get_browser_pool
+from .page_pool import get_warm_page_pool
+from .network_filter import RouteFilter
+from .response_capture import ResponseCapture, get_capture_rule
+from .session_store import session_store
+from .wait_engine import WaitEngine
+from .dom_extract import extract_structured
+from .artifacts import artifact_store
+
+
+class NotFoundError(Exception):
+    """The carrier answered that it has no data for the searched document."""
 
 
 class BaseScraper(ABC):
@@ -36,12 +53,21 @@ class BaseScraper(ABC):
         """
         self.name = name
         self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
         self._playwright = None
+        self._pool: Optional[BrowserPool] = None
+        self._lease: Optional[ContextLease] = None
+        self._job_kwargs: dict = {}
+        self.page_is_warm = False
+        self.route_filter: Optional[RouteFilter] = None
+        self.response_capture: Optional[ResponseCapture] = None
+        self.waits = WaitEngine()
 
     async def __aenter__(self):
         """Async context manager entry."""
         await self._setup_browser()
+        self._attach_response_capture()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -50,6 +76,20 @@ class BaseScraper(ABC):
 
     async def _setup_browser(self):
         """Initialize browser and page."""
+        if BROWSER_POOL_CONFIG["enabled"]:
+            # Lease a fresh context from the shared, already running browser
+            self._pool = get_browser_pool()
+            if WARM_PAGE_POOL_CONFIG["enabled"] and await self._take_warm_page():
+                return
+            self._lease = await self._pool.acquire(
+                self.name, **self._context_options(**self._job_kwargs)
+            )
+            self.browser = self._lease.browser
+            self.context = self._lease.context
+            self.route_filter = await self._configure_context(self.context)
+            self.page = await self.context.new_page()
+            return
+
         self._playwright = await async_playwright().start()
 
         # Launch browser with configuration
@@ -58,20 +98,216 @@ class BaseScraper(ABC):
         )
 
         # Create context with user agent and viewport
-        context = await self.browser.new_context(
-            user_agent=BROWSER_CONFIG["user_agent"], viewport=BROWSER_CONFIG["viewport"]
+        self.context = await self.browser.new_context(
+            user_agent=BROWSER_CONFIG["user_agent"],
+            viewport=BROWSER_CONFIG["viewport"],
+            **self._context_options(**self._job_kwargs),
         )
+        self.route_filter = await self._configure_context(self.context)
 
-        self.page = await context.new_page()
+        self.page = await self.context.new_page()
 
     async def _teardown_browser(self):
         """Close browser and cleanup resources."""
+        if self._lease:
+            # Pooled browsers stay alive; only the leased context is discarded
+            lease, self._lease = self._lease, None
+            await self._pool.release(lease)
+            self.page_is_warm = False
+            self.page = None
+            self.context = None
+            self.browser = None
+            return
+
         if self.browser:
             await self.browser.close()
             logger.info(f"[{self.name.upper()}] Browser closed.")
         if self._playwright:
             await self._playwright.stop()
 
+    async def _configure_context(self, context: BrowserContext) -> RouteFilter:
+        """
+        Prepare a new browser context before any page is opened on it.
+        Installs the carrier route policy (see ``ROUTE_POLICIES``).
+
+        Args:
+            context: The freshly created context.
+
+        Returns:
+            The RouteFilter tracking what the context blocked.
+        """
+        route_filter = RouteFilter(self.name)
+        await route_filter.install(context)
+        return route_filter
+
+    def session_identity(self, **kwargs) -> Optional[str]:
+        """
+        Identify the persisted session (``storage_state``) a job may reuse.
+        Carriers listed in ``SESSION_STATE_CONFIG["carriers"]`` share one
+        anonymous session (cookie consent, anti-bot cookies); override to key
+        sessions by credentials.
+
+        Returns:
+            The identity, or None to always start from a clean context.
+        """
+        if self.name in SESSION_STATE_CONFIG["carriers"]:
+            return "anonymous"
+        return None
+
+    def _context_options(self, **kwargs) -> dict:
+        """Extra ``new_context`` options, i.e. the stored session if any."""
+        if not SESSION_STATE_CONFIG["enabled"]:
+            return {}
+        identity = self.session_identity(**kwargs)
+        if identity is None:
+            return {}
+        storage_state = session_store.load(self.name, identity)
+        return {"storage_state": storage_state} if storage_state else {}
+
+    async def _persist_session(self):
+        """Store the session of the current context for the next jobs."""
+        if not SESSION_STATE_CONFIG["enabled"] or not self.context:
+            return
+        identity = self.session_identity(**self._job_kwargs)
+        if identity is not None:
+            await session_store.save(self.context, self.name, identity)
+
+    def _attach_response_capture(self):
+        """Start recording backend JSON responses, if enabled for the carrier."""
+        rule = get_capture_rule(self.name)
+        self.response_capture = ResponseCapture(self.name, rule) if rule else None
+        if self.response_capture and self.page:
+            self.response_capture.attach(self.page)
+
+    async def captured_payloads(self) -> list[dict]:
+        """
+        Wait for the carrier's backend response captured during the flow.
+
+        Returns:
+            The captured JSON payloads, or [] when capture is disabled or no
+            matching response showed up.
+        """
+        if not self.response_capture:
+            return []
+        return await self.response_capture.wait()
+
+    def _log_network_stats(self, log_prefix: str):
+        """Log how many requests and bytes the route policy saved in this job."""
+        if not self.route_filter:
+            return
+        stats = self.route_filter.stats()
+        logger.info(
+            f"{log_prefix} Rede: {stats['requests_blocked']} requisições bloqueadas, "
+            f"{stats['requests_allowed']} permitidas, "
+            f"~{stats['bytes_saved_estimated'] // 1024} KB economizados "
+            f"{stats['blocked_by_type']}"
+        )
+
+    def _log_wait_stats(self, log_prefix: str):
+        """Log how much of the job was spent waiting for the site vs. working."""
+        report = self.waits.report()
+        logger.info(
+            f"{log_prefix} Tempo: {report['total_ms']} ms no total, "
+            f"{report['waiting_ms']} ms aguardando ({report['waits']} esperas), "
+            f"{report['working_ms']} ms trabalhando"
+        )
+
+    async def _take_warm_page(self) -> bool:
+        """
+        Use a page already parked on the carrier landing page, if one is ready,
+        and ask the warm pool to prepare the next one in the background.
+
+        Returns:
+            True if a warm page was taken.
+        """
+        warm = get_warm_page_pool().take(self.warm_key(**self._job_kwargs))
+        self.schedule_warm_pages(**self._job_kwargs)
+
+        if not warm:
+            return False
+        self._lease = warm.lease
+        self.browser = warm.lease.browser
+        self.context = warm.lease.context
+        self.route_filter = warm.lease.state.get("route_filter")
+        self.page = warm.page
+        self.page_is_warm = True
+        return True
+
+    def schedule_warm_pages(self, **kwargs):
+        """
+        Ask the warm pool to prepare pages for jobs executed with ``kwargs``.
+
+        Args:
+            **kwargs: The same keyword arguments later passed to ``execute``.
+        """
+        scraper = self.__class__()
+        warm_kwargs = self.warm_up_kwargs(**kwargs)
+
+        async def configure(lease: ContextLease):
+            lease.state["route_filter"] = await scraper._configure_context(
+                lease.context
+            )
+
+        async def warmer(page: Page):
+            await scraper.warm_up(page, **warm_kwargs)
+
+        get_warm_page_pool().schedule_refill(
+            self.warm_key(**kwargs),
+            self.name,
+            warmer,
+            configure=configure,
+            context_options=lambda: scraper._context_options(**kwargs),
+        )
+
+    def warm_key(self, **kwargs) -> str:
+        """
+        Identify which warm pages a job may reuse. Override when the warm-up
+        depends on job arguments (e.g. login credentials).
+        """
+        return self.name
+
+    def warm_up_kwargs(self, **kwargs) -> dict:
+        """Select the job arguments ``warm_up`` needs."""
+        return {}
+
+    async def warm_up(self, page: Page, **kwargs):
+        """
+        Bring a fresh page to the point where ``scrape()`` starts interacting.
+        Runs ahead of time for warm pages, or inline through ``open_landing_page``.
+
+        Args:
+            page: The page to prepare.
+            **kwargs: Arguments selected by ``warm_up_kwargs``.
+        """
+        await page.goto(SCRAPER_URLS[self.name], timeout=TIMEOUTS["page_load"])
+
+    async def open_landing_page(self, page: Page):
+        """
+        Ensure ``page`` is on the carrier landing page, skipping the navigation
+        when the page was handed out warm. Subsequent calls always navigate.
+
+        Args:
+            page: The page returned by ``create_page``.
+        """
+        if self.page_is_warm:
+            self.page_is_warm = False
+            return
+        await self.warm_up(page, **self.warm_up_kwargs(**self._job_kwargs))
+
+    async def extract(self, target, sections: dict) -> dict:
+        """
+        Read all rows and fields described by ``sections`` from a page or
+        frame in a single round trip (see ``dom_extract``).
+
+        Args:
+            target: Page or Frame holding the content.
+            sections: Extraction spec.
+
+        Returns:
+            Dict with one entry per section.
+        """
+        return await extract_structured(target, sections)
+
     async def create_page(self) -> Page:
         """
         Get the current page instance.
@@ -96,30 +332,16 @@ class BaseScraper(ABC):
         parts = [f"{k.upper()}: {v}" for k, v in kwargs.items()]
         return f"[{self.name.upper()}] [{', '.join(parts)}]"
 
-    async def _take_screenshot(self, error_type: str = "error"):
+    async def _capture_artifacts(self, error_type: str = "error"):
         """
-        Take a screenshot for debugging purposes.
+        Capture a screenshot and HTML snapshot of the current page for
+        debugging. Sampling, quota and disk writes are handled by
+        ``artifact_store``; must run before the page is torn down.
 
         Args:
-            error_type: Type of error (used in filename).
+            error_type: Type of error (used in filenames).
         """
-        if not SCREENSHOT_ENABLED or not self.page:
-            return
-
-        try:
-            # Create screenshots directory if it doesn't exist
-            screenshot_dir = Path(SCREENSHOT_DIR)
-            screenshot_dir.mkdir(exist_ok=True)
-
-            # Generate filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.name}_{error_type}_{timestamp}.png"
-            filepath = screenshot_dir / filename
-
-            await self.page.screenshot(path=str(filepath))
-            logger.info(f"[{self.name.upper()}] Screenshot saved: {filepath}")
-        except Exception as e:
-            logger.error(f"[{self.name.upper()}] Failed to take screenshot: {e}")
+        await artifact_store.capture(self.page, self.name, error_type)
 
     def _create_error_info(self, error_type: str, message: str) -> ErrorInfo:
         """
@@ -189,24 +411,188 @@ class BaseScraper(ABC):
         try:
             logger.info(f"{log_prefix} Starting scraper execution")
 
+            self._job_kwargs = kwargs
+            self.waits = WaitEngine()
             async with self:
-                result = await self.scrape(*args, **kwargs)
+                try:
+                    result = await self.scrape(*args, **kwargs)
+                except Exception as e:
+                    # Handled before teardown so the failing page can be captured
+                    return await self._error_from_exception(e, log_prefix)
+                if result.get("status") == "sucesso":
+                    await self._persist_session()
 
             logger.info(f"{log_prefix} Scraper execution completed successfully")
             return result
 
-        except PlaywrightTimeoutError as e:
-            logger.error(f"{log_prefix} Timeout error: {e}")
-            await self._take_screenshot("timeout")
+        except Exception as e:
+            return await self._error_from_exception(e, log_prefix)
+
+        finally:
+            self._log_network_stats(log_prefix)
+            self._log_wait_stats(log_prefix)
+
+    async def _error_from_exception(
+        self, error: Exception, log_prefix: str
+    ) -> ScraperResponse:
+        """
+        Log an exception raised by the scraping flow and convert it into an
+        error response.
+
+        Args:
+            error: The exception raised.
+            log_prefix: Prefix identifying the job in the logs.
+
+        Returns:
+            ScraperResponse with failure status.
+        """
+        if isinstance(error, PlaywrightTimeoutError):
+            mensagem = await self.not_found_message()
+            if mensagem:
+                error = NotFoundError(mensagem)
+        if isinstance(error, NotFoundError):
+            logger.info(f"{log_prefix} Document not found: {error}")
+            return self.error_response("not_found", str(error))
+
+        if isinstance(error, PlaywrightTimeoutError):
+            logger.error(f"{log_prefix} Timeout error: {error}")
+            await self._capture_artifacts("timeout")
             return self.error_response(
                 "timeout",
                 "O tempo para encontrar um elemento expirou. Verifique os seletores ou a velocidade da sua conexão.",
             )
 
+        logger.exception(f"{log_prefix} Unexpected error: {error}")
+        await self._capture_artifacts("exception")
+        return self.error_response("exception", f"Erro inesperado: {str(error)}")
+
+    async def not_found_message(self, page: Optional[Page] = None) -> Optional[str]:
+        """
+        Look for the carrier's "not found" message in the page and its frames,
+        telling a missing NF apart from a page that did not load.
+
+        Args:
+            page: Page to inspect (defaults to the job page).
+
+        Returns:
+            The text line holding the message, or None.
+        """
+        page = page or self.page
+        if page is None or page.is_closed():
+            return None
+        pattern = re.compile(
+            NOT_FOUND_MESSAGES.get(self.name, NOT_FOUND_MESSAGES["default"]), re.I
+        )
+        for frame in page.frames:
+            try:
+                texto = await frame.evaluate(
+                    "() => document.body ? document.body.innerText : ''"
+                )
+            except Exception:
+                continue
+            for linha in texto.splitlines():
+                if pattern.search(linha):
+                    return linha.strip()
+        return None
+
+    async def execute_many(
+        self, items: list[dict], **shared_kwargs
+    ) -> list[ScraperResponse]:
+        """
+        Execute several jobs inside a single browser session (one context,
+        one login), isolating the failure of each job from the others.
+
+        Args:
+            items: Per-job keyword arguments (e.g. ``{"n_rastreio": "123"}``).
+            **shared_kwargs: Keyword arguments common to every job
+                (e.g. credentials).
+
+        Returns:
+            One ScraperResponse per item, in the same order.
+        """
+        log_prefix = self._get_log_prefix(lote=len(items))
+        if not items:
+            return []
+
+        try:
+            logger.info(f"{log_prefix} Starting batch execution")
+
+            self._job_kwargs = {**shared_kwargs, **items[0]}
+            self.waits = WaitEngine()
+            async with self:
+                try:
+                    results = await self.scrape_many(items, **shared_kwargs)
+                except Exception as e:
+                    # The session itself failed (e.g. login): every job fails the same way
+                    error = await self._error_from_exception(e, log_prefix)
+                    return self._batch_error(error, len(items))
+                if any(r.get("status") == "sucesso" for r in results):
+                    await self._persist_session()
+
+            sucessos = sum(1 for r in results if r.get("status") == "sucesso")
+            logger.info(
+                f"{log_prefix} Batch execution finished: {sucessos}/{len(items)} succeeded"
+            )
+            return results
+
+        except Exception as e:
+            # The browser could not be set up: every job fails the same way
+            error = await self._error_from_exception(e, log_prefix)
+            return self._batch_error(error, len(items))
+
+        finally:
+            self._log_network_stats(log_prefix)
+            self._log_wait_stats(log_prefix)
+
+    def _batch_error(self, error: ScraperResponse, count: int) -> list:
+        """One independent copy of ``error`` per job of a failed batch."""
+        erro = error["erro"]
+        return [
+            self.error_response(erro["tipo"], erro["mensagem"]) for _ in range(count)
+        ]
+
+    async def scrape_many(
+        self, items: list[dict], **shared_kwargs
+    ) -> list[ScraperResponse]:
+        """
+        Scrape several jobs on the current page. The default runs ``scrape``
+        once per item; carriers with a cheaper repeatable step override it.
+
+        Args:
+            items: Per-job keyword arguments.
+            **shared_kwargs: Keyword arguments common to every job.
+
+        Returns:
+            One ScraperResponse per item, in the same order.
+        """
+        results = []
+        for item in items:
+            kwargs = {**shared_kwargs, **item}
+            results.append(
+                await self.scrape_isolated(
+                    self.scrape, self._get_log_prefix(**item), **kwargs
+                )
+            )
+        return results
+
+    async def scrape_isolated(self, step, log_prefix: str, *args, **kwargs):
+        """
+        Run one job of a batch, turning its exceptions into an error response
+        so the remaining jobs still run.
+
+        Args:
+            step: Coroutine function performing the job.
+            log_prefix: Prefix identifying the job in the logs.
+            *args: Positional arguments for ``step``.
+            **kwargs: Keyword arguments for ``step``.
+
+        Returns:
+            The ScraperResponse of the job.
+        """
+        try:
+            return await step(*args, **kwargs)
         except Exception as e:
-            logger.exception(f"{log_prefix} Unexpected error: {e}")
-            await self._take_screenshot("exception")
-            return self.error_response("exception", f"Erro inesperado: {str(e)}")
+            return await self._error_from_exception(e, log_prefix)
 
     @abstractmethod
     async def scrape(self, *args, **kwargs) -> ScraperResponse:
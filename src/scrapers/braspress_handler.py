@@ -1,28 +1,51 @@
 import regex as re
-from playwright.async_api import Page
-
-
-async def parse_detailed_history(page: Page) -> list[dict]:
-    """Função auxiliar para extrair o histórico detalhado da timeline vertical."""
+from playwright.async_api import Frame
+from .dom_extract import extract_structured
+
+# Timeline vertical (histórico detalhado) e etapas do resumo horizontal
+TRACKING_SPEC = {
+    "historico": {
+        "root": "#timeline2482705908231",
+        "rows": ".vertical-time-line._tracking-datail",
+        "fields": {
+            "status": ".vertical-time-line-info",
+            "timestamp": {
+                "selector": ".vertical-time-line-date",
+                "prop": "textContent",
+            },
+        },
+    },
+    "resumo": {
+        "fields": {
+            "previsao_entrega": {
+                "selector": ".dt-previsao-entrega",
+                "prop": "textContent",
+            },
+            "status": {"selector": ".dt-status", "prop": "textContent"},
+            "data_entrega": {"selector": ".dt-data-entrega", "prop": "textContent"},
+        },
+    },
+}
+
+
+async def parse_tracking(frame: Frame) -> tuple[list[dict], dict]:
+    """
+    Extrai o histórico detalhado e o resumo das etapas em uma única chamada
+    ao navegador.
+
+    Returns:
+        Tupla (histórico detalhado, resumo das etapas).
+    """
+    raw = await extract_structured(frame, TRACKING_SPEC)
+    return parse_detailed_history(raw["historico"]), parse_summary_steps(raw["resumo"])
+
+
+def parse_detailed_history(rows: list[dict]) -> list[dict]:
+    """Função auxiliar para tratar o histórico detalhado da timeline vertical."""
     history_events = []
-    container = page.locator("#timeline2482705908231")
-
-    event_locators = await container.locator(
-        ".vertical-time-line._tracking-datail"
-    ).all()
-
-    for event_locator in event_locators:
-        status_text = ""
-        timestamp_text = ""
-
-        info_loc = event_locator.locator(".vertical-time-line-info")
-        if await info_loc.count() > 0:
-            status_text = await info_loc.inner_text()
-            status_text = re.sub(r"<br>.*", "", status_text).strip()
-
-        date_loc = event_locator.locator(".vertical-time-line-date")
-        if await date_loc.count() > 0:
-            timestamp_text = (await date_loc.text_content() or "").strip()
+    for row in rows:
+        status_text = re.sub(r"<br>.*", "", row.get("status") or "").strip()
+        timestamp_text = (row.get("timestamp") or "").strip()
 
         if status_text and timestamp_text:
             history_events.append({"timestamp": timestamp_text, "status": status_text})
@@ -30,15 +53,11 @@ async def parse_detailed_history(page: Page) -> list[dict]:
     return history_events
 
 
-async def parse_summary_steps(page: Page) -> dict:
-    """Função auxiliar para extrair as etapas principais do resumo horizontal."""
-    previsao_entrega = (
-        await page.locator(".dt-previsao-entrega").first.text_content() or ""
-    )
-    status = await page.locator(".dt-status").first.text_content() or ""
-    data_entrega = await page.locator(".dt-data-entrega").first.text_content() or ""
+def parse_summary_steps(resumo: dict) -> dict:
+    """Função auxiliar para tratar as etapas principais do resumo horizontal."""
+    resumo = resumo or {}
     data = {}
-    data["previsao_entrega"] = previsao_entrega
-    data["status"] = status
-    data["data_entrega"] = data_entrega
+    data["previsao_entrega"] = resumo.get("previsao_entrega") or ""
+    data["status"] = resumo.get("status") or ""
+    data["data_entrega"] = resumo.get("data_entrega") or ""
     return data
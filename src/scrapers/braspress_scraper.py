@@ -1,6 +1,6 @@
 from __future__ import annotations
 from ..configs.logger_config import logger
-from playwright.async_api import Error
+from playwright.async_api import Error, Page
 from .base_scraper import BaseScraper
 from ..configs.config import SCRAPER_URLS, TIMEOUTS
 from .scrapper_data_model import ScraperResponse
@@ -99,9 +99,11 @@ class BrasspressScraper(BaseScraper):
 
     async def _kill_overlays_continuous(self, page, window_ms=5000):
         """
-        Neutraliza overlays de forma CONTÍNUA por alguns segundos, inclusive em shadow DOM,
+        Neutraliza overlays de forma CONTÍNUA, inclusive em shadow DOM,
         sem clicar: aplica pointer-events:none/opacity:0/visibility:hidden somente em elementos
         fixed/absolute, z-index alto, e que cubram a tela/interceptem o centro.
+        O MutationObserver instalado segue neutralizando elementos novos; só
+        aguardamos o DOM estabilizar, no máximo ``window_ms``.
         """
         js = """
         (() => {
@@ -173,14 +175,13 @@ class BrasspressScraper(BaseScraper):
                 window.__PL_OVERLAY_OBSERVER__.observe(document.documentElement, {childList:true, subtree:true});
             }
         })();"""
-        # roda já e mais algumas vezes ao longo da janela de tempo
-        end = asyncio.get_event_loop().time() + (window_ms / 1000.0)
-        while asyncio.get_event_loop().time() < end:
-            try:
-                await page.evaluate(js)
-            except Exception:
-                pass
-            await page.wait_for_timeout(200)
+        try:
+            await page.evaluate(js)
+            await self.waits.dom_quiet(page, quiet_ms=300, timeout=window_ms)
+            # varredura final para overlays que apareceram sem disparar o observer
+            await page.evaluate(js)
+        except Exception:
+            pass
 
     async def _click_js_no_scroll(self, page, selector: str) -> bool:
         """
@@ -229,7 +230,8 @@ class BrasspressScraper(BaseScraper):
     # ==================== App readiness / iframes ====================
 
     async def _wait_nf_visible(self, page):
-        await page.wait_for_function(
+        await self.waits.condition(
+            page,
             """() => {
                 const el = document.querySelector('#pedido-tracking');
                 return el && getComputedStyle(el).display !== 'none' && !el.disabled;
@@ -249,15 +251,45 @@ class BrasspressScraper(BaseScraper):
                 if (f) f.dispatchEvent(new Event('submit', {bubbles:true, cancelable:true}));
             """
             )
-        await page.wait_for_timeout(self._rand_delay(220, 420))
 
     async def _wait_results_iframe(self, page):
-        await page.wait_for_selector(
-            "#iframe-tracking", timeout=TIMEOUTS.get("selector_wait", 20000)
+        # o iframe pode ser recriado a cada busca: espera carregar e ter resultado
+        return await self.waits.frame_loaded(
+            page,
+            "#iframe-tracking",
+            ready_selector=".dt-status, .vertical-time-line",
+            timeout=TIMEOUTS.get("Brasspress_wait", 60000),
+        )
+
+    async def _click_in_frame(self, frame, text: str) -> bool:
+        """Clica (via JS) no primeiro elemento visível com ``text``, se houver."""
+        alvo = frame.get_by_text(re.compile(text, re.I)).first
+        if not await alvo.is_visible():
+            return False
+        try:
+            await alvo.evaluate("(el) => el.click()")
+        except Exception:
+            return False
+        return True
+
+    # ==================== Página aquecida ====================
+
+    async def warm_up(self, page: Page):
+        """
+        Abre a home com antidetecção e neutraliza scroll/overlays, deixando o
+        formulário de rastreamento pronto para digitação.
+        """
+        await self._stealth_init(page)
+
+        await page.goto(
+            SCRAPER_URLS["braspress"],
+            timeout=TIMEOUTS.get("page_load", 45000),
+            wait_until="domcontentloaded",
         )
-        frame_locator = page.frame_locator("#iframe-tracking")
-        await page.wait_for_timeout(self._rand_delay(700, 1100))
-        return frame_locator
+
+        # 🚫 mata auto-scroll/locks e neutraliza overlays continuamente por ~5s
+        await self._quarantine_scroll_jank(page)
+        await self._kill_overlays_continuous(page, window_ms=5000)
 
     # ==================== Fluxo principal ====================
 
@@ -272,24 +304,13 @@ class BrasspressScraper(BaseScraper):
                 logger.info(
                     f"{log_prefix} - Acessando {url} (tentativa {attempt}/{attempts})"
                 )
-                await self._stealth_init(page)
-
-                await page.goto(
-                    url,
-                    timeout=TIMEOUTS.get("page_load", 45000),
-                    wait_until="domcontentloaded",
-                )
-
-                # 🚫 mata auto-scroll/locks e neutraliza overlays continuamente por ~5s
-                await self._quarantine_scroll_jank(page)
-                await self._kill_overlays_continuous(page, window_ms=5000)
+                await self.open_landing_page(page)
 
                 # === Formulário ===
                 logger.info(f"{log_prefix} - Preenchendo CNPJ: {cnpj}")
                 await self._type_like_human(
                     page, "#cnpj-tracking", cnpj, trigger_keypress=True
                 )
-                await page.wait_for_timeout(self._rand_delay(250, 420))
 
                 logger.info(f"{log_prefix} - Aguardando campo NF visível")
                 await self._wait_nf_visible(page)
@@ -298,49 +319,31 @@ class BrasspressScraper(BaseScraper):
                 await self._type_like_human(
                     page, "#pedido-tracking", nota_fiscal, trigger_keypress=True
                 )
-                await page.wait_for_timeout(self._rand_delay(220, 380))
 
                 logger.info(f"{log_prefix} - Submetendo busca")
                 await self._submit_form(page)
 
-                try:
-                    await page.wait_for_load_state(
-                        "networkidle", timeout=TIMEOUTS.get("Brasspress_wait", 30000)
-                    )
-                except TimeoutError:
-                    pass
-
                 logger.info(f"{log_prefix} - Aguardando resultados no iframe")
-                frame_locator = await self._wait_results_iframe(page)
+                frame = await self._wait_results_iframe(page)
 
                 # “Detalhes” e “Mais Detalhes” com clique JS
-                det = frame_locator.get_by_text(
-                    re.compile(r"Detalhes do Rastreamento", re.I)
-                ).first
-                if await det.is_visible():
-                    # usa evaluate no frame
+                if await self._click_in_frame(frame, r"Detalhes do Rastreamento"):
                     try:
-                        await det.evaluate("(el) => el.click()")
-                    except Exception:
+                        await self.waits.condition(
+                            frame,
+                            """() => document.querySelector(
+                                '.vertical-time-line._tracking-datail')""",
+                            timeout=5000,
+                        )
+                    except TimeoutError:
                         pass
-                    await page.wait_for_timeout(self._rand_delay(300, 600))
 
-                mais = frame_locator.get_by_text(
-                    re.compile(r"Mais Detalhes", re.I)
-                ).first
-                if await mais.is_visible():
-                    try:
-                        await mais.evaluate("(el) => el.click()")
-                    except Exception:
-                        pass
-                    await page.wait_for_timeout(self._rand_delay(300, 600))
+                if await self._click_in_frame(frame, r"Mais Detalhes"):
+                    await self.waits.dom_quiet(frame, quiet_ms=250, timeout=3000)
 
                 logger.info(f"{log_prefix} - Extraindo informações")
-                movimentacoes = await braspress_handler.parse_detailed_history(
-                    frame_locator
-                )
-                resumo_entrega = await braspress_handler.parse_summary_steps(
-                    frame_locator
+                movimentacoes, resumo_entrega = await braspress_handler.parse_tracking(
+                    frame
                 )
                 data = {
                     "resumo_etapas": resumo_entrega,
@@ -351,6 +354,10 @@ class BrasspressScraper(BaseScraper):
                 return self.success_response(data)
 
             except TimeoutError as e:
+                mensagem = await self.not_found_message(page)
+                if mensagem:
+                    logger.info(f"{log_prefix} - NF não encontrada: {mensagem}")
+                    return self.error_response("not_found", mensagem)
                 last_err = e
                 logger.warning(f"{log_prefix} - Timeout na tentativa {attempt}: {e}")
             except Error as e:
@@ -364,7 +371,9 @@ class BrasspressScraper(BaseScraper):
                     f"{log_prefix} - Erro inesperado na tentativa {attempt}: {e}"
                 )
 
-            await asyncio.sleep(2.0 * attempt + random.random())
+            if attempt < attempts:
+                await asyncio.sleep(2.0 * attempt + random.random())
 
         msg = "Não foi possível obter o rastreamento agora. O site pode ter aplicado verificação ou estar instável."
-        return self.error_response("parse_error", f"{msg} Detalhes: {last_err}")
+        tipo = "timeout" if isinstance(last_err, TimeoutError) else "exception"
+        return self.error_response(tipo, f"{msg} Detalhes: {last_err}")
@@ -0,0 +1,286 @@
+"""
+Process-wide Chromium pool shared by all scrapers.
+
+Starting the Playwright driver and launching Chromium dominates the cost of a
+single tracking job, so instead of doing it on every ``BaseScraper.execute``
+the pool keeps browsers alive and hands out fresh ``BrowserContext`` leases.
+Each carrier gets its own browsers (cookies, crashes and anti-bot state never
+leak between carriers) and a semaphore bounding how many contexts it may hold.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from playwright.async_api import (
+    async_playwright,
+    Browser,
+    BrowserContext,
+    Playwright,
+)
+from ..configs.logger_config import logger
+from ..configs.config import BROWSER_CONFIG, BROWSER_POOL_CONFIG
+
+
+@dataclass
+class PooledBrowser:
+    """A Chromium instance owned by the pool."""
+
+    browser: Browser
+    carrier: str
+    launched_at: float = field(default_factory=time.monotonic)
+    last_used_at: float = field(default_factory=time.monotonic)
+    uses: int = 0
+    active: int = 0
+    retired: bool = False
+
+    @property
+    def healthy(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+
+@dataclass
+class ContextLease:
+    """A browser context leased from the pool for a single job."""
+
+    carrier: str
+    context: BrowserContext
+    pooled: PooledBrowser
+    # Per-context add-ons installed by the scraper (e.g. the route filter)
+    state: dict = field(default_factory=dict)
+
+    @property
+    def browser(self) -> Browser:
+        return self.pooled.browser
+
+
+class _CarrierSlot:
+    """Browsers and admission control for one carrier."""
+
+    def __init__(self, carrier: str, size: int, contexts_per_browser: int):
+        self.carrier = carrier
+        self.size = size
+        self.browsers: list[PooledBrowser] = []
+        self.semaphore = asyncio.Semaphore(size * contexts_per_browser)
+        self.lock = asyncio.Lock()
+
+
+class BrowserPool:
+    """
+    Pool of long-lived Chromium browsers, isolated per carrier.
+
+    Playwright objects are bound to the event loop that created them, so a pool
+    belongs to a single loop; use ``get_browser_pool()`` to obtain the pool of
+    the running loop.
+    """
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = {**BROWSER_POOL_CONFIG, **(config or {})}
+        self._loop = asyncio.get_running_loop()
+        self._playwright: Optional[Playwright] = None
+        self._driver_lock = asyncio.Lock()
+        self._slots: dict[str, _CarrierSlot] = {}
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    def _get_slot(self, carrier: str) -> _CarrierSlot:
+        slot = self._slots.get(carrier)
+        if slot is None:
+            slot = _CarrierSlot(
+                carrier,
+                size=max(1, self.config["browsers_per_carrier"]),
+                contexts_per_browser=max(1, self.config["contexts_per_browser"]),
+            )
+            self._slots[carrier] = slot
+        return slot
+
+    async def _ensure_driver(self) -> Playwright:
+        async with self._driver_lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+                logger.info("[BROWSER_POOL] Playwright driver started.")
+            if self._health_task is None and self.config["health_check_interval"]:
+                self._health_task = asyncio.create_task(self._health_loop())
+            return self._playwright
+
+    async def _launch(self, carrier: str) -> PooledBrowser:
+        playwright = await self._ensure_driver()
+        browser = await playwright.chromium.launch(headless=BROWSER_CONFIG["headless"])
+        pooled = PooledBrowser(browser=browser, carrier=carrier)
+        browser.on("disconnected", lambda _: self._on_disconnected(pooled))
+        logger.info(f"[BROWSER_POOL] [{carrier.upper()}] Browser launched.")
+        return pooled
+
+    def _on_disconnected(self, pooled: PooledBrowser):
+        if not pooled.retired:
+            logger.warning(
+                f"[BROWSER_POOL] [{pooled.carrier.upper()}] Browser disconnected unexpectedly."
+            )
+        pooled.retired = True
+
+    async def _close_browser(self, pooled: PooledBrowser):
+        pooled.retired = True
+        try:
+            await pooled.browser.close()
+            logger.info(f"[BROWSER_POOL] [{pooled.carrier.upper()}] Browser closed.")
+        except Exception as e:
+            logger.warning(
+                f"[BROWSER_POOL] [{pooled.carrier.upper()}] Error closing browser: {e}"
+            )
+
+    async def _pick_browser(self, slot: _CarrierSlot) -> PooledBrowser:
+        """Return the least loaded healthy browser, launching one if needed."""
+        max_uses = self.config["max_uses_per_browser"]
+        for pooled in list(slot.browsers):
+            if max_uses and pooled.uses >= max_uses:
+                pooled.retired = True
+            if not pooled.healthy:
+                slot.browsers.remove(pooled)
+                if pooled.active == 0:
+                    await self._close_browser(pooled)
+
+        if len(slot.browsers) < slot.size:
+            slot.browsers.append(await self._launch(slot.carrier))
+
+        return min(slot.browsers, key=lambda b: b.active)
+
+    async def acquire(self, carrier: str, **context_options) -> ContextLease:
+        """
+        Lease a fresh browser context for ``carrier``.
+
+        Blocks while the carrier already holds its maximum number of contexts.
+
+        Args:
+            carrier: Scraper name (e.g., "accert").
+            **context_options: Extra options forwarded to ``new_context``.
+
+        Returns:
+            A ContextLease that must be handed back with ``release``.
+        """
+        if self._closed:
+            raise RuntimeError("Browser pool is closed.")
+
+        slot = self._get_slot(carrier)
+        await slot.semaphore.acquire()
+        try:
+            async with slot.lock:
+                pooled = await self._pick_browser(slot)
+                pooled.active += 1
+                pooled.uses += 1
+                pooled.last_used_at = time.monotonic()
+            try:
+                options = {
+                    "user_agent": BROWSER_CONFIG["user_agent"],
+                    "viewport": BROWSER_CONFIG["viewport"],
+                    **context_options,
+                }
+                context = await pooled.browser.new_context(**options)
+            except Exception:
+                pooled.active -= 1
+                pooled.retired = pooled.retired or not pooled.browser.is_connected()
+                raise
+        except Exception:
+            slot.semaphore.release()
+            raise
+
+        return ContextLease(carrier=carrier, context=context, pooled=pooled)
+
+    async def release(self, lease: ContextLease):
+        """Close the leased context and return its slot to the pool."""
+        slot = self._get_slot(lease.carrier)
+        try:
+            await lease.context.close()
+        except Exception as e:
+            logger.debug(f"[BROWSER_POOL] Error closing context: {e}")
+        finally:
+            pooled = lease.pooled
+            pooled.active -= 1
+            pooled.last_used_at = time.monotonic()
+            slot.semaphore.release()
+            if pooled.retired and pooled.active == 0:
+                async with slot.lock:
+                    if pooled in slot.browsers:
+                        slot.browsers.remove(pooled)
+                await self._close_browser(pooled)
+
+    async def health_check(self):
+        """Drop disconnected browsers and close the ones idle for too long."""
+        idle_timeout = self.config["idle_timeout"]
+        now = time.monotonic()
+        for slot in list(self._slots.values()):
+            async with slot.lock:
+                for pooled in list(slot.browsers):
+                    idle_for = now - pooled.last_used_at if pooled.active == 0 else 0
+                    if not pooled.healthy or (idle_timeout and idle_for > idle_timeout):
+                        pooled.retired = True
+                        if pooled.active == 0:
+                            slot.browsers.remove(pooled)
+                            await self._close_browser(pooled)
+
+    async def _health_loop(self):
+        interval = self.config["health_check_interval"]
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.health_check()
+            except Exception as e:
+                logger.error(f"[BROWSER_POOL] Health check failed: {e}")
+
+    def stats(self) -> dict:
+        """Snapshot of the pool state, per carrier."""
+        return {
+            carrier: {
+                "browsers": len(slot.browsers),
+                "active_contexts": sum(b.active for b in slot.browsers),
+                "uses": sum(b.uses for b in slot.browsers),
+            }
+            for carrier, slot in self._slots.items()
+        }
+
+    async def close(self):
+        """Close every browser and stop the Playwright driver."""
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        for slot in self._slots.values():
+            for pooled in slot.browsers:
+                await self._close_browser(pooled)
+            slot.browsers.clear()
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+            logger.info("[BROWSER_POOL] Playwright driver stopped.")
+
+
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    """
+    Return the process-wide pool for the running event loop.
+
+    A pool created on a loop that is no longer running cannot be reused, so it
+    is replaced transparently.
+    """
+    global _pool
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool.loop is not loop or _pool._closed:
+        if _pool is not None and not _pool._closed:
+            logger.warning(
+                "[BROWSER_POOL] Event loop changed; starting a new browser pool."
+            )
+        _pool = BrowserPool()
+    return _pool
+
+
+async def shutdown_browser_pool():
+    """Close the pool of the running loop, if any."""
+    global _pool
+    if _pool is not None and _pool.loop is asyncio.get_running_loop():
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,167 @@
+"""
+Per-carrier circuit breaker around ``run_scraper``.
+
+While a carrier site is down or serving a verification page, every job would
+still open a browser and burn its whole ``TIMEOUTS`` budget. The breaker
+tracks the outcome of the last ``window_size`` jobs of each carrier; once the
+failure rate reaches ``failure_rate`` it opens and jobs fail immediately with
+``CircuitOpenError`` until ``cooldown_seconds`` elapse. It then half-opens,
+lets ``half_open_max_calls`` probe jobs through and closes again if they
+succeed (or reopens if they fail). Settings come from ``CIRCUIT_BREAKER_CONFIG``.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Optional
+from ..configs.logger_config import logger
+from ..configs.config import CIRCUIT_BREAKER_CONFIG
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of running a job while the carrier breaker is open."""
+
+    def __init__(self, carrier: str, retry_after: float):
+        self.carrier = carrier
+        self.retry_after = retry_after
+        super().__init__(
+            f"Circuito da transportadora '{carrier}' aberto; "
+            f"nova tentativa em {retry_after:.0f}s."
+        )
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over the recent outcomes of one carrier."""
+
+    def __init__(self, carrier: str, config: Optional[dict] = None):
+        self.carrier = carrier
+        self.config = config or CIRCUIT_BREAKER_CONFIG["default"]
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self._outcomes: deque = deque(maxlen=self.config["window_size"])
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    def _retry_after(self) -> float:
+        elapsed = time.monotonic() - self.opened_at
+        return max(0.0, self.config["cooldown_seconds"] - elapsed)
+
+    def check(self):
+        """
+        Fail fast while open, without taking a half-open probe slot.
+        Use before queueing a job.
+
+        Raises:
+            CircuitOpenError: The breaker is open and still cooling down.
+        """
+        if not self.config["enabled"]:
+            return
+        with self._lock:
+            if self.state == OPEN and self._retry_after() > 0:
+                raise CircuitOpenError(self.carrier, self._retry_after())
+
+    def acquire(self):
+        """
+        Admit a job right before it runs; past the cooldown the first jobs
+        are admitted as half-open probes.
+
+        Raises:
+            CircuitOpenError: The job must not run now.
+        """
+        if not self.config["enabled"]:
+            return
+        with self._lock:
+            if self.state == OPEN:
+                retry_after = self._retry_after()
+                if retry_after > 0:
+                    raise CircuitOpenError(self.carrier, retry_after)
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info(f"[BREAKER] [{self.carrier.upper()}] Half-open.")
+            if self.state == HALF_OPEN:
+                if self._probes >= self.config["half_open_max_calls"]:
+                    raise CircuitOpenError(
+                        self.carrier, self.config["cooldown_seconds"]
+                    )
+                self._probes += 1
+
+    def release(self):
+        """
+        Give back the slot of an admitted job that ended without an outcome
+        (e.g. cancelled on shutdown), so a half-open breaker can probe again.
+        """
+        if not self.config["enabled"]:
+            return
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record(self, success: bool):
+        """Record the outcome of an admitted job and update the state."""
+        if not self.config["enabled"]:
+            return
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if success:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    logger.info(f"[BREAKER] [{self.carrier.upper()}] Closed.")
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            if len(self._outcomes) >= self.config["min_calls"]:
+                failures = self._outcomes.count(False)
+                if failures / len(self._outcomes) >= self.config["failure_rate"]:
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        logger.warning(
+            f"[BREAKER] [{self.carrier.upper()}] Opened for "
+            f"{self.config['cooldown_seconds']}s."
+        )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": len(outcomes),
+                "recent_failures": outcomes.count(False),
+                "retry_after_seconds": (
+                    round(self._retry_after()) if self.state == OPEN else 0
+                ),
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(carrier: str) -> CircuitBreaker:
+    """Return the breaker of ``carrier``, creating it on first use."""
+    carrier = carrier.lower()
+    with _breakers_lock:
+        breaker = _breakers.get(carrier)
+        if breaker is None:
+            config = {
+                **CIRCUIT_BREAKER_CONFIG["default"],
+                **CIRCUIT_BREAKER_CONFIG.get(carrier, {}),
+            }
+            breaker = _breakers[carrier] = CircuitBreaker(carrier, config)
+        return breaker
+
+
+def breaker_states() -> dict:
+    """State of every carrier breaker, for monitoring."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.carrier: breaker.snapshot() for breaker in breakers}
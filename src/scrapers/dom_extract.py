@@ -0,0 +1,89 @@
+"""
+Single-round-trip structured extraction from a page or frame.
+
+Reading a result field by field through locators costs one CDP round trip per
+``count()``/``inner_text()``/``text_content()`` call, so the cost of a job grew
+with the number of tracking events. ``extract_structured`` runs one
+``evaluate`` that reads every section, row and field described by a spec and
+returns them as JSON.
+
+Spec format (one entry per section)::
+
+    {
+        "historico": {
+            "root": "#timeline",            # optional, defaults to document
+            "rows": ".evento",              # optional: list of rows
+            "fields": {
+                "status": ".info",                              # innerText
+                "timestamp": {"selector": ".data", "prop": "textContent"},
+                "texto": {"prop": "innerText"},                 # the row itself
+            },
+        },
+    }
+
+Sections with ``rows`` return a list of dicts, the others a single dict read
+from ``root``. Missing elements yield None (an empty list for rows).
+"""
+
+from typing import Union
+from playwright.async_api import Frame, Page
+
+_EXTRACT_JS = """
+(sections) => {
+    const read = (scope, field) => {
+        const el = field.selector ? scope.querySelector(field.selector) : scope;
+        if (!el) return null;
+        if (field.prop === 'textContent') return el.textContent;
+        if (field.prop === 'innerHTML') return el.innerHTML;
+        return el.innerText;
+    };
+    const readFields = (scope, fields) => {
+        const out = {};
+        for (const [name, field] of Object.entries(fields)) out[name] = read(scope, field);
+        return out;
+    };
+    const result = {};
+    for (const [name, spec] of Object.entries(sections)) {
+        const root = spec.root ? document.querySelector(spec.root) : document;
+        if (spec.rows) {
+            result[name] = root
+                ? Array.from(root.querySelectorAll(spec.rows)).map(r => readFields(r, spec.fields))
+                : [];
+        } else {
+            result[name] = root ? readFields(root, spec.fields) : null;
+        }
+    }
+    return result;
+}
+"""
+
+
+def _normalize_field(field) -> dict:
+    if isinstance(field, str):
+        return {"selector": field, "prop": "innerText"}
+    return {"selector": field.get("selector"), "prop": field.get("prop", "innerText")}
+
+
+def _normalize_spec(sections: dict) -> dict:
+    return {
+        name: {
+            "root": spec.get("root"),
+            "rows": spec.get("rows"),
+            "fields": {k: _normalize_field(f) for k, f in spec["fields"].items()},
+        }
+        for name, spec in sections.items()
+    }
+
+
+async def extract_structured(target: Union[Page, Frame], sections: dict) -> dict:
+    """
+    Read every section described by ``sections`` with a single ``evaluate``.
+
+    Args:
+        target: Page or Frame holding the content.
+        sections: Extraction spec (see module docstring).
+
+    Returns:
+        Dict with one entry per section.
+    """
+    return await target.evaluate(_EXTRACT_JS, _normalize_spec(sections))
@@ -0,0 +1,136 @@
+"""
+Browserless scraper for carriers whose tracking result comes from a plain
+HTTP endpoint.
+
+A single request replaces a whole browser session. The engine returns the same
+``ScraperResponse`` shape as the Playwright scrapers, with the backend JSON
+under ``dados["capturas"]`` so the carrier normalizer parses it exactly like a
+response captured in the browser (see ``response_capture``). ``runner`` tries
+it first and falls back to the Playwright scraper when it fails.
+"""
+
+import asyncio
+from typing import Optional
+import aiohttp
+import regex as re
+from ..configs.logger_config import logger
+from ..configs.config import (
+    BROWSER_CONFIG,
+    HTTP_TRACKING_ENDPOINTS,
+    RESPONSE_CAPTURE_RULES,
+)
+from ..utils.normalize_scrap_data import resolve_json_path
+from .base_scraper import BaseScraper
+from .scrapper_data_model import ScraperResponse
+
+_sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """Shared keep-alive session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            headers={"User-Agent": BROWSER_CONFIG["user_agent"]}
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_http_sessions():
+    """Close the shared session of the running loop."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session:
+        await session.close()
+
+
+def http_engine_available(carrier: str) -> bool:
+    """True when the carrier has an HTTP endpoint and a field map to parse it."""
+    endpoint = HTTP_TRACKING_ENDPOINTS.get(carrier)
+    return bool(
+        endpoint
+        and endpoint.get("enabled", True)
+        and RESPONSE_CAPTURE_RULES.get(carrier, {}).get("fields")
+    )
+
+
+def _fill(template, values: dict):
+    """Formats every string of a (possibly nested) template with ``values``."""
+    if isinstance(template, str):
+        return template.format(**values)
+    if isinstance(template, dict):
+        return {k: _fill(v, values) for k, v in template.items()}
+    return template
+
+
+class HttpTrackingScraper(BaseScraper):
+    """Calls the carrier tracking endpoint configured in HTTP_TRACKING_ENDPOINTS."""
+
+    def __init__(self, name: str, endpoint: Optional[dict] = None):
+        super().__init__(name)
+        self.endpoint = endpoint or HTTP_TRACKING_ENDPOINTS[name]
+        self.fields = RESPONSE_CAPTURE_RULES[name]["fields"]
+
+    async def execute(self, *args, **kwargs) -> ScraperResponse:
+        """
+        Execute the request with error handling. No browser is involved.
+
+        Returns:
+            ScraperResponse with results or error information.
+        """
+        log_prefix = self._get_log_prefix(
+            **{
+                k: v
+                for k, v in kwargs.items()
+                if k in ["cnpj", "nota_fiscal", "n_rastreio"]
+            }
+        )
+        try:
+            logger.info(f"{log_prefix} Starting HTTP fast path")
+            result = await self.scrape(*args, **kwargs)
+            logger.info(f"{log_prefix} HTTP fast path finished: {result['status']}")
+            return result
+        except asyncio.TimeoutError:
+            logger.warning(f"{log_prefix} HTTP fast path timed out")
+            return self.error_response(
+                "timeout", "O endpoint de rastreamento não respondeu a tempo."
+            )
+        except Exception as e:
+            logger.warning(f"{log_prefix} HTTP fast path error: {e}")
+            return self.error_response("exception", f"Erro inesperado: {str(e)}")
+
+    async def scrape(self, **kwargs) -> ScraperResponse:
+        values = {k: v or "" for k, v in kwargs.items()}
+        for key in ("cnpj", "nota_fiscal", "n_rastreio"):
+            values.setdefault(key, "")
+            values[f"{key}_digits"] = re.sub("[^0-9]", "", str(values[key]))
+
+        method = self.endpoint.get("method", "GET").upper()
+        request_kwargs = {
+            "params": _fill(self.endpoint.get("params"), values),
+            "headers": _fill(self.endpoint.get("headers"), values),
+            "timeout": aiohttp.ClientTimeout(total=self.endpoint.get("timeout", 15)),
+        }
+        if "json" in self.endpoint:
+            request_kwargs["json"] = _fill(self.endpoint["json"], values)
+        if "data" in self.endpoint:
+            request_kwargs["data"] = _fill(self.endpoint["data"], values)
+
+        url = _fill(self.endpoint["url"], values)
+        async with _get_session().request(method, url, **request_kwargs) as response:
+            if response.status == 404:
+                return self.error_response(
+                    "not_found", "Entrega não encontrada no endpoint de rastreamento."
+                )
+            response.raise_for_status()
+            body = await response.json(content_type=None)
+
+        events = resolve_json_path(body, self.fields["events_path"])
+        if not isinstance(events, list) or not events:
+            return self.error_response(
+                "not_found", "Resposta sem eventos de rastreamento."
+            )
+        return self.success_response(
+            {"capturas": [{"url": url, "status": response.status, "body": body}]}
+        )
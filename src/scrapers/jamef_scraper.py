@@ -1,9 +1,20 @@
 import regex as re
 from ..configs.logger_config import logger
 from .base_scraper import BaseScraper
-from ..configs.config import SCRAPER_URLS, TIMEOUTS
+from ..configs.config import TIMEOUTS
 from .scrapper_data_model import ScraperResponse
 
+SELETOR_HISTORICO = "[data-pl-historico]"
+
+# Verdadeiro quando algum ".content" mostra um bloco do histórico
+# ("Data: dd/mm/aaaa", o formato lido por normalize_jamef)
+HISTORICO_CARREGADO_JS = """() => {
+    const alvo = [...document.querySelectorAll('.content')]
+        .find(el => /Data:\\s*\\d{2}\\/\\d{2}\\/\\d{4}/.test(el.innerText || ''));
+    if (alvo) alvo.setAttribute('data-pl-historico', '1');
+    return !!alvo;
+}"""
+
 
 class JamefScraper(BaseScraper):
     """Scraper for JAMEF logistics tracking."""
@@ -27,7 +38,7 @@ class JamefScraper(BaseScraper):
 
         # 1. Acessar página de rastreamento
         logger.info(f"{log_prefix} - Acessando a página de rastreamento da JAMEF")
-        await page.goto(SCRAPER_URLS["jamef"], timeout=TIMEOUTS["page_load"])
+        await self.open_landing_page(page)
 
         # 2. Preencher número de pedido (nota fiscal)
         logger.info(f"{log_prefix} - Preenchendo número de pedido: {nota_fiscal}")
@@ -51,24 +62,35 @@ class JamefScraper(BaseScraper):
 
         # 6. Aguardar página de resultados carregar
         logger.info(f"{log_prefix} - Aguardando a página de resultados carregar")
-        await page.wait_for_load_state("networkidle")
+        await self.waits.selector(page, 'button:has-text("Histórico")')
 
         # 7. Clicar no botão de histórico
+        # (o pixel do LinkedIn usado antes como sinal agora é bloqueado pela
+        # política de rotas; o seletor do passo 8 já indica que o histórico abriu)
         logger.info(f"{log_prefix} - Clicando no botão de histórico")
-        async with page.expect_response(
-            "https://px.ads.linkedin.com/wa/?medium=fetch&fmt=g"
-        ):
-            await page.click('button:has-text("Histórico")')
+        await page.click('button:has-text("Histórico")')
 
         # 8. Extrair informações da entrega
         logger.info(f"{log_prefix} - Extraindo informações da entrega")
-        seletor_container = ".content"
-        await page.wait_for_selector(
-            seletor_container, timeout=TIMEOUTS["selector_wait"]
+        # ".content" já existe antes do histórico abrir: espera o container
+        # que tem datas de movimentação e o marca para a extração
+        await self.waits.condition(
+            page, HISTORICO_CARREGADO_JS, timeout=TIMEOUTS["selector_wait"]
         )
-        detalhes_texto = await page.inner_text(seletor_container)
+        extraido = await self.extract(
+            page,
+            {"detalhes": {"root": SELETOR_HISTORICO, "fields": {"texto": {}}}},
+        )
+        detalhes_texto = (extraido["detalhes"] or {}).get("texto") or ""
 
         # Retornar dados estruturados
         dados = {"detalhes": detalhes_texto.strip()}
+
+        # JSON do backend, se capturado: o normalizador o prefere e volta ao
+        # texto da página quando não consegue mapeá-lo
+        capturas = await self.captured_payloads()
+        if capturas:
+            logger.info(f"{log_prefix} - Resposta JSON capturada")
+            dados["capturas"] = capturas
         logger.info(f"{log_prefix} - Dados extraídos: {dados}")
         return self.success_response(dados)
@@ -0,0 +1,87 @@
+"""
+Declarative request filtering for scraper browser contexts.
+
+Carrier sites pull in images, fonts, analytics and ad pixels that the scrapers
+never read. A ``RouteFilter`` is installed with ``context.route`` and aborts
+those requests according to the carrier's entry in ``ROUTE_POLICIES``, keeping
+per-context counters so each job can report what it saved.
+"""
+
+import re
+from typing import Optional
+from playwright.async_api import BrowserContext, Request, Route
+from ..configs.logger_config import logger
+from ..configs.config import ROUTE_BLOCK_ESTIMATED_BYTES, ROUTE_POLICIES
+
+
+def get_route_policy(carrier: str) -> dict:
+    """
+    Returns the route policy for a carrier, merged over the default policy.
+    """
+    policy = dict(ROUTE_POLICIES.get("default", {}))
+    policy.update(ROUTE_POLICIES.get(carrier, {}))
+    return policy
+
+
+class RouteFilter:
+    """Aborts requests that a carrier's route policy does not need."""
+
+    def __init__(self, carrier: str, policy: Optional[dict] = None):
+        self.carrier = carrier
+        policy = policy if policy is not None else get_route_policy(carrier)
+        self.enabled = policy.get("enabled", True)
+        self.block_resource_types = set(policy.get("block_resource_types", []))
+        self.block_patterns = [
+            re.compile(p, re.I) for p in policy.get("block_url_patterns", [])
+        ]
+        self.allow_patterns = [
+            re.compile(p, re.I) for p in policy.get("allow_url_patterns", [])
+        ]
+        self.requests_allowed = 0
+        self.requests_blocked = 0
+        self.bytes_saved = 0
+        self.blocked_by_type: dict[str, int] = {}
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        """
+        Decides whether a request must be aborted. The allow-list always wins,
+        then resource types, then URL patterns.
+        """
+        if any(p.search(url) for p in self.allow_patterns):
+            return False
+        if resource_type in self.block_resource_types:
+            return True
+        return any(p.search(url) for p in self.block_patterns)
+
+    async def install(self, context: BrowserContext):
+        """Routes every request of ``context`` through this filter."""
+        if self.enabled:
+            await context.route("**/*", self._handle)
+
+    async def _handle(self, route: Route, request: Request):
+        resource_type = request.resource_type
+        try:
+            if self.should_block(request.url, resource_type):
+                self.requests_blocked += 1
+                self.blocked_by_type[resource_type] = (
+                    self.blocked_by_type.get(resource_type, 0) + 1
+                )
+                self.bytes_saved += ROUTE_BLOCK_ESTIMATED_BYTES.get(
+                    resource_type, ROUTE_BLOCK_ESTIMATED_BYTES["other"]
+                )
+                await route.abort("blockedbyclient")
+            else:
+                self.requests_allowed += 1
+                await route.continue_()
+        except Exception as e:
+            # The page may already be closing; nothing left to route
+            logger.debug(f"[{self.carrier.upper()}] Route handling skipped: {e}")
+
+    def stats(self) -> dict:
+        """Requests allowed/blocked and the estimated bytes saved."""
+        return {
+            "requests_allowed": self.requests_allowed,
+            "requests_blocked": self.requests_blocked,
+            "bytes_saved_estimated": self.bytes_saved,
+            "blocked_by_type": dict(self.blocked_by_type),
+        }
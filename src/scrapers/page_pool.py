@@ -0,0 +1,225 @@
+"""
+Pre-warmed pages parked on each carrier's landing page.
+
+A warm page is a pooled browser context whose page already went through the
+scraper's ``warm_up`` step (navigation to ``SCRAPER_URLS`` and, for carriers
+that need it, login). ``BaseScraper`` takes one when available, so the job
+starts typing immediately, and the pool refills itself in the background.
+
+Parked pages hold browser pool slots, so the number of warm pages of a
+carrier is capped across all its keys and a periodic sweep releases the
+ones idle for more than ``max_idle_seconds`` or whose browser went away.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+from playwright.async_api import Page
+from ..configs.logger_config import logger
+from ..configs.config import BROWSER_POOL_CONFIG, WARM_PAGE_POOL_CONFIG
+from .browser_pool import BrowserPool, ContextLease, get_browser_pool
+
+Warmer = Callable[[Page], Awaitable[None]]
+ContextConfigurer = Callable[[ContextLease], Awaitable[None]]
+ContextOptions = Callable[[], dict]
+
+
+@dataclass
+class WarmPage:
+    """A leased context whose page is ready for ``scrape()``."""
+
+    key: str
+    lease: ContextLease
+    page: Page
+    warmed_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _WarmSpec:
+    carrier: str
+    warmer: Warmer
+    configure: Optional[ContextConfigurer] = None
+    context_options: Optional[ContextOptions] = None
+
+
+class WarmPagePool:
+    """
+    Keeps up to ``pages_per_carrier`` warm pages per carrier, shared by its
+    registered keys.
+
+    Keys are chosen by the scraper (``BaseScraper.warm_key``) so pages warmed
+    with one set of credentials are never handed to a job using another.
+    """
+
+    def __init__(self, browser_pool: BrowserPool, config: Optional[dict] = None):
+        self.browser_pool = browser_pool
+        self.config = {**WARM_PAGE_POOL_CONFIG, **(config or {})}
+        self._pages: dict[str, list[WarmPage]] = {}
+        self._specs: dict[str, _WarmSpec] = {}
+        self._refills: dict[str, asyncio.Task] = {}
+        # Páginas sendo aquecidas agora, por transportadora
+        self._warming: dict[str, int] = {}
+        self._sweep_task: Optional[asyncio.Task] = None
+        # Liberações de páginas vencidas disparadas por take()
+        self._releases: set[asyncio.Task] = set()
+        self._closed = False
+
+    def _target_size(self, carrier: str) -> int:
+        sizes = self.config["pages_per_carrier"]
+        target = sizes.get(carrier, sizes.get("default", 0))
+        # Always leave at least one context free for cold jobs
+        capacity = (
+            BROWSER_POOL_CONFIG["browsers_per_carrier"]
+            * BROWSER_POOL_CONFIG["contexts_per_browser"]
+        )
+        return max(0, min(target, capacity - 1))
+
+    def _carrier_size(self, carrier: str) -> int:
+        """Warm pages of ``carrier`` parked or being warmed, across all keys."""
+        parked = sum(
+            len(pages)
+            for key, pages in self._pages.items()
+            if self._specs[key].carrier == carrier
+        )
+        return parked + self._warming.get(carrier, 0)
+
+    def _is_stale(self, warm: WarmPage) -> bool:
+        max_idle = self.config["max_idle_seconds"]
+        if max_idle and time.monotonic() - warm.warmed_at > max_idle:
+            return True
+        return warm.page.is_closed() or not warm.lease.pooled.healthy
+
+    def take(self, key: str) -> Optional[WarmPage]:
+        """Pop a ready page for ``key``, discarding stale ones on the way."""
+        pages = self._pages.get(key, [])
+        while pages:
+            warm = pages.pop(0)
+            if not self._is_stale(warm):
+                logger.info(f"[WARM_POOL] [{key}] Warm page handed out.")
+                return warm
+            self._release_later(warm)
+        return None
+
+    def _release_later(self, warm: WarmPage):
+        task = asyncio.create_task(self.browser_pool.release(warm.lease))
+        self._releases.add(task)
+        task.add_done_callback(self._on_released)
+
+    def _on_released(self, task: asyncio.Task):
+        self._releases.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"[WARM_POOL] Failed to release page: {task.exception()}")
+
+    def schedule_refill(
+        self,
+        key: str,
+        carrier: str,
+        warmer: Warmer,
+        configure: Optional[ContextConfigurer] = None,
+        context_options: Optional[ContextOptions] = None,
+    ):
+        """
+        Register how to warm pages for ``key`` and top the pool up in background.
+
+        Args:
+            key: Warm key returned by the scraper.
+            carrier: Scraper name, used to lease contexts.
+            warmer: Coroutine function preparing a fresh page.
+            configure: Optional coroutine applied to the lease before warming.
+            context_options: Optional callable returning ``new_context``
+                options, evaluated for every page so it sees fresh sessions.
+        """
+        if self._closed:
+            return
+        self._specs[key] = _WarmSpec(carrier, warmer, configure, context_options)
+        if self._sweep_task is None and self.config["sweep_interval_seconds"]:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+        task = self._refills.get(key)
+        if task is None or task.done():
+            self._refills[key] = asyncio.create_task(self._refill(key))
+
+    async def _refill(self, key: str):
+        spec = self._specs[key]
+        target = self._target_size(spec.carrier)
+        pages = self._pages.setdefault(key, [])
+        while not self._closed and self._carrier_size(spec.carrier) < target:
+            self._warming[spec.carrier] = self._warming.get(spec.carrier, 0) + 1
+            try:
+                warm = await self._warm_one(key, spec)
+            finally:
+                self._warming[spec.carrier] -= 1
+            if warm is None:
+                return
+            if self._closed:
+                await self.browser_pool.release(warm.lease)
+                return
+            pages.append(warm)
+            logger.info(
+                f"[WARM_POOL] [{key}] Page warmed "
+                f"({self._carrier_size(spec.carrier)}/{target} for {spec.carrier})."
+            )
+
+    async def _warm_one(self, key: str, spec: _WarmSpec) -> Optional[WarmPage]:
+        options = spec.context_options() if spec.context_options else {}
+        lease = await self.browser_pool.acquire(spec.carrier, **options)
+        try:
+            if spec.configure:
+                await spec.configure(lease)
+            page = await lease.context.new_page()
+            await spec.warmer(page)
+        except Exception as e:
+            logger.warning(f"[WARM_POOL] [{key}] Failed to warm page: {e}")
+            await self.browser_pool.release(lease)
+            return None
+        return WarmPage(key=key, lease=lease, page=page)
+
+    async def sweep(self):
+        """Release parked pages that went stale, freeing their context slots."""
+        for key, pages in list(self._pages.items()):
+            stale = [warm for warm in pages if self._is_stale(warm)]
+            if not stale:
+                continue
+            pages[:] = [warm for warm in pages if warm not in stale]
+            for warm in stale:
+                await self.browser_pool.release(warm.lease)
+            logger.info(f"[WARM_POOL] [{key}] {len(stale)} stale page(s) released.")
+
+    async def _sweep_loop(self):
+        interval = self.config["sweep_interval_seconds"]
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"[WARM_POOL] Sweep failed: {e}")
+
+    def stats(self) -> dict:
+        return {key: len(pages) for key, pages in self._pages.items()}
+
+    async def close(self):
+        """Cancel pending refills and release every parked page."""
+        self._closed = True
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            self._sweep_task = None
+        for task in self._refills.values():
+            task.cancel()
+        if self._releases:
+            await asyncio.gather(*self._releases, return_exceptions=True)
+        for pages in self._pages.values():
+            for warm in pages:
+                await self.browser_pool.release(warm.lease)
+            pages.clear()
+
+
+_warm_pool: Optional[WarmPagePool] = None
+
+
+def get_warm_page_pool() -> WarmPagePool:
+    """Return the warm page pool bound to the current browser pool."""
+    global _warm_pool
+    browser_pool = get_browser_pool()
+    if _warm_pool is None or _warm_pool.browser_pool is not browser_pool:
+        _warm_pool = WarmPagePool(browser_pool)
+    return _warm_pool
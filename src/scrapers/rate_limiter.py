@@ -0,0 +1,212 @@
+"""
+Per-carrier throughput governor for scraping jobs.
+
+Every job of a carrier goes through ``CarrierGovernor.slot``, which combines a
+max-in-flight limit (semaphore) with a token bucket refilled at
+``rate_per_minute``. Limits apply to the process no matter how many clients
+call ``/entrega/scrap``, so the load each carrier site sees stays predictable.
+Limits come from ``CARRIER_RATE_LIMITS``.
+
+With several worker processes (``set_process_share``) every carrier gets an
+even share of its limits in each process (never below one job in flight).
+Limits of a single job at a time (e.g. Braspress: one query every 3 minutes)
+cannot be split: the carrier is owned by a single process, assigned round-
+robin over the exclusive carriers, and the other processes do not claim its
+tasks (``excluded_carriers``). Under the supervisor buckets start empty, so
+startups and restarts do not fire a burst.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from ..configs.logger_config import logger
+from ..configs.config import CARRIER_RATE_LIMITS, SCRAPER_URLS
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate_per_minute: float, burst: int, start_empty: bool = False):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = 0.0 if start_empty else float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self, tokens: int = 1):
+        """
+        Wait until ``tokens`` are spent. A cost above the bucket size (e.g. a
+        large batch) is paid in parts, over as many refills as needed.
+        """
+        async with self._lock:
+            while tokens > 0:
+                self._refill()
+                part = min(tokens, self.capacity)
+                if self.tokens >= part:
+                    self.tokens -= part
+                    tokens -= part
+                    continue
+                await asyncio.sleep((part - self.tokens) / self.rate)
+
+
+class _CarrierLimits:
+    def __init__(self, limits: dict, start_empty: bool = False):
+        self.limits = limits
+        self.bucket = TokenBucket(
+            limits["rate_per_minute"], limits["burst"], start_empty
+        )
+        self.semaphore = asyncio.Semaphore(limits["max_in_flight"])
+        self.in_flight = 0
+        self.waiting = 0
+        self.jobs = 0
+
+
+# Worker processes sharing the limits and the index of this one
+# (see ``set_process_share``)
+_process_count = 1
+_process_index = 0
+
+
+def set_process_share(process_count: int, process_index: int = 0):
+    """
+    Share every carrier limit among ``process_count`` worker processes, so
+    the aggregate rate seen by each carrier site stays the configured one.
+    Must be called before the first job of the process.
+    """
+    global _process_count, _process_index
+    _process_count = max(1, process_count)
+    _process_index = process_index % _process_count
+
+
+def carrier_limits(carrier: str, limits: Optional[dict] = None) -> dict:
+    limits = limits or CARRIER_RATE_LIMITS
+    return {**limits["default"], **limits.get(carrier.lower(), {})}
+
+
+def is_exclusive(carrier: str, limits: Optional[dict] = None) -> bool:
+    """Whether the carrier's limits cannot be split among the processes."""
+    carrier_limit = carrier_limits(carrier, limits)
+    return (
+        _process_count > 1
+        and min(carrier_limit["max_in_flight"], carrier_limit["burst"]) <= 1
+    )
+
+
+def carrier_owner(carrier: str, carriers=()) -> int:
+    """
+    Index of the process that runs every job of an exclusive carrier. The
+    exclusive carriers (``SCRAPER_URLS`` plus ``carriers``), sorted, are
+    dealt round-robin from the last process, since the first ones get the
+    remainder of the split limits; every process computes the same owners.
+    """
+    carrier = carrier.lower()
+    exclusivas = sorted(
+        {c.lower() for c in [*SCRAPER_URLS, *carriers, carrier] if is_exclusive(c)}
+    )
+    return _process_count - 1 - exclusivas.index(carrier) % _process_count
+
+
+def excluded_carriers(carriers) -> list:
+    """Exclusive carriers owned by another process: this one must not claim them."""
+    return [
+        carrier.lower()
+        for carrier in carriers
+        if is_exclusive(carrier) and carrier_owner(carrier, carriers) != _process_index
+    ]
+
+
+def _process_part(value: int) -> int:
+    """This process's part of ``value``; the remainder goes to the first ones."""
+    part = value // _process_count + (_process_index < value % _process_count)
+    return max(1, part)
+
+
+class CarrierGovernor:
+    """Token-bucket rate limit plus max-in-flight limit per carrier."""
+
+    def __init__(self, limits: Optional[dict] = None):
+        self.limits = {**CARRIER_RATE_LIMITS, **(limits or {})}
+        self.loop = asyncio.get_running_loop()
+        self._carriers: dict[str, _CarrierLimits] = {}
+
+    def _state(self, carrier: str) -> _CarrierLimits:
+        state = self._carriers.get(carrier)
+        if state is None:
+            limits = carrier_limits(carrier, self.limits)
+            if _process_count > 1 and not is_exclusive(carrier, self.limits):
+                limits["rate_per_minute"] /= _process_count
+                limits["burst"] = _process_part(limits["burst"])
+                limits["max_in_flight"] = _process_part(limits["max_in_flight"])
+            state = self._carriers[carrier] = _CarrierLimits(
+                limits, start_empty=_process_count > 1
+            )
+        return state
+
+    @asynccontextmanager
+    async def slot(self, carrier: str, cost: int = 1):
+        """
+        Hold one in-flight slot of ``carrier`` after spending ``cost`` tokens.
+
+        Args:
+            carrier: Carrier name.
+            cost: Requests the job makes to the carrier (e.g. NFs in a batch).
+        """
+        carrier = carrier.lower()
+        state = self._state(carrier)
+        started = time.monotonic()
+        state.waiting += 1
+        try:
+            await state.semaphore.acquire()
+        except BaseException:
+            state.waiting -= 1
+            raise
+        try:
+            try:
+                await state.bucket.acquire(cost)
+            finally:
+                state.waiting -= 1
+            waited = time.monotonic() - started
+            if waited >= 1:
+                logger.info(
+                    f"[GOVERNOR] [{carrier.upper()}] Job aguardou {waited:.1f}s "
+                    "pelo limite da transportadora."
+                )
+            state.in_flight += 1
+            state.jobs += 1
+            try:
+                yield
+            finally:
+                state.in_flight -= 1
+        finally:
+            state.semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            carrier: {
+                "in_flight": state.in_flight,
+                "waiting": state.waiting,
+                "jobs": state.jobs,
+                "tokens": round(state.bucket.tokens, 2),
+                **state.limits,
+            }
+            for carrier, state in self._carriers.items()
+        }
+
+
+_governor: Optional[CarrierGovernor] = None
+
+
+def get_governor() -> CarrierGovernor:
+    """Return the governor of the running event loop (see ``get_browser_pool``)."""
+    global _governor
+    if _governor is None or _governor.loop is not asyncio.get_running_loop():
+        _governor = CarrierGovernor()
+    return _governor
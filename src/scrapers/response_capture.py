@@ -0,0 +1,87 @@
+"""
+Capture of the carrier's own JSON/XHR responses during a scraping flow.
+
+Reading the backend payload the site renders from is faster and sturdier than
+regex-parsing ``inner_text``. Capture is opt-in per carrier through
+``RESPONSE_CAPTURE_RULES``; a response only counts as a match when it is JSON,
+its URL matches one of the rule patterns and ``events_path`` resolves to a
+non-empty list, so scrapers can fall back to the DOM whenever it does not.
+"""
+
+import asyncio
+import re
+from typing import Optional
+from playwright.async_api import Page, Response
+from ..configs.logger_config import logger
+from ..configs.config import RESPONSE_CAPTURE_RULES
+from ..utils.normalize_scrap_data import resolve_json_path
+
+CAPTURED_RESOURCE_TYPES = {"xhr", "fetch"}
+
+
+def get_capture_rule(carrier: str) -> Optional[dict]:
+    """Returns the capture rule of a carrier, or None when capture is off."""
+    rule = RESPONSE_CAPTURE_RULES.get(carrier)
+    if not rule or not rule.get("enabled"):
+        return None
+    return rule
+
+
+class ResponseCapture:
+    """Records matching JSON responses of a page."""
+
+    def __init__(self, carrier: str, rule: dict):
+        self.carrier = carrier
+        self.rule = rule
+        self.url_patterns = [re.compile(p, re.I) for p in rule["url_patterns"]]
+        self.payloads: list[dict] = []
+        self._matched = asyncio.Event()
+        self._pending: set[asyncio.Task] = set()
+
+    def attach(self, page: Page):
+        page.on("response", self._on_response)
+
+    def _on_response(self, response: Response):
+        if response.request.resource_type not in CAPTURED_RESOURCE_TYPES:
+            return
+        if not any(p.search(response.url) for p in self.url_patterns):
+            return
+        task = asyncio.create_task(self._record(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _record(self, response: Response):
+        try:
+            if "json" not in (response.headers.get("content-type") or ""):
+                return
+            body = await response.json()
+        except Exception as e:
+            logger.debug(
+                f"[{self.carrier.upper()}] Ignoring capture {response.url}: {e}"
+            )
+            return
+
+        self.payloads.append(
+            {"url": response.url, "status": response.status, "body": body}
+        )
+        events = resolve_json_path(body, self.rule["fields"]["events_path"])
+        if isinstance(events, list) and events:
+            logger.info(f"[{self.carrier.upper()}] Resposta capturada: {response.url}")
+            self._matched.set()
+
+    async def wait(self, timeout_ms: Optional[int] = None) -> list[dict]:
+        """
+        Wait until a matching response arrives.
+
+        Args:
+            timeout_ms: Maximum wait; defaults to the rule's ``wait_ms``.
+
+        Returns:
+            The captured payloads if one of them matched, otherwise [].
+        """
+        timeout_ms = self.rule.get("wait_ms", 0) if timeout_ms is None else timeout_ms
+        try:
+            await asyncio.wait_for(self._matched.wait(), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            return []
+        return list(self.payloads)
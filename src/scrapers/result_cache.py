@@ -0,0 +1,89 @@
+"""
+TTL + LRU cache of normalized scraper output.
+
+The orchestrator, manual ``/entrega/scrap`` calls and retries often ask for
+the same NF within minutes; a hit returns the ``StandardizedDeliveryData`` of
+the previous run without opening a browser. Entries are keyed by
+(carrier, NF, CNPJ), expire after the carrier TTL and the least recently used
+ones are evicted past ``max_entries``. Only successful results are cached.
+Settings come from ``RESULT_CACHE_CONFIG``.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from ..configs.config import RESULT_CACHE_CONFIG
+
+
+class ResultCache:
+    """Thread-safe TTL/LRU cache with hit/miss counters."""
+
+    def __init__(self, config: Optional[dict] = None):
+        self.config = {**RESULT_CACHE_CONFIG, **(config or {})}
+        self._entries: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    @staticmethod
+    def key(transportadora: str, numero_nf: str, cnpj: str) -> tuple:
+        return (transportadora.lower(), str(numero_nf).strip(), str(cnpj).strip())
+
+    def _ttl(self, transportadora: str) -> float:
+        ttls = self.config["ttl_seconds"]
+        return ttls.get(transportadora, ttls.get("default", 0))
+
+    def get(self, transportadora: str, numero_nf: str, cnpj: str) -> Optional[dict]:
+        """Return a copy of the cached result, or None on a miss."""
+        if not self.config["enabled"]:
+            return None
+        key = self.key(transportadora, numero_nf, cnpj)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            expires_at, result = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return copy.deepcopy(result)
+
+    def put(self, transportadora: str, numero_nf: str, cnpj: str, result: dict):
+        """Store a successful result for the carrier TTL."""
+        if not self.config["enabled"]:
+            return
+        key = self.key(transportadora, numero_nf, cnpj)
+        ttl = self._ttl(key[0])
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.config["max_entries"]:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, transportadora: str, numero_nf: str, cnpj: str):
+        with self._lock:
+            self._entries.pop(self.key(transportadora, numero_nf, cnpj), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "entries": len(self._entries),
+                "max_entries": self.config["max_entries"],
+                "hit_rate": (
+                    round(self.counters["hits"] / lookups, 3) if lookups else 0.0
+                ),
+            }
+
+
+result_cache = ResultCache()
@@ -2,11 +2,19 @@ from .accert_scraper import AccertScraper
 from .jamef_scraper import JamefScraper
 from .braspress_scraper import BrasspressScraper
 from .viaverde_scraper import ViaVerdeScraper
+from .http_scraper import HttpTrackingScraper, http_engine_available
+from .rate_limiter import get_governor
+from .circuit_breaker import get_breaker
+from .result_cache import result_cache
+from ..configs.logger_config import logger
+from ..configs.config import BROWSER_POOL_CONFIG, WARM_PAGE_POOL_CONFIG
 from ..utils.normalizer_factory import get_normalizer
+from functools import partial
+import asyncio
 import os
 from dotenv import load_dotenv
 
-SCRAPERS = {
+PLAYWRIGHT_SCRAPERS = {
     "accert": AccertScraper,
     "jamef": JamefScraper,
     "braspress": BrasspressScraper,
@@ -14,40 +22,238 @@ SCRAPERS = {
 }
 
 
+def _engines(transportadora: str) -> list:
+    """
+    Scraper engines of a carrier in order of preference: the browserless HTTP
+    fast path when configured, then the Playwright scraper as fallback.
+    """
+    engines = []
+    if http_engine_available(transportadora):
+        engines.append(partial(HttpTrackingScraper, transportadora))
+    engines.append(PLAYWRIGHT_SCRAPERS[transportadora])
+    return engines
+
+
+SCRAPERS = {
+    transportadora: _engines(transportadora) for transportadora in PLAYWRIGHT_SCRAPERS
+}
+
+
+def _scraper_kwargs(
+    transportadora: str,
+    numero_nf: str,
+    cnpj_destinatario: str,
+    credentials: dict = None,
+) -> dict:
+    """
+    Builds the keyword arguments expected by each scraper's ``scrape``.
+    """
+    if transportadora.lower() == "viaverde":
+        if credentials:
+            return {
+                "login": credentials["username"],
+                "senha": credentials["password"],
+                "n_rastreio": numero_nf,
+            }
+        return {
+            "login": os.getenv("VIAVERDE_USER"),
+            "senha": os.getenv("VIAVERDE_PASSWORD"),
+            "n_rastreio": numero_nf,
+        }
+    return {"nota_fiscal": numero_nf, "cnpj": cnpj_destinatario}
+
+
+async def prewarm_pages(transportadoras: list = None):
+    """
+    Parks warm pages on the landing page of each carrier (logged in with the
+    default credentials for Via Verde), so the first jobs skip navigation too.
+    Carriers whose default credentials are not configured are skipped.
+    """
+    if not (WARM_PAGE_POOL_CONFIG["enabled"] and BROWSER_POOL_CONFIG["enabled"]):
+        return
+    load_dotenv()
+    for transportadora in transportadoras or SCRAPERS.keys():
+        kwargs = _scraper_kwargs(transportadora, numero_nf="", cnpj_destinatario="")
+        if None in kwargs.values():
+            continue
+        scraper = PLAYWRIGHT_SCRAPERS[transportadora.lower()]()
+        scraper.schedule_warm_pages(**kwargs)
+
+
 async def run_scraper(
     transportadora: str,
     numero_nf: str,
     cnpj_destinatario: str,
     credentials: dict = None,
+    bypass_cache: bool = False,
 ):
     """
     Dynamically selects and runs a scraper and its normalizer.
+    Recent successful results are served from ``result_cache`` unless
+    ``bypass_cache`` is set.
     """
     load_dotenv()
-    scraper_class = SCRAPERS.get(transportadora.lower())
+    engines = SCRAPERS.get(transportadora.lower())
+    if not engines:
+        raise ValueError(f"Transportadora '{transportadora}' not supported.")
+
+    if not bypass_cache:
+        cached = result_cache.get(transportadora, numero_nf, cnpj_destinatario)
+        if cached is not None:
+            logger.info(f"[{transportadora.upper()}] Cache hit for NF {numero_nf}.")
+            return cached
+
+    normalizer_func = get_normalizer(transportadora)
+    scraper_kwargs = _scraper_kwargs(
+        transportadora, numero_nf, cnpj_destinatario, credentials
+    )
+
+    breaker = get_breaker(transportadora)
+    # Fail fast instead of queueing behind the rate limit while the site is down
+    breaker.check()
+
+    # Per-carrier rate limit and max in flight, whoever the caller is
+    async with get_governor().slot(transportadora):
+        breaker.acquire()
+        try:
+            result = await _run_engines(
+                engines,
+                normalizer_func,
+                scraper_kwargs,
+                transportadora,
+                numero_nf,
+                cnpj_destinatario,
+            )
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+        breaker.record(_site_available(result))
+
+    if _succeeded(result):
+        result_cache.put(transportadora, numero_nf, cnpj_destinatario, result)
+    return result
+
+
+def _succeeded(result) -> bool:
+    """Whether ``run_scraper`` produced normalized delivery data."""
+    return bool(result and result.get("informacoes_gerais"))
+
+
+def _site_available(result) -> bool:
+    """
+    Whether the carrier site answered the job: with data or saying the NF
+    does not exist. Only outages (timeouts, exceptions, verification pages)
+    count as failures for the circuit breaker.
+    """
+    if _succeeded(result):
+        return True
+    erro = (result or {}).get("erro") or {}
+    return erro.get("tipo") == "not_found"
+
+
+async def _run_engines(
+    engines: list,
+    normalizer_func,
+    scraper_kwargs: dict,
+    transportadora: str,
+    numero_nf: str,
+    cnpj_destinatario: str,
+):
+    """Runs the carrier engines in order, falling back while they fail."""
+    raw_data = None
+    for position, engine in enumerate(engines, start=1):
+        scraper = engine()
+        raw_data = await scraper.execute(**scraper_kwargs)
+
+        if raw_data and raw_data.get("status") == "sucesso":
+            normalized = normalizer_func(
+                raw_data["dados"], cnpj_destinatario, numero_nf
+            )
+            if normalized or position == len(engines):
+                return normalized
+
+        if position < len(engines):
+            logger.warning(
+                f"[{transportadora.upper()}] Engine {type(scraper).__name__} failed for NF {numero_nf}; "
+                "falling back to the next engine."
+            )
+
+    return raw_data
+
+
+# Per-NF scraper arguments; every other argument is shared by the batch
+BATCH_ITEM_KEYS = {"nota_fiscal", "n_rastreio"}
+
+
+async def run_scraper_many(
+    transportadora: str,
+    numeros_nf: list,
+    cnpj_destinatario: str,
+    credentials: dict = None,
+    bypass_cache: bool = False,
+) -> dict:
+    """
+    Runs several NFs of one carrier inside a single browser session (one
+    login for Via Verde) and normalizes each result independently. NFs with
+    a cached result are not scraped again unless ``bypass_cache`` is set.
+
+    Returns:
+        Dict mapping each NF to its normalized data or its error response.
+    """
+    load_dotenv()
+    scraper_class = PLAYWRIGHT_SCRAPERS.get(transportadora.lower())
     if not scraper_class:
         raise ValueError(f"Transportadora '{transportadora}' not supported.")
+    if not numeros_nf:
+        return {}
+
+    results = {}
+    if not bypass_cache:
+        for numero_nf in numeros_nf:
+            cached = result_cache.get(transportadora, numero_nf, cnpj_destinatario)
+            if cached is not None:
+                results[numero_nf] = cached
+    pendentes = [nf for nf in numeros_nf if nf not in results]
+    if not pendentes:
+        return results
 
-    scraper = scraper_class()
     normalizer_func = get_normalizer(transportadora)
+    all_kwargs = [
+        _scraper_kwargs(transportadora, nf, cnpj_destinatario, credentials)
+        for nf in pendentes
+    ]
+    shared_kwargs = {k: v for k, v in all_kwargs[0].items() if k not in BATCH_ITEM_KEYS}
+    items = [
+        {k: v for k, v in kwargs.items() if k in BATCH_ITEM_KEYS}
+        for kwargs in all_kwargs
+    ]
 
-    if transportadora.lower() == "viaverde":
-        if credentials:
-            raw_data = await scraper.execute(
-                login=credentials["username"],
-                senha=credentials["password"],
-                n_rastreio=numero_nf,
+    breaker = get_breaker(transportadora)
+    breaker.check()
+    async with get_governor().slot(transportadora, cost=len(items)):
+        breaker.acquire()
+        try:
+            raw_results = await scraper_class().execute_many(items, **shared_kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False)
+            raise
+
+    for numero_nf, raw_data in zip(pendentes, raw_results):
+        if raw_data and raw_data.get("status") == "sucesso":
+            results[numero_nf] = normalizer_func(
+                raw_data["dados"], cnpj_destinatario, numero_nf
             )
         else:
-            raw_data = await scraper.execute(
-                login=os.getenv("VIAVERDE_USER"),
-                senha=os.getenv("VIAVERDE_PASSWORD"),
-                n_rastreio=numero_nf,
+            results[numero_nf] = raw_data
+        breaker.record(_site_available(results[numero_nf]))
+        if _succeeded(results[numero_nf]):
+            result_cache.put(
+                transportadora, numero_nf, cnpj_destinatario, results[numero_nf]
             )
-    else:
-        raw_data = await scraper.execute(nota_fiscal=numero_nf, cnpj=cnpj_destinatario)
-
-    if raw_data and raw_data.get("status") == "sucesso":
-        return normalizer_func(raw_data["dados"], cnpj_destinatario, numero_nf)
-    else:
-        return raw_data
+    return {numero_nf: results[numero_nf] for numero_nf in numeros_nf}
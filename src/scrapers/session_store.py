@@ -0,0 +1,76 @@
+"""
+Persisted Playwright sessions (``storage_state``) per carrier and credential set.
+
+Reusing cookies and local storage lets Via Verde skip its login form and
+Braspress skip its consent banners on every job. States are stored as JSON
+files named after a hash of (carrier, credential identity), so logins never
+appear on disk in clear text, and they expire after ``max_age_hours``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from playwright.async_api import BrowserContext
+from ..configs.logger_config import logger
+from ..configs.config import SESSION_STATE_CONFIG
+
+
+def identity_digest(carrier: str, identity: str) -> str:
+    """Hash of (carrier, credential identity), safe to log or write to disk."""
+    return hashlib.sha256(f"{carrier}\0{identity}".encode()).hexdigest()[:24]
+
+
+class SessionStore:
+    """File-backed store of Playwright storage states."""
+
+    def __init__(self, directory: Optional[str] = None, max_age_hours: float = None):
+        self.directory = Path(directory or SESSION_STATE_CONFIG["dir"])
+        self.max_age_seconds = 3600 * (
+            SESSION_STATE_CONFIG["max_age_hours"]
+            if max_age_hours is None
+            else max_age_hours
+        )
+
+    def path(self, carrier: str, identity: str) -> Path:
+        return self.directory / f"{carrier}_{identity_digest(carrier, identity)}.json"
+
+    def load(self, carrier: str, identity: str) -> Optional[str]:
+        """
+        Returns the path of a usable storage state, or None when there is no
+        state or it is older than ``max_age_hours``.
+        """
+        path = self.path(carrier, identity)
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+        if self.max_age_seconds and age > self.max_age_seconds:
+            self.invalidate(carrier, identity)
+            return None
+        return str(path)
+
+    async def save(self, context: BrowserContext, carrier: str, identity: str):
+        """Persists the current cookies/local storage of ``context``."""
+        try:
+            state = await context.storage_state()
+            await asyncio.to_thread(self._write, self.path(carrier, identity), state)
+            logger.info(f"[{carrier.upper()}] Sessão persistida.")
+        except Exception as e:
+            logger.warning(f"[{carrier.upper()}] Falha ao persistir sessão: {e}")
+
+    def _write(self, path: Path, state: dict):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def invalidate(self, carrier: str, identity: str):
+        """Forget the stored session (e.g. after it was rejected)."""
+        self.path(carrier, identity).unlink(missing_ok=True)
+
+
+session_store = SessionStore()
@@ -1,8 +1,29 @@
 from ..configs.logger_config import logger
-from .base_scraper import BaseScraper
-from ..configs.config import SCRAPER_URLS
+from playwright.async_api import Page
+from .base_scraper import BaseScraper, NotFoundError
+from typing import Optional
+from ..configs.config import SCRAPER_URLS, TIMEOUTS
 from .scrapper_data_model import ScraperResponse
 from . import viaverde_handler
+from .session_store import identity_digest
+
+
+# Colunas da primeira linha da tabela de resultados, lidas em uma só chamada
+PRIMEIRA_LINHA_SPEC = {
+    "linha": {
+        "root": "table.dataTable tbody tr",
+        "fields": {
+            "ocorrencias": {"selector": "td.coluna-ocorrencias", "prop": "textContent"},
+            "data_entrega": {"selector": "td.coluna-dtentrega", "prop": "textContent"},
+            "remetente": {"selector": "td.coluna-remetente", "prop": "textContent"},
+            "destinatario": {
+                "selector": "td.coluna-destinatario",
+                "prop": "textContent",
+            },
+            "n_notafiscal": {"selector": "td.coluna-nrnf", "prop": "textContent"},
+        },
+    },
+}
 
 
 class ViaVerdeScraper(BaseScraper):
@@ -11,6 +32,50 @@ class ViaVerdeScraper(BaseScraper):
     def __init__(self):
         super().__init__("viaverde")
 
+    def warm_key(self, **kwargs) -> str:
+        # Páginas aquecidas já estão logadas, então só servem para as mesmas
+        # credenciais (login e senha), como a sessão persistida
+        identity = self.session_identity(**kwargs)
+        if identity is None:
+            return self.name
+        return f"{self.name}:{identity_digest(self.name, identity)}"
+
+    def warm_up_kwargs(self, login: str = None, senha: str = None, **kwargs) -> dict:
+        return {"login": login, "senha": senha}
+
+    def session_identity(
+        self, login: str = None, senha: str = None, **kwargs
+    ) -> Optional[str]:
+        # Uma sessão persistida por conjunto de credenciais
+        return f"{login}\0{senha}" if login else None
+
+    async def _needs_login(self, page: Page) -> bool:
+        """
+        Com a sessão persistida o sistema abre direto no menu; se ela expirou,
+        o formulário de login aparece no lugar.
+        """
+        await self.waits.selector(
+            page, "#login, a:has(i.fa-search)", timeout=TIMEOUTS["selector_wait"]
+        )
+        return await page.locator("#login").count() > 0
+
+    async def warm_up(self, page: Page, login: str, senha: str):
+        """Abre o Via Verde e faz login, deixando a página pronta para consultas."""
+        await page.goto(SCRAPER_URLS["viaverde"], timeout=60000)
+
+        if not await self._needs_login(page):
+            logger.info("[VIAVERDE] - Sessão persistida válida, login dispensado")
+            return
+
+        logger.info(f"[VIAVERDE] - Preenchendo login: {login}")
+        await page.fill("#login", login)
+
+        logger.info("[VIAVERDE] - Preenchendo senha")
+        await page.fill("#senha", senha)
+
+        logger.info("[VIAVERDE] - Clicando no botão de entrar")
+        await page.click('button:has-text("Entrar")')
+
     async def scrape(self, login: str, senha: str, n_rastreio: str) -> ScraperResponse:
         """
         Realiza o web scraping do status de uma entrega no site da Via Verde.
@@ -27,49 +92,112 @@ class ViaVerdeScraper(BaseScraper):
         log_prefix = self._get_log_prefix(n_rastreio=n_rastreio)
 
         logger.info(f"{log_prefix} - Acessando a página de rastreamento da Via Verde")
-        await page.goto(SCRAPER_URLS["viaverde"], timeout=60000)
+        await self.open_landing_page(page)
+        await self._abrir_consulta_por_documento(page, log_prefix)
+        return await self._pesquisar(page, n_rastreio)
 
-        logger.info(f"{log_prefix} - Preenchendo login: {login}")
-        await page.fill("#login", login)
+    async def scrape_many(
+        self, items: list[dict], login: str, senha: str
+    ) -> list[ScraperResponse]:
+        """
+        Consulta várias notas com um único login: abre "Por Documento" uma vez
+        e repete apenas o passo "Pesquisar" para cada ``nrNf``.
 
-        logger.info(f"{log_prefix} - Preenchendo senha")
-        await page.fill("#senha", senha)
+        Args:
+            items: Lista de dicts com a chave ``n_rastreio``.
+            login: O login para acessar o sistema.
+            senha: A senha para acessar o sistema.
 
-        logger.info(f"{log_prefix} - Clicando no botão de entrar")
-        await page.click('button:has-text("Entrar")')
+        Returns:
+            Um ScraperResponse por nota, na mesma ordem de ``items``.
+        """
+        page = await self.create_page()
+        log_prefix = self._get_log_prefix(lote=len(items))
 
+        logger.info(f"{log_prefix} - Acessando a página de rastreamento da Via Verde")
+        await self.open_landing_page(page)
+        await self._abrir_consulta_por_documento(page, log_prefix)
+
+        results = []
+        for item in items:
+            item_prefix = self._get_log_prefix(n_rastreio=item["n_rastreio"])
+            result = await self.scrape_isolated(
+                self._pesquisar, item_prefix, page, item["n_rastreio"]
+            )
+            if await self._precisa_reabrir(page, result):
+                # A falha pode ter deixado a tela em outro estado; reabre a consulta
+                await self.scrape_isolated(
+                    self._reabrir_consulta, item_prefix, page, item_prefix, login, senha
+                )
+            results.append(result)
+        return results
+
+    async def _abrir_consulta_por_documento(self, page: Page, log_prefix: str):
         logger.info(f"{log_prefix} - Clicando no botão de Consultas")
         await page.locator("a:has(i.fa-search)").click()
 
         por_documento_link = page.get_by_text("Por Documento")
-        await por_documento_link.wait_for(state="visible", timeout=30000)
+        await self.waits.selector(page, "text=Por Documento", timeout=30000)
 
         logger.info(f"{log_prefix} - Clicando no botão Por Documento")
         await por_documento_link.click()
 
+    async def _precisa_reabrir(self, page: Page, result: ScraperResponse) -> bool:
+        """
+        Nota não encontrada deixa a tela "Por Documento" pronta para a próxima;
+        só timeouts, exceções ou a sessão expirada pedem recarregar a página.
+        """
+        if result["status"] == "sucesso":
+            return False
+        if result["erro"]["tipo"] in ("timeout", "exception"):
+            return True
+        return await page.locator("#login").count() > 0
+
+    async def _reabrir_consulta(
+        self, page: Page, log_prefix: str, login: str, senha: str
+    ):
+        # warm_up refaz o login se a sessão tiver expirado
+        await self.warm_up(page, login, senha)
+        await self._abrir_consulta_por_documento(page, log_prefix)
+        return self.success_response({})
+
+    async def _pesquisar(self, page: Page, n_rastreio: str) -> ScraperResponse:
+        """Pesquisa uma nota na tela "Por Documento" já aberta e lê a tabela."""
+        log_prefix = self._get_log_prefix(n_rastreio=n_rastreio)
+
         logger.info(f"{log_prefix} - Inserindo o n° rastreio: {n_rastreio}")
         await page.locator("#nrNf").fill(n_rastreio)
 
+        # Marca as linhas atuais para não ler o resultado da pesquisa anterior
+        await page.evaluate(
+            """() => document.querySelectorAll('table.dataTable tbody tr')
+                .forEach(tr => tr.setAttribute('data-pl-stale', '1'))"""
+        )
+
         logger.info(f"{log_prefix} - Pesquisando status da entrega")
         await page.click('button:has-text("Pesquisar")')
+        await self.waits.selector(
+            page,
+            "table.dataTable tbody tr:not([data-pl-stale])",
+            timeout=TIMEOUTS["selector_wait"],
+        )
+
+        # O DataTables mostra uma linha "vazia" quando a nota não existe
+        vazia = page.locator("table.dataTable tbody td.dataTables_empty")
+        if await vazia.count() > 0:
+            mensagem = (await vazia.first.text_content() or "").strip()
+            raise NotFoundError(mensagem or "Nota não encontrada.")
 
         logger.info(f"{log_prefix} - Coletando dados da tabela")
-        primeira_linha = page.locator("table.dataTable tbody tr").first
-        lista_de_ocorrencias = (
-            await primeira_linha.locator("td.coluna-ocorrencias").text_content() or ""
-        ).strip()
-        data_entrega = (
-            await primeira_linha.locator("td.coluna-dtentrega").text_content() or ""
-        ).strip()
-        remetente = (
-            await primeira_linha.locator("td.coluna-remetente").text_content() or ""
-        ).strip()
-        destinatario = (
-            await primeira_linha.locator("td.coluna-destinatario").text_content() or ""
-        ).strip()
-        n_notafiscal = (
-            await primeira_linha.locator("td.coluna-nrnf").text_content() or ""
-        ).strip()
+        extraido = await self.extract(page, PRIMEIRA_LINHA_SPEC)
+        primeira_linha = {
+            k: (v or "").strip() for k, v in (extraido["linha"] or {}).items()
+        }
+        lista_de_ocorrencias = primeira_linha["ocorrencias"]
+        data_entrega = primeira_linha["data_entrega"]
+        remetente = primeira_linha["remetente"]
+        destinatario = primeira_linha["destinatario"]
+        n_notafiscal = primeira_linha["n_notafiscal"]
 
         dados = {
             "data_entrega": data_entrega,
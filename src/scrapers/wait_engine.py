@@ -0,0 +1,159 @@
+"""
+Condition-driven waits shared by the scrapers.
+
+Every wait resolves as soon as its DOM condition holds: selector readiness,
+a JS predicate re-checked by a ``MutationObserver`` on every DOM change,
+DOM quiescence or an iframe finishing its load. None of them sleep for a fixed
+time. The engine also accounts how long each job spent waiting versus working.
+"""
+
+import time
+from typing import Any, Optional, Union
+from playwright.async_api import (
+    ElementHandle,
+    Frame,
+    Page,
+    TimeoutError as PlaywrightTimeoutError,
+)
+from ..configs.config import TIMEOUTS
+
+Target = Union[Page, Frame]
+
+# Resolves with true as soon as the predicate holds, re-checking on every DOM
+# mutation; resolves with false when the timeout expires.
+_CONDITION_JS = """
+([arg, timeout]) => new Promise(resolve => {
+    const predicate = %s;
+    const check = () => { try { return !!predicate(arg); } catch (e) { return false; } };
+    if (check()) return resolve(true);
+    const observer = new MutationObserver(() => {
+        if (check()) { observer.disconnect(); clearTimeout(timer); resolve(true); }
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    const timer = setTimeout(() => { observer.disconnect(); resolve(check()); }, timeout);
+})
+"""
+
+# Resolves once no DOM mutation happened for ``quiet`` ms (or on timeout).
+_DOM_QUIET_JS = """
+([quiet, timeout]) => new Promise(resolve => {
+    let idle = setTimeout(done, quiet);
+    const limit = setTimeout(done, timeout);
+    const observer = new MutationObserver(() => {
+        clearTimeout(idle);
+        idle = setTimeout(done, quiet);
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true
+    });
+    function done() {
+        observer.disconnect(); clearTimeout(idle); clearTimeout(limit); resolve(true);
+    }
+})
+"""
+
+
+class WaitEngine:
+    """Condition-based waits with waiting/working time accounting for one job."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.waited_ms = 0.0
+        self.waits = 0
+
+    def _record(self, started: float):
+        self.waited_ms += (time.monotonic() - started) * 1000
+        self.waits += 1
+
+    async def selector(
+        self,
+        target: Target,
+        selector: str,
+        state: str = "visible",
+        timeout: Optional[int] = None,
+    ) -> Optional[ElementHandle]:
+        """Wait until ``selector`` reaches ``state`` in a page or frame."""
+        started = time.monotonic()
+        try:
+            return await target.wait_for_selector(
+                selector, state=state, timeout=timeout or TIMEOUTS["selector_wait"]
+            )
+        finally:
+            self._record(started)
+
+    async def condition(
+        self,
+        target: Target,
+        predicate: str,
+        arg: Any = None,
+        timeout: Optional[int] = None,
+    ):
+        """
+        Wait until the JS ``predicate`` (a function expression receiving
+        ``arg``) returns truthy, re-checking it on every DOM mutation.
+
+        Raises:
+            PlaywrightTimeoutError: The condition did not hold in time.
+        """
+        timeout = timeout or TIMEOUTS["element_wait"]
+        started = time.monotonic()
+        try:
+            ok = await target.evaluate(_CONDITION_JS % predicate, [arg, timeout])
+        finally:
+            self._record(started)
+        if not ok:
+            raise PlaywrightTimeoutError(
+                f"Condição não satisfeita em {timeout} ms: {predicate.strip()[:80]}"
+            )
+
+    async def dom_quiet(self, target: Target, quiet_ms: int = 300, timeout: int = 5000):
+        """Wait until the DOM stops changing for ``quiet_ms`` (at most ``timeout``)."""
+        started = time.monotonic()
+        try:
+            await target.evaluate(_DOM_QUIET_JS, [quiet_ms, timeout])
+        finally:
+            self._record(started)
+
+    async def frame_loaded(
+        self,
+        page: Page,
+        iframe_selector: str,
+        ready_selector: Optional[str] = None,
+        timeout: Optional[int] = None,
+    ) -> Frame:
+        """
+        Wait for an iframe to be attached, loaded and, optionally, to contain
+        ``ready_selector``.
+
+        Returns:
+            The iframe's Frame, usable like a page for locators and evaluate.
+        """
+        timeout = timeout or TIMEOUTS["selector_wait"]
+        started = time.monotonic()
+        try:
+            handle = await page.wait_for_selector(
+                iframe_selector, state="attached", timeout=timeout
+            )
+            frame = await handle.content_frame()
+            if frame is None:
+                raise PlaywrightTimeoutError(f"Iframe sem conteúdo: {iframe_selector}")
+            await frame.wait_for_load_state("domcontentloaded", timeout=timeout)
+            if ready_selector:
+                await frame.wait_for_selector(
+                    ready_selector, state="attached", timeout=timeout
+                )
+            return frame
+        finally:
+            self._record(started)
+
+    def report(self) -> dict:
+        """Time spent waiting vs. working since the job started."""
+        total_ms = (time.monotonic() - self.started_at) * 1000
+        return {
+            "total_ms": round(total_ms),
+            "waiting_ms": round(self.waited_ms),
+            "working_ms": round(max(0.0, total_ms - self.waited_ms)),
+            "waits": self.waits,
+        }
@@ -0,0 +1,46 @@
+"""
+Encryption of carrier credentials kept in the scraping queue.
+
+Tasks wait in ``scraping_tasks`` until a worker runs them, so the credentials
+of a request (e.g. the Via Verde login) are stored encrypted with a key
+derived from ``settings.secret_key``, apart from the JSON payload, and
+cleared once the task reaches SUCCESS or FAILED. ``options_fingerprint``
+tells requests with different credentials apart without storing them.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from functools import lru_cache
+from typing import Optional
+from cryptography.fernet import Fernet
+from src.configs.config import settings
+
+
+@lru_cache(maxsize=1)
+def _fernet() -> Fernet:
+    digest = hashlib.sha256(f"scraping-credentials\0{settings.secret_key}".encode())
+    return Fernet(base64.urlsafe_b64encode(digest.digest()))
+
+
+def encrypt_credentials(credentials: Optional[dict]) -> Optional[str]:
+    if not credentials:
+        return None
+    return _fernet().encrypt(json.dumps(credentials).encode("utf-8")).decode("ascii")
+
+
+def decrypt_credentials(token: Optional[str]) -> Optional[dict]:
+    if not token:
+        return None
+    return json.loads(_fernet().decrypt(token.encode("ascii")))
+
+
+def options_fingerprint(credentials: Optional[dict], bypass_cache: bool) -> str:
+    """Keyed digest of the request options that change a scrape's result."""
+    key = hashlib.sha256(f"scraping-options\0{settings.secret_key}".encode())
+    message = json.dumps(
+        {"credentials": credentials or None, "bypass_cache": bool(bypass_cache)},
+        sort_keys=True,
+    )
+    return hmac.new(key.digest(), message.encode(), hashlib.sha256).hexdigest()[:32]
@@ -1,5 +1,110 @@
 from datetime import datetime
 import re
+from src.configs.config import RESPONSE_CAPTURE_RULES
+
+CAPTURED_TIMESTAMP_FORMATS = ["%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y"]
+
+
+def resolve_json_path(data, path):
+    """
+    Resolves a dotted path (e.g. "data.eventos") inside a JSON document.
+    Returns None when any step is missing.
+    """
+    if not path:
+        return None
+    for part in path.split("."):
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+    return data
+
+
+def _parse_captured_timestamp(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        pass
+    for fmt in CAPTURED_TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(str(value), fmt).isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_captured(capturas, fields, transportadora, cnpj, nota_fiscal):
+    """
+    Normalizes JSON responses captured from the carrier backend, using the
+    field map of the carrier in RESPONSE_CAPTURE_RULES.
+    Returns None when no payload carries tracking events.
+    """
+    for captura in reversed(capturas or []):
+        body = captura.get("body")
+        events = resolve_json_path(body, fields["events_path"])
+        if not isinstance(events, list) or not events:
+            continue
+
+        normalized_history = []
+        for event in events:
+            status = resolve_json_path(event, fields["status"])
+            if not status:
+                continue
+            cidade = resolve_json_path(event, fields.get("cidade"))
+            estado = resolve_json_path(event, fields.get("estado"))
+            normalized_history.append(
+                {
+                    "timestamp": _parse_captured_timestamp(
+                        resolve_json_path(event, fields.get("timestamp"))
+                    ),
+                    "status": str(status).strip(),
+                    "local": (
+                        {"cidade": cidade, "estado": estado}
+                        if cidade or estado
+                        else None
+                    ),
+                    "detalhes": str(
+                        resolve_json_path(event, fields.get("detalhes")) or ""
+                    ).strip(),
+                }
+            )
+
+        if not normalized_history:
+            continue
+
+        timestamps = [e["timestamp"] for e in normalized_history if e["timestamp"]]
+        post_date = (
+            datetime.fromisoformat(min(timestamps)).strftime("%Y-%m-%d")
+            if timestamps
+            else None
+        )
+        previsao = _parse_captured_timestamp(
+            resolve_json_path(body, fields.get("previsao_entrega_path"))
+        )
+
+        return {
+            "informacoes_gerais": {
+                "transportadora": transportadora,
+                "codigo_rastreio": nota_fiscal,
+                "numero_nf": nota_fiscal,
+                "previsao_entrega": (
+                    datetime.fromisoformat(previsao).strftime("%Y-%m-%d")
+                    if previsao
+                    else None
+                ),
+                "data_postagem": post_date,
+                "remetente": None,
+                "destinatario": None,
+                "cnpj_destinatario": cnpj,
+            },
+            "historico": normalized_history,
+            "erro": None,
+        }
+    return None
 
 
 def normalize_braspress(data, cnpj, nota_fiscal):
@@ -84,7 +189,19 @@ def normalize_braspress(data, cnpj, nota_fiscal):
 def normalize_accert(data, cnpj, nota_fiscal):
     """
     Normalizes the data scraped from Accert.
+    Prefers the captured backend JSON and falls back to the DOM text.
     """
+    if data and data.get("capturas"):
+        normalized = normalize_captured(
+            data["capturas"],
+            RESPONSE_CAPTURE_RULES["accert"]["fields"],
+            "ACCERT",
+            cnpj,
+            nota_fiscal,
+        )
+        if normalized:
+            return normalized
+
     if not data or "detalhes" not in data:
         return None
 
@@ -196,7 +313,19 @@ def normalize_viaverde(data, cnpj, nota_fiscal):
 def normalize_jamef(data, cnpj, nota_fiscal):
     """
     Normalizes the data scraped from Jamef.
+    Prefers the captured backend JSON and falls back to the DOM text.
     """
+    if data and data.get("capturas"):
+        normalized = normalize_captured(
+            data["capturas"],
+            RESPONSE_CAPTURE_RULES["jamef"]["fields"],
+            "JAMEF",
+            cnpj,
+            nota_fiscal,
+        )
+        if normalized:
+            return normalized
+
     if not data or "detalhes" not in data:
         return None
 
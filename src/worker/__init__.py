@@ -0,0 +1,3 @@
+"""
+Scraping worker: a long-lived process that runs the tasks queued by the API.
+"""
@@ -0,0 +1,118 @@
+"""
+Group-commit writer for scrape results.
+
+Each result used to be saved in its own transactions (several commits per
+task), so concurrent tasks queued on the database lock, and on SQLite many
+failed with "database is locked". The worker hands its writes to one
+``ResultWriter`` instead: it collects them for up to ``flush_interval_ms``
+or ``max_batch`` items and applies the batch in a single transaction, each
+write inside its own SAVEPOINT so a failing result does not discard the
+others. Every ``submit`` returns when its write is committed (or raises its
+error). Settings come from ``RESULT_WRITER_CONFIG``.
+"""
+
+import asyncio
+from typing import Optional
+from src.configs.config import RESULT_WRITER_CONFIG
+from src.configs.logger_config import logger
+from src.db.async_database import AsyncSessionLocal
+
+
+class ResultWriter:
+    """Batches ``apply(db, *args)`` calls into shared transactions."""
+
+    def __init__(self, config: Optional[dict] = None, session_factory=None):
+        self.config = {**RESULT_WRITER_CONFIG, **(config or {})}
+        self.session_factory = session_factory or AsyncSessionLocal
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"batches": 0, "writes": 0, "failed": 0, "largest_batch": 0}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush the pending writes and stop."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def submit(self, apply, *args):
+        """
+        Queue ``apply(db, *args)`` and wait until it is committed.
+
+        ``apply`` must not commit. Without a running writer (or with the
+        writer disabled) the write gets its own transaction.
+
+        Returns:
+            Whatever ``apply`` returned.
+        """
+        if self._task is None or not self.config["enabled"]:
+            async with self.session_factory() as db:
+                result = await apply(db, *args)
+                await db.commit()
+                return result
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((apply, args, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        interval = self.config["flush_interval_ms"] / 1000
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = loop.time() + interval
+            while len(batch) < self.config["max_batch"]:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        outcomes = []
+        try:
+            async with self.session_factory() as db:
+                for apply, args, future in batch:
+                    try:
+                        async with db.begin_nested():
+                            outcomes.append((future, await apply(db, *args), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+                await db.commit()
+        except Exception as e:
+            if len(batch) > 1:
+                # Falha no commit do lote: cada escrita em sua própria transação
+                logger.warning(
+                    f"[WRITER] Batch of {len(batch)} failed ({e}); retrying one by one."
+                )
+                for item in batch:
+                    await self._flush([item])
+                return
+            outcomes = [(batch[0][2], None, e)]
+
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for future, result, error in outcomes:
+            self.stats["writes"] += 1
+            if future.done():
+                continue
+            if error is not None:
+                self.stats["failed"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,264 @@
+"""
+Long-lived scraping worker backed by the ``scraping_tasks`` table.
+
+The API only enqueues tasks; this worker claims due PENDING rows and runs up
+to ``max_concurrency`` of them at a time on a single persistent event loop,
+so every job shares the same browser pool, warm pages, rate limiter, circuit
+breakers and result cache. Database access goes through the async engine on
+that same loop, so queue polling and result writes never block on a thread.
+Tasks of the ``batch_carriers`` that share credentials run as one batch in a
+single browser session.
+
+Tasks are claimed with a lease (owner, expiry) that a heartbeat renews while
+they run. If a worker or node dies, its leases expire and any worker reclaims
+the tasks, so several workers and nodes can share the queue safely.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+from typing import Optional
+from src.configs.config import SCRAPER_URLS, WORKER_CONFIG
+from src.configs.logger_config import logger
+from src.db.async_database import AsyncSessionLocal, async_engine
+from src.entregas import entregas_async_crud, entregas_handler, entregas_models
+from src.scrapers import runner
+from src.scrapers.browser_pool import shutdown_browser_pool
+from src.scrapers.circuit_breaker import breaker_states
+from src.scrapers.http_scraper import close_http_sessions
+from src.scrapers.rate_limiter import excluded_carriers, get_governor
+from src.scrapers.result_cache import result_cache
+from src.utils.credentials_crypto import decrypt_credentials
+from src.worker.result_writer import ResultWriter
+from src.worker.worker_status import write_status
+
+
+async def _claim(limit: int, owner: str) -> list[tuple]:
+    async with AsyncSessionLocal() as db:
+        tasks = await entregas_async_crud.claim_scraping_tasks(
+            db,
+            limit,
+            owner,
+            WORKER_CONFIG["lease_seconds"],
+            # Transportadoras com limite não divisível rodam em outro processo
+            excluded_carriers(SCRAPER_URLS),
+        )
+        return [
+            (task.task_id, task.payload, task.credentials_enc, task.user_id)
+            for task in tasks
+        ]
+
+
+async def _renew_leases(owner: str, task_ids: list) -> int:
+    async with AsyncSessionLocal() as db:
+        return await entregas_async_crud.renew_scraping_task_leases(
+            db, owner, task_ids, WORKER_CONFIG["lease_seconds"]
+        )
+
+
+def _decode(payload: str, credentials_enc: str):
+    scrap_request = entregas_models.EntregaScrapRequest.model_validate_json(payload)
+    scrap_request.credentials = decrypt_credentials(credentials_enc)
+    return scrap_request
+
+
+def _batches(jobs: list) -> list:
+    """
+    Groups ``(scrap_request, user_id, task_id)`` jobs of the batch carriers
+    that share recipient, credentials and cache flag, up to
+    ``max_batch_size`` per batch; the other jobs run alone.
+    """
+    batch_carriers = {c.lower() for c in WORKER_CONFIG["batch_carriers"]}
+    max_size = WORKER_CONFIG["max_batch_size"]
+    batches = []
+    grupos = {}
+    for job in jobs:
+        scrap_request = job[0]
+        transportadora = scrap_request.transportadora.lower()
+        if transportadora not in batch_carriers:
+            batches.append([job])
+            continue
+        chave = (
+            transportadora,
+            scrap_request.cnpj_destinatario,
+            json.dumps(scrap_request.credentials, sort_keys=True),
+            scrap_request.bypass_cache,
+        )
+        grupos.setdefault(chave, []).append(job)
+    for grupo in grupos.values():
+        batches.extend(grupo[i : i + max_size] for i in range(0, len(grupo), max_size))
+    return batches
+
+
+class ScrapingWorker:
+    """Claims queued scraping tasks and runs them concurrently."""
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        worker_id: str = "worker-0",
+        stats_queue=None,
+    ):
+        """
+        Args:
+            max_concurrency: Tasks run at the same time.
+            poll_interval: Seconds between queue polls when idle.
+            worker_id: Name of the worker in logs and stats.
+            stats_queue: multiprocessing queue of the supervisor; when given,
+                status snapshots are sent there instead of the status file.
+        """
+        self.max_concurrency = max_concurrency or WORKER_CONFIG["max_concurrency"]
+        self.poll_interval = poll_interval or WORKER_CONFIG["poll_interval_seconds"]
+        self.worker_id = worker_id
+        self.stats_queue = stats_queue
+        # Unique across nodes and restarts: identifies the lease holder
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+        # Cada asyncio.Task roda uma tarefa ou um lote delas
+        self._running: dict[asyncio.Task, list[str]] = {}
+        self._stopping = asyncio.Event()
+        # Resultados de todas as tarefas gravados em lotes (group commit)
+        self.writer = ResultWriter()
+        self.stats = {"claimed": 0, "finished": 0}
+
+    def stop(self):
+        """Stop claiming tasks; running ones are allowed to finish."""
+        self._stopping.set()
+
+    async def _process(self, batch: list):
+        if len(batch) == 1:
+            scrap_request, user_id, task_id = batch[0]
+            await entregas_handler.run_task(
+                scrap_request, user_id, task_id, self.writer, self.owner
+            )
+            return
+        await entregas_handler.run_task_batch(batch, self.writer, self.owner)
+
+    def _start(self, coro, task_ids: list):
+        task = asyncio.create_task(coro)
+        self._running[task] = task_ids
+        task.add_done_callback(self._on_done)
+
+    def _dispatch(self, claimed: list):
+        """Starts the claimed tasks, batching the ones that share a session."""
+        jobs = []
+        for task_id, payload, credentials_enc, user_id in claimed:
+            try:
+                scrap_request = _decode(payload, credentials_enc)
+            except Exception as e:
+                self._start(
+                    entregas_handler.fail_task(
+                        task_id, f"Payload inválido: {e}", self.writer, self.owner
+                    ),
+                    [task_id],
+                )
+                continue
+            jobs.append((scrap_request, user_id, task_id))
+        for batch in _batches(jobs):
+            self._start(self._process(batch), [task_id for _, _, task_id in batch])
+
+    def _running_task_ids(self) -> list:
+        return [task_id for ids in self._running.values() for task_id in ids]
+
+    def _on_done(self, task: asyncio.Task):
+        self.stats["finished"] += len(self._running.pop(task, ()))
+        if not task.cancelled() and task.exception():
+            logger.error(f"[WORKER] Task crashed: {task.exception()}")
+
+    def snapshot(self) -> dict:
+        return {
+            "worker": {**self.stats, "running": len(self._running_task_ids())},
+            "writer": dict(self.writer.stats),
+            "breakers": breaker_states(),
+            "cache": result_cache.stats(),
+            "rate_limits": get_governor().stats(),
+        }
+
+    async def _publish_status(self):
+        try:
+            if self.stats_queue is not None:
+                self.stats_queue.put_nowait(
+                    (self.worker_id, os.getpid(), self.snapshot())
+                )
+                return
+            await asyncio.to_thread(write_status, self.snapshot())
+        except Exception as e:
+            logger.warning(f"[WORKER] Failed to publish status: {e}")
+
+    async def _heartbeat(self):
+        """Renew the leases of the running tasks until the worker stops."""
+        interval = WORKER_CONFIG["heartbeat_interval_seconds"]
+        while True:
+            await asyncio.sleep(interval)
+            task_ids = self._running_task_ids()
+            if not task_ids:
+                continue
+            try:
+                renewed = await _renew_leases(self.owner, task_ids)
+            except Exception as e:
+                logger.warning(f"[WORKER] [{self.worker_id}] Heartbeat failed: {e}")
+                continue
+            if renewed < len(task_ids):
+                logger.warning(
+                    f"[WORKER] [{self.worker_id}] Lost the lease of "
+                    f"{len(task_ids) - renewed} running task(s)."
+                )
+
+    async def run(self):
+        """Main loop: claim due tasks while there is free capacity."""
+        logger.info(
+            f"[WORKER] [{self.worker_id}] Started "
+            f"(max_concurrency={self.max_concurrency}, poll={self.poll_interval}s)."
+        )
+
+        self.writer.start()
+        heartbeat = asyncio.create_task(self._heartbeat())
+        # Páginas aquecidas só das transportadoras que este processo atende
+        excluded = excluded_carriers(SCRAPER_URLS)
+        await runner.prewarm_pages([c for c in SCRAPER_URLS if c not in excluded])
+        try:
+            while not self._stopping.is_set():
+                free = self.max_concurrency - len(self._running)
+                claimed = []
+                if free > 0:
+                    claimed = await _claim(free, self.owner)
+                self._dispatch(claimed)
+                self.stats["claimed"] += len(claimed)
+                await self._publish_status()
+
+                # Poll again right away when the queue may still hold more
+                if claimed and len(claimed) == free:
+                    await asyncio.sleep(0)
+                    continue
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._running:
+                logger.info(f"[WORKER] Waiting for {len(self._running)} task(s)...")
+                await asyncio.gather(*self._running, return_exceptions=True)
+            await self.writer.stop()
+            heartbeat.cancel()
+            await shutdown_browser_pool()
+            await close_http_sessions()
+            await async_engine.dispose()
+            logger.info("[WORKER] Stopped.")
+
+
+async def run_worker(worker_id: str = "worker-0", stats_queue=None):
+    """Run one worker until SIGINT/SIGTERM."""
+    worker = ScrapingWorker(worker_id=worker_id, stats_queue=stats_queue)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:  # Windows
+            pass
+    await worker.run()
+
+
+async def main():
+    await run_worker()
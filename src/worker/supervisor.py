@@ -0,0 +1,213 @@
+"""
+Supervisor running several scraping worker processes.
+
+One Python process driving Playwright saturates a single core with CDP/JSON
+traffic and normalization, so the supervisor starts one ``ScrapingWorker``
+per process, sized by CPU cores and available RAM (``WORKER_CONFIG``). Each
+process owns its own event loop and browser pool; claims are atomic
+conditional updates, so processes never run the same task. Workers send their
+status snapshots through a ``multiprocessing`` queue and the supervisor
+publishes the aggregate (throughput and per-process load) for the API.
+Dead workers are restarted.
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import queue
+import signal
+import time
+from typing import Optional
+from src.configs.config import WORKER_CONFIG
+from src.configs.logger_config import logger
+from src.worker.worker_status import write_status
+
+BREAKER_SEVERITY = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _available_memory_mb() -> Optional[float]:
+    """Available RAM in MB, or None when it cannot be determined."""
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def compute_process_count() -> int:
+    """
+    Number of worker processes: ``processes`` from the config, or on "auto"
+    one per core limited by the RAM each worker (and its browsers) needs.
+    """
+    configured = WORKER_CONFIG["processes"]
+    if configured != "auto":
+        return max(1, int(configured))
+
+    count = os.cpu_count() or 1
+    memory_mb = _available_memory_mb()
+    if memory_mb is not None:
+        count = min(count, int(memory_mb // WORKER_CONFIG["memory_per_process_mb"]))
+    return max(1, min(count, WORKER_CONFIG["max_processes"]))
+
+
+def _worker_process(
+    worker_id: str, process_index: int, process_count: int, stats_queue
+):
+    """Entry point of a child process."""
+    # Imported here so the child builds its own loop, pool and state
+    from src.scrapers.rate_limiter import set_process_share
+    from src.worker.scraping_worker import run_worker
+
+    # Ctrl+C reaches the whole process group; let the supervisor coordinate
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    set_process_share(process_count, process_index)
+    asyncio.run(run_worker(worker_id, stats_queue))
+
+
+class Supervisor:
+    """Starts, monitors and restarts the worker processes."""
+
+    def __init__(self, process_count: Optional[int] = None):
+        self.process_count = process_count or compute_process_count()
+        # spawn: Playwright and its driver threads do not survive fork()
+        self.ctx = mp.get_context("spawn")
+        self.stats_queue = self.ctx.Queue()
+        self.processes: dict[str, mp.Process] = {}
+        self.started_at: dict[str, float] = {}
+        self.snapshots: dict[str, dict] = {}
+        self.restarts = 0
+        self._stopping = False
+
+    def _start(self, worker_id: str):
+        process_index = int(worker_id.rsplit("-", 1)[1])
+        process = self.ctx.Process(
+            target=_worker_process,
+            args=(worker_id, process_index, self.process_count, self.stats_queue),
+            name=worker_id,
+            daemon=False,
+        )
+        process.start()
+        self.processes[worker_id] = process
+        self.started_at[worker_id] = time.time()
+        logger.info(f"[SUPERVISOR] {worker_id} started (pid {process.pid}).")
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def _drain_stats(self):
+        while True:
+            try:
+                worker_id, pid, snapshot = self.stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.snapshots[worker_id] = {
+                **snapshot,
+                "pid": pid,
+                "received_at": time.time(),
+            }
+
+    def aggregate(self) -> dict:
+        """Aggregate throughput, per-process load, breakers and cache stats."""
+        now = time.time()
+        processes, breakers, cache, writer = {}, {}, {}, {}
+        totals = {"claimed": 0, "finished": 0, "running": 0}
+        for worker_id, process in self.processes.items():
+            snapshot = self.snapshots.get(worker_id, {})
+            load = snapshot.get("worker", {})
+            uptime_min = max((now - self.started_at[worker_id]) / 60, 1 / 60)
+            processes[worker_id] = {
+                "pid": process.pid,
+                "alive": process.is_alive(),
+                **load,
+                "throughput_per_min": round(load.get("finished", 0) / uptime_min, 2),
+            }
+            for key in totals:
+                totals[key] += load.get(key, 0)
+
+            # A carrier is reported with the worst state among the processes
+            for carrier, state in snapshot.get("breakers", {}).items():
+                current = breakers.get(carrier)
+                if current is None or (
+                    BREAKER_SEVERITY[state["state"]]
+                    > BREAKER_SEVERITY[current["state"]]
+                ):
+                    breakers[carrier] = state
+            for key, value in snapshot.get("cache", {}).items():
+                if isinstance(value, int):
+                    cache[key] = cache.get(key, 0) + value
+            for key, value in snapshot.get("writer", {}).items():
+                merge = max if key == "largest_batch" else sum
+                writer[key] = merge((writer.get(key, 0), value))
+
+        lookups = cache.get("hits", 0) + cache.get("misses", 0)
+        if cache:
+            cache["hit_rate"] = round(cache["hits"] / lookups, 3) if lookups else 0.0
+        uptime_min = max((now - min(self.started_at.values())) / 60, 1 / 60)
+        return {
+            "worker": {
+                **totals,
+                "processes": len(self.processes),
+                "restarts": self.restarts,
+                "throughput_per_min": round(totals["finished"] / uptime_min, 2),
+            },
+            "processes": processes,
+            "breakers": breakers,
+            "cache": cache,
+            "writer": writer,
+        }
+
+    def run(self):
+        """Start the workers and supervise them until SIGINT/SIGTERM."""
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        logger.info(f"[SUPERVISOR] Starting {self.process_count} worker process(es).")
+        for index in range(self.process_count):
+            self._start(f"worker-{index}")
+
+        try:
+            while not self._stopping:
+                time.sleep(WORKER_CONFIG["poll_interval_seconds"])
+                self._drain_stats()
+                for worker_id, process in list(self.processes.items()):
+                    if not process.is_alive() and not self._stopping:
+                        logger.warning(
+                            f"[SUPERVISOR] {worker_id} exited "
+                            f"(code {process.exitcode}); restarting."
+                        )
+                        self.restarts += 1
+                        self._start(worker_id)
+                try:
+                    write_status(self.aggregate())
+                except Exception as e:
+                    logger.warning(f"[SUPERVISOR] Failed to publish status: {e}")
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        logger.info("[SUPERVISOR] Stopping workers...")
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM: workers finish running tasks
+        for process in self.processes.values():
+            process.join(WORKER_CONFIG["shutdown_timeout_seconds"])
+            if process.is_alive():
+                process.kill()
+        logger.info("[SUPERVISOR] Stopped.")
+
+
+def main():
+    """Run a single in-process worker, or the supervisor for several."""
+    process_count = compute_process_count()
+    if process_count == 1:
+        from src.worker.scraping_worker import main as run_single_worker
+
+        asyncio.run(run_single_worker())
+        return
+    Supervisor(process_count).run()
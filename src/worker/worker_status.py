@@ -0,0 +1,32 @@
+"""
+Status snapshot the worker publishes for the API process.
+
+Breakers, the result cache and the rate limiter live in the worker's memory;
+the worker periodically writes their state to ``WORKER_CONFIG["status_file"]``
+so the monitoring endpoints of the API can report it.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from src.configs.config import WORKER_CONFIG
+
+
+def write_status(snapshot: dict):
+    path = Path(WORKER_CONFIG["status_file"])
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps({**snapshot, "updated_at": time.time()}, default=str),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, path)
+
+
+def read_status() -> Optional[dict]:
+    """The last snapshot published by the worker, or None if there is none."""
+    try:
+        return json.loads(Path(WORKER_CONFIG["status_file"]).read_text("utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
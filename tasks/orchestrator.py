@@ -13,10 +13,11 @@ from src.configs.config import (
     DELAY_ENTRE_TENTATIVAS_SEGUNDOS,
     ENDPOINT_SCRAPING,
     ENDPOINT_NOTIFICACAO,
+    ENDPOINT_SCRAPING_DUE,
     ORCHESTRATOR_USER_EMAIL,
     ORCHESTRATOR_USER_PASSWORD,
     BASE_URL,
-    BRASPRESS_DELAY_SECONDS,
+    ORCHESTRATOR_PIPELINES,
 )
 
 
@@ -123,6 +124,163 @@ async def notificar_resultados(
         logger.error(f"Falha ao enviar notificação: {e}")
 
 
+async def filtrar_entregas_devidas(
+    session: aiohttp.ClientSession, entregas: list, headers: dict
+) -> list:
+    """
+    Consulta o agendamento adaptativo e retorna apenas as entregas que devem
+    ser consultadas agora. Em caso de erro, todas são consultadas.
+    """
+    try:
+        async with session.post(
+            ENDPOINT_SCRAPING_DUE, json={"entregas": entregas}, headers=headers
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+    except aiohttp.ClientError as e:
+        logger.warning(f"Falha ao consultar o agendamento; consultando todas: {e}")
+        return entregas
+
+    for entrega in data["skipped"]:
+        logger.info(
+            f"NF {entrega['numero_nf']} da {entrega['transportadora']} pulada "
+            f"({entrega['motivo']}); próxima consulta: {entrega['proximo_scrape_em']}."
+        )
+    logger.info(
+        f"{len(data['due'])} entrega(s) a consultar, {len(data['skipped'])} pulada(s)."
+    )
+    return data["due"]
+
+
+class CarrierPipeline:
+    """
+    Envia e acompanha as entregas de uma transportadora, independentemente das
+    demais. Cada pipeline tem o próprio ritmo de envio (``delay_seconds``), o
+    próprio limite de tarefas simultâneas e o próprio orçamento de reenvios,
+    de modo que uma transportadora lenta não atrasa as outras.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        headers: dict,
+        transportadora: str,
+        entregas: list,
+    ):
+        config = {
+            **ORCHESTRATOR_PIPELINES["default"],
+            **ORCHESTRATOR_PIPELINES.get(transportadora.lower(), {}),
+        }
+        self.session = session
+        self.headers = headers
+        self.transportadora = transportadora
+        self.entregas = entregas
+        self.delay_seconds = config["delay_seconds"]
+        self.retry_budget = config["retry_budget"]
+        self._in_flight = asyncio.Semaphore(config["max_in_flight"])
+        self._send_lock = asyncio.Lock()
+        self._last_sent_at = None
+
+    async def _enviar(self, entrega: dict) -> dict:
+        """Envia uma requisição de scraping respeitando o ritmo da transportadora."""
+        async with self._send_lock:
+            loop = asyncio.get_running_loop()
+            if self._last_sent_at is not None and self.delay_seconds:
+                espera = self._last_sent_at + self.delay_seconds - loop.time()
+                if espera > 0:
+                    logger.info(
+                        f"[{self.transportadora.upper()}] Aguardando {espera:.0f}s "
+                        "para a próxima requisição..."
+                    )
+                    await asyncio.sleep(espera)
+            result = await executar_scraping_com_retentativa(
+                self.session, entrega, self.headers
+            )
+            self._last_sent_at = loop.time()
+            return result
+
+    async def _aguardar_tarefa(self, task_id: str) -> dict:
+        """Consulta a tarefa até que ela termine."""
+        while True:
+            status_data = await check_task_status(self.session, task_id, self.headers)
+            if status_data.get("status") in ("SUCCESS", "FAILED", "ERROR"):
+                return status_data
+            await asyncio.sleep(DELAY_ENTRE_TENTATIVAS_SEGUNDOS)
+
+    def _pode_reenviar(self, retries: int) -> bool:
+        if retries >= TENTATIVAS_MAXIMAS:
+            return False
+        if self.retry_budget <= 0:
+            logger.warning(
+                f"[{self.transportadora.upper()}] Orçamento de reenvios esgotado."
+            )
+            return False
+        self.retry_budget -= 1
+        return True
+
+    async def _processar_entrega(self, entrega: dict) -> dict:
+        """Envia, acompanha e, se preciso, reenvia uma entrega."""
+        numero_nf = entrega["numero_nf"]
+        retries = 0
+        async with self._in_flight:
+            while True:
+                result = await self._enviar(entrega)
+                if result["status"] != "sent":
+                    return {
+                        "status": "FAILED",
+                        "error_message": result.get(
+                            "error", "Failed to send scraping request."
+                        ),
+                        "entrega": entrega,
+                    }
+
+                task_id = result["task_id"]
+                status_data = await self._aguardar_tarefa(task_id)
+                if status_data.get("status") == "SUCCESS":
+                    logger.info(
+                        f"Task {task_id} for NF {numero_nf} completed successfully."
+                    )
+                    return {
+                        "status": "SUCCESS",
+                        "entrega": entrega,
+                        "entrega_id": status_data.get("entrega_id"),
+                    }
+
+                error_message = status_data.get("error_message")
+                logger.warning(
+                    f"Task {task_id} for NF {numero_nf} failed. Error: {error_message}"
+                )
+                if not self._pode_reenviar(retries):
+                    logger.error(
+                        f"Task {task_id} for NF {numero_nf} failed after {retries} retries."
+                    )
+                    return {
+                        "status": "FAILED",
+                        "error_message": error_message,
+                        "entrega": entrega,
+                    }
+                retries += 1
+                logger.info(
+                    f"Retrying NF {numero_nf} (Retry {retries}/{TENTATIVAS_MAXIMAS})..."
+                )
+
+    async def run(self) -> list:
+        """Processa todas as entregas da transportadora e retorna os resultados."""
+        inicio = asyncio.get_running_loop().time()
+        logger.info(
+            f"[{self.transportadora.upper()}] Iniciando pipeline com "
+            f"{len(self.entregas)} entrega(s)."
+        )
+        resultados = await asyncio.gather(
+            *(self._processar_entrega(entrega) for entrega in self.entregas)
+        )
+        duracao = asyncio.get_running_loop().time() - inicio
+        logger.info(
+            f"[{self.transportadora.upper()}] Pipeline finalizado em {duracao:.0f}s."
+        )
+        return list(resultados)
+
+
 async def main():
     """Função principal que orquestra todo o fluxo."""
     logger.info("=" * 50)
@@ -148,136 +306,30 @@ async def main():
             )
             return
 
-        braspress_entregas = []
-        other_entregas = []
-
-        for _, entrega in df_entregas.iterrows():
-            entrega_data = {
+        entregas = [
+            {
                 "transportadora": str(entrega["transportadora"]),
                 "numero_nf": str(entrega["numero_nf"]),
                 "cnpj_destinatario": str(entrega["cnpj_destinatario"]),
             }
-            if entrega_data["transportadora"].lower() == "braspress":
-                braspress_entregas.append(entrega_data)
-            else:
-                other_entregas.append(entrega_data)
-
-        active_tasks = {}
-        completed_results = []
-
-        for entrega in braspress_entregas:
-            result = await executar_scraping_com_retentativa(session, entrega, headers)
-            if result["status"] == "sent":
-                active_tasks[result["task_id"]] = {
-                    "entrega": entrega,
-                    "retries": 0,
-                    "initial_task_id": result["task_id"],
-                }
-            else:
-                completed_results.append(
-                    {
-                        "status": "FAILED",
-                        "error_message": result.get("error"),
-                        "entrega": entrega,
-                    }
-                )
-            logger.info(
-                f"Aguardando {BRASPRESS_DELAY_SECONDS}s para a próxima requisição da Braspress..."
-            )
-            await asyncio.sleep(BRASPRESS_DELAY_SECONDS)
-
-        # Process other carriers concurrently
-        tasks = [
-            executar_scraping_com_retentativa(session, entrega, headers)
-            for entrega in other_entregas
+            for _, entrega in df_entregas.iterrows()
         ]
-        results = await asyncio.gather(*tasks)
-        for result in results:
-            if result["status"] == "sent":
-                active_tasks[result["task_id"]] = {
-                    "entrega": result["entrega"],
-                    "retries": 0,
-                    "initial_task_id": result["task_id"],
-                }
-            else:
-                completed_results.append(
-                    {
-                        "status": "FAILED",
-                        "error_message": result.get("error"),
-                        "entrega": result["entrega"],
-                    }
-                )
+        entregas = await filtrar_entregas_devidas(session, entregas, headers)
 
-        logger.info(f"Sent {len(active_tasks)} scraping requests. Starting polling...")
+        entregas_por_transportadora = {}
+        for entrega_data in entregas:
+            entregas_por_transportadora.setdefault(
+                entrega_data["transportadora"].lower(), []
+            ).append(entrega_data)
 
-        # Polling loop
-        while active_tasks:
-            tasks_to_check = list(active_tasks.keys())
-            for task_id in tasks_to_check:
-                status_data = await check_task_status(session, task_id, headers)
-                current_status = status_data.get("status")
-                error_message = status_data.get("error_message")
-                entrega_id = status_data.get("entrega_id")
-
-                if current_status == "SUCCESS":
-                    logger.info(
-                        f"Task {task_id} for NF {active_tasks[task_id]['entrega']['numero_nf']} completed successfully."
-                    )
-                    completed_results.append(
-                        {
-                            "status": "SUCCESS",
-                            "entrega": active_tasks[task_id]["entrega"],
-                            "entrega_id": entrega_id,
-                        }
-                    )
-                    del active_tasks[task_id]
-                elif current_status == "FAILED" or current_status == "ERROR":
-                    logger.warning(
-                        f"Task {task_id} for NF {active_tasks[task_id]['entrega']['numero_nf']} failed. Error: {error_message}"
-                    )
-                    if active_tasks[task_id]["retries"] < TENTATIVAS_MAXIMAS:
-                        active_tasks[task_id]["retries"] += 1
-                        logger.info(
-                            f"Retrying task {task_id} for NF {active_tasks[task_id]['entrega']['numero_nf']} (Retry {active_tasks[task_id]["retries"]}/{TENTATIVAS_MAXIMAS})..."
-                        )
-                        entrega_data = active_tasks[task_id]["entrega"]
-                        new_result = await executar_scraping_com_retentativa(
-                            session, entrega_data, headers
-                        )
-                        if new_result["status"] == "sent":
-                            active_tasks[new_result["task_id"]] = active_tasks.pop(
-                                task_id
-                            )
-                            active_tasks[new_result["task_id"]]["initial_task_id"] = (
-                                new_result["task_id"]
-                            )
-                        else:
-                            completed_results.append(
-                                {
-                                    "status": "FAILED",
-                                    "error_message": new_result.get(
-                                        "error", "Failed to resend scraping request."
-                                    ),
-                                    "entrega": entrega_data,
-                                }
-                            )
-                            del active_tasks[task_id]
-                    else:
-                        logger.error(
-                            f"Task {task_id} for NF {active_tasks[task_id]['entrega']['numero_nf']} failed after {TENTATIVAS_MAXIMAS} retries."
-                        )
-                        completed_results.append(
-                            {
-                                "status": "FAILED",
-                                "error_message": error_message,
-                                "entrega": active_tasks[task_id]["entrega"],
-                            }
-                        )
-                        del active_tasks[task_id]
-
-            if active_tasks:
-                logger.info(f"Waiting for {len(active_tasks)} tasks to complete...")
-                await asyncio.sleep(DELAY_ENTRE_TENTATIVAS_SEGUNDOS)
+        # Um pipeline concorrente por transportadora: o tempo total passa a ser o
+        # da transportadora mais lenta, e não a soma de todas
+        pipelines = [
+            CarrierPipeline(session, headers, transportadora, entregas)
+            for transportadora, entregas in entregas_por_transportadora.items()
+        ]
+        resultados = await asyncio.gather(*(p.run() for p in pipelines))
+        completed_results = [r for resultado in resultados for r in resultado]
 
         logger.info("All scraping tasks completed or failed after retries.")
         await notificar_resultados(session, completed_results, headers)
@@ -1,9 +1,12 @@
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app import app
 from src.db.models import Base
+from src.db.async_database import configure_sqlite
 from src.db.database import get_db
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -31,3 +34,31 @@ def client():
     with TestClient(app) as c:
         yield c
     Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Sync session on an empty SQLite database with the current schema."""
+    db_engine = create_engine(f"sqlite:///{tmp_path / 'sync.db'}")
+    Base.metadata.create_all(bind=db_engine)
+    db = sessionmaker(autoflush=False, bind=db_engine)()
+    yield db
+    db.close()
+    db_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_session_factory(tmp_path):
+    """Async session factory on an empty SQLite database (as the worker uses)."""
+    db_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    configure_sqlite(db_engine)
+    async with db_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(db_engine, autoflush=False, expire_on_commit=False)
+    await db_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def async_db(async_session_factory):
+    async with async_session_factory() as db:
+        yield db
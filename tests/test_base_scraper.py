@@ -0,0 +1,50 @@
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from src.scrapers.base_scraper import NotFoundError
+from src.scrapers.jamef_scraper import JamefScraper
+
+
+@pytest.mark.asyncio
+async def test_not_found_error_becomes_not_found_response():
+    result = await JamefScraper()._error_from_exception(
+        NotFoundError("Nenhum registro encontrado"), "[JAMEF]"
+    )
+
+    assert result["status"] == "falha"
+    assert result["erro"]["tipo"] == "not_found"
+    assert result["erro"]["mensagem"] == "Nenhum registro encontrado"
+
+
+@pytest.mark.asyncio
+async def test_timeout_without_not_found_message_stays_a_timeout(monkeypatch):
+    scraper = JamefScraper()
+
+    async def no_capture(error_type="error"):
+        return None
+
+    monkeypatch.setattr(scraper, "_capture_artifacts", no_capture)
+    result = await scraper._error_from_exception(
+        PlaywrightTimeoutError("espera expirou"), "[JAMEF]"
+    )
+
+    assert result["erro"]["tipo"] == "timeout"
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_returns_an_independent_error_per_item(monkeypatch):
+    scraper = JamefScraper()
+
+    async def broken_session(self):
+        raise RuntimeError("navegador indisponível")
+
+    async def no_capture(error_type="error"):
+        return None
+
+    monkeypatch.setattr(JamefScraper, "__aenter__", broken_session)
+    monkeypatch.setattr(scraper, "_capture_artifacts", no_capture)
+    results = await scraper.execute_many([{"nota_fiscal": "1"}, {"nota_fiscal": "2"}])
+
+    assert [r["erro"]["tipo"] for r in results] == ["exception", "exception"]
+    assert "navegador indisponível" in results[1]["erro"]["mensagem"]
+    assert results[0] is not results[1]
+    assert results[0]["erro"] is not results[1]["erro"]
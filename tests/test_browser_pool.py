@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.scrapers import browser_pool
+from src.scrapers.browser_pool import BrowserPool
+
+
+class FakeContext:
+    def __init__(self, fail_close=False):
+        self.fail_close = fail_close
+
+    async def close(self):
+        if self.fail_close:
+            raise RuntimeError("contexto já fechado")
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.fail_new_context = False
+        self._on_disconnected = None
+
+    def is_connected(self):
+        return self.connected
+
+    def on(self, event, callback):
+        self._on_disconnected = callback
+
+    def crash(self):
+        self.connected = False
+        self._on_disconnected(self)
+
+    async def new_context(self, **options):
+        if self.fail_new_context:
+            raise RuntimeError("navegador travou")
+        return FakeContext()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = SimpleNamespace(launch=self._launch)
+
+    async def _launch(self, **options):
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    """Makes the pool launch fake browsers instead of Chromium."""
+    fake = FakePlaywright()
+
+    async def start():
+        return fake
+
+    monkeypatch.setattr(
+        browser_pool, "async_playwright", lambda: SimpleNamespace(start=start)
+    )
+    return fake
+
+
+def _pool(**config) -> BrowserPool:
+    return BrowserPool(
+        {
+            "browsers_per_carrier": 1,
+            "contexts_per_browser": 2,
+            "max_uses_per_browser": 0,
+            "health_check_interval": 0,
+            "idle_timeout": 0,
+            **config,
+        }
+    )
+
+
+@pytest.mark.asyncio
+async def test_carrier_holds_at_most_its_contexts(playwright):
+    pool = _pool()
+    leases = [await pool.acquire("jamef"), await pool.acquire("jamef")]
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.acquire("jamef"), timeout=0.05)
+    # Outra transportadora tem navegador e vagas próprios
+    other = await pool.acquire("accert")
+    await pool.release(leases[0])
+    third = await asyncio.wait_for(pool.acquire("jamef"), timeout=0.05)
+
+    assert len(playwright.launched) == 2
+    assert other.browser is not third.browser
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_browser_is_recycled_after_max_uses(playwright):
+    pool = _pool(max_uses_per_browser=2)
+    for _ in range(2):
+        await pool.release(await pool.acquire("jamef"))
+
+    lease = await pool.acquire("jamef")
+
+    first, second = playwright.launched
+    assert first.closed
+    assert lease.browser is second
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_browser_is_closed_by_the_health_check(playwright):
+    pool = _pool(idle_timeout=10)
+    lease = await pool.acquire("jamef")
+    await pool.release(lease)
+    lease.pooled.last_used_at -= 20
+
+    await pool.health_check()
+
+    assert playwright.launched[0].closed
+    assert pool.stats()["jamef"]["browsers"] == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_health_loop_replaces_a_dead_browser(playwright):
+    pool = _pool(health_check_interval=0.01)
+    await pool.release(await pool.acquire("jamef"))
+
+    playwright.launched[0].crash()
+    await asyncio.sleep(0.05)
+    assert pool.stats()["jamef"]["browsers"] == 0
+
+    lease = await pool.acquire("jamef")
+    assert lease.browser is playwright.launched[1]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_slot_is_released_when_the_context_fails(playwright):
+    pool = _pool(contexts_per_browser=1)
+    lease = await pool.acquire("jamef")
+    lease.context.fail_close = True
+    await pool.release(lease)
+
+    lease.browser.fail_new_context = True
+    with pytest.raises(RuntimeError):
+        await pool.acquire("jamef")
+    lease.browser.fail_new_context = False
+    lease = await asyncio.wait_for(pool.acquire("jamef"), timeout=0.05)
+
+    assert pool.stats()["jamef"]["active_contexts"] == 1
+    await pool.close()
@@ -0,0 +1,92 @@
+import pytest
+from src.scrapers import circuit_breaker
+from src.scrapers.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+)
+
+CONFIG = {
+    "enabled": True,
+    "window_size": 4,
+    "min_calls": 4,
+    "failure_rate": 0.5,
+    "cooldown_seconds": 30,
+    "half_open_max_calls": 1,
+    "max_reschedules": 3,
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls ``time.monotonic`` as seen by the breaker."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _record(breaker: CircuitBreaker, *outcomes: bool):
+    for success in outcomes:
+        breaker.acquire()
+        breaker.record(success)
+
+
+def _open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker("jamef", CONFIG)
+    _record(breaker, True, True, False, False)
+    return breaker
+
+
+def test_stays_closed_below_min_calls_and_failure_rate():
+    breaker = CircuitBreaker("jamef", CONFIG)
+
+    _record(breaker, False, False, False)
+    assert breaker.state == CLOSED
+
+    breaker = CircuitBreaker("jamef", CONFIG)
+    _record(breaker, True, True, True, False)
+    assert breaker.state == CLOSED
+
+
+def test_opens_at_failure_rate_and_fails_fast(clock):
+    breaker = _open_breaker()
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check()
+    assert error.value.retry_after == 30
+
+
+def test_half_open_admits_limited_probes_after_cooldown(clock):
+    breaker = _open_breaker()
+    clock[0] += 31
+
+    breaker.check()
+    breaker.acquire()
+
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+
+@pytest.mark.parametrize("success, state", [(True, CLOSED), (False, OPEN)])
+def test_probe_outcome_closes_or_reopens(clock, success, state):
+    breaker = _open_breaker()
+    clock[0] += 31
+    breaker.acquire()
+
+    breaker.record(success)
+
+    assert breaker.state == state
+    assert breaker.snapshot()["recent_calls"] == 0
+
+
+def test_disabled_breaker_never_opens():
+    breaker = CircuitBreaker("jamef", {**CONFIG, "enabled": False})
+
+    _record(breaker, *[False] * 10)
+
+    breaker.check()
+    assert breaker.state == CLOSED
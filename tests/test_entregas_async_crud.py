@@ -0,0 +1,146 @@
+from datetime import date
+import pytest
+from sqlalchemy import func, select
+from src.db import models
+from src.entregas import entregas_async_crud, entregas_crud, entregas_models
+
+HISTORICO = [
+    {
+        "status": "Em trânsito",
+        "timestamp": "2025-01-02T10:00:00",
+        "local": {"cidade": "Curitiba", "estado": "PR"},
+        "detalhes": "Saiu da unidade",
+    },
+    {
+        "status": "Coletado",
+        "timestamp": "2025-01-01T09:00:00",
+        "local": None,
+        "detalhes": None,
+    },
+]
+
+
+def _entrega(previsao=date(2025, 1, 10), historico=HISTORICO):
+    return entregas_models.EntregaCreate(
+        transportadora="jamef",
+        codigo_rastreio="123",
+        numero_nf="123",
+        previsao_entrega=previsao,
+        historico=historico,
+    )
+
+
+async def _stored(db):
+    return (await db.execute(select(models.Entrega))).scalar_one()
+
+
+async def _count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_upsert_entrega_creates_with_movements_and_notification(async_db):
+    row, created = await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(), user_id=None
+    )
+    await async_db.commit()
+
+    assert created
+    assert row.id == (await _stored(async_db)).id
+    assert await _count(async_db, models.EntregaMovimentacao) == 2
+    assert await _count(async_db, models.MovimentacaoNotificacao) == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_entrega_leaves_unchanged_delivery_untouched(async_db):
+    await entregas_async_crud.upsert_entrega(async_db, _entrega(), user_id=None)
+    await async_db.commit()
+
+    row, created = await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(), user_id=None
+    )
+    await async_db.commit()
+
+    assert not created
+    assert (await _stored(async_db)).atualizado_em is None
+    assert await _count(async_db, models.Entrega) == 1
+    assert await _count(async_db, models.MovimentacaoNotificacao) == 1
+
+
+@pytest.mark.asyncio
+async def test_upsert_entrega_audits_a_new_previsao(async_db):
+    await entregas_async_crud.upsert_entrega(async_db, _entrega(), user_id=None)
+    await async_db.commit()
+
+    await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(previsao=date(2025, 1, 15)), user_id=None
+    )
+    await async_db.commit()
+
+    entrega = await _stored(async_db)
+    await async_db.refresh(entrega)
+    assert entrega.previsao_entrega == date(2025, 1, 15)
+    assert entrega.atualizado_em is not None
+
+
+async def _movimentos(db, entrega_id) -> list:
+    return [
+        m.movimento for m in await entregas_async_crud.get_movimentacoes(db, entrega_id)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_insert_movimentacoes_skips_movements_already_stored(async_db):
+    row, _ = await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(historico=HISTORICO[1:]), user_id=None
+    )
+    await async_db.commit()
+
+    inserted = await entregas_async_crud.insert_movimentacoes(
+        async_db, row.id, HISTORICO, user_id=None
+    )
+    await async_db.commit()
+
+    assert inserted == 1
+    assert sorted(await _movimentos(async_db, row.id)) == ["Coletado", "Em trânsito"]
+
+
+@pytest.mark.asyncio
+async def test_movements_already_stored_do_not_notify(async_db):
+    row, _ = await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(historico=HISTORICO), user_id=None
+    )
+    await async_db.commit()
+    novo_hash = entregas_crud.historico_hash(HISTORICO)
+
+    inserted = await entregas_async_crud.add_new_movimentacoes(
+        async_db, row.id, HISTORICO[:1], "em transito", novo_hash, None
+    )
+    await async_db.commit()
+
+    notificacoes = (
+        (await async_db.execute(select(models.MovimentacaoNotificacao))).scalars().all()
+    )
+    entrega = await entregas_async_crud.get_entrega(async_db, row.id)
+    assert inserted == 0
+    # Só a notificação da criação da entrega
+    assert len(notificacoes) == 1
+    assert entrega.status == row.status
+    assert entrega.historico_hash == novo_hash
+
+
+@pytest.mark.asyncio
+async def test_new_movements_update_the_stored_history_hash(async_db):
+    row, _ = await entregas_async_crud.upsert_entrega(
+        async_db, _entrega(historico=HISTORICO[1:]), user_id=None
+    )
+    novo_hash = entregas_crud.historico_hash(HISTORICO)
+
+    await entregas_async_crud.add_new_movimentacoes(
+        async_db, row.id, HISTORICO[:1], "em transito", novo_hash, None
+    )
+    await async_db.commit()
+
+    entrega = await entregas_async_crud.get_entrega(async_db, row.id)
+    assert entrega.historico_hash == novo_hash
+    assert row.historico_hash == entregas_crud.historico_hash(HISTORICO[1:])
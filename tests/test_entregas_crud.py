@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+from src.entregas.entregas_crud import (
+    build_movimentacao_rows,
+    historico_hash,
+    movimentacao_chave,
+)
+
+MOVIMENTO = {
+    "status": "Em trânsito",
+    "timestamp": "2025-01-02T10:00:00",
+    "local": {"cidade": "Curitiba", "estado": "PR"},
+    "detalhes": "Saiu da unidade",
+}
+
+
+def test_movimentacao_chave_depends_on_every_field():
+    dt = datetime(2025, 1, 2, 10, 0)
+    chave = movimentacao_chave("Em trânsito", dt, "Curitiba - PR", "Saiu")
+
+    assert chave == movimentacao_chave("Em trânsito", dt, "Curitiba - PR", "Saiu")
+    assert chave != movimentacao_chave("Entregue", dt, "Curitiba - PR", "Saiu")
+    assert chave != movimentacao_chave(
+        "Em trânsito", dt + timedelta(minutes=1), "Curitiba - PR", "Saiu"
+    )
+    assert chave != movimentacao_chave("Em trânsito", dt, None, "Saiu")
+    assert chave != movimentacao_chave("Em trânsito", dt, "Curitiba - PR", None)
+
+
+def test_movimentacao_chave_ignores_the_timezone_of_the_stored_date():
+    # O banco pode devolver a data com ou sem fuso; a chave tem de ser a mesma
+    naive = datetime(2025, 1, 2, 10, 0)
+    aware = naive.replace(tzinfo=timezone.utc)
+
+    assert movimentacao_chave("Coletado", naive, None, None) == movimentacao_chave(
+        "Coletado", aware, None, None
+    )
+
+
+def test_build_movimentacao_rows_drops_repeated_movements():
+    rows = build_movimentacao_rows([MOVIMENTO, dict(MOVIMENTO)], 7, None)
+
+    assert len(rows) == 1
+    assert rows[0]["entrega_id"] == 7
+    assert rows[0]["localizacao"] == "Curitiba - PR"
+    assert rows[0]["dt_movimento"] == datetime(2025, 1, 2, 10, 0)
+
+
+def test_historico_hash_ignores_order_and_repeated_events():
+    outro = {**MOVIMENTO, "status": "Coletado", "timestamp": "2025-01-01T09:00:00"}
+
+    assert historico_hash([MOVIMENTO, outro]) == historico_hash(
+        [outro, MOVIMENTO, MOVIMENTO]
+    )
+
+
+def test_historico_hash_changes_with_a_new_event():
+    novo = {**MOVIMENTO, "status": "Entregue", "timestamp": "2025-01-03T15:00:00"}
+
+    assert historico_hash([MOVIMENTO]) != historico_hash([MOVIMENTO, novo])
+    assert historico_hash([]) == historico_hash(None)
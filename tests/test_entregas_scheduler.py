@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from src.entregas.entregas_scheduler import compute_next_scrape, is_not_found
+
+
+@pytest.mark.parametrize(
+    "tipo, esperado",
+    [("not_found", True), ("timeout", False), ("exception", False)],
+)
+def test_is_not_found_only_for_missing_documents(tipo, esperado):
+    scraped_data = {"status": "falha", "dados": None, "erro": {"tipo": tipo}}
+
+    assert is_not_found(scraped_data) is esperado
+
+
+def test_is_not_found_ignores_successful_scrapes():
+    assert not is_not_found({"status": "sucesso", "dados": {}, "erro": None})
+    assert not is_not_found(None)
+
+
+AGORA = datetime(2025, 3, 10, 12, 0)
+
+
+def _horas_ate(proximo: datetime) -> float:
+    return (proximo - AGORA).total_seconds() / 3600
+
+
+def test_final_status_stops_scraping():
+    assert compute_next_scrape("Entregue", AGORA, None, agora=AGORA) == (
+        None,
+        "entregue",
+    )
+
+
+@pytest.mark.parametrize(
+    "idade_horas, intervalo",
+    [(2, 1), (48, 4), (200, 12), (500, 24)],
+)
+def test_interval_grows_with_the_age_of_the_last_movement(idade_horas, intervalo):
+    ultima = AGORA - timedelta(hours=idade_horas)
+
+    proximo, _ = compute_next_scrape("em transito", ultima, None, agora=AGORA)
+
+    assert _horas_ate(proximo) == intervalo
+
+
+def test_aware_movement_dates_are_compared_in_utc():
+    ultima = datetime(2025, 3, 10, 8, 0, tzinfo=timezone(timedelta(hours=-3)))
+
+    proximo, _ = compute_next_scrape("em transito", ultima, None, agora=AGORA)
+
+    assert _horas_ate(proximo) == 1
+
+
+def test_delivery_due_soon_uses_the_shortest_interval():
+    ultima = AGORA - timedelta(days=30)
+
+    proximo, motivo = compute_next_scrape(
+        "em transito", ultima, AGORA.date() + timedelta(days=1), agora=AGORA
+    )
+
+    assert (_horas_ate(proximo), motivo) == (1, "previsao de entrega")
+
+
+@pytest.mark.parametrize("consecutivos, horas", [(1, 2), (2, 4), (3, 8), (10, 48)])
+def test_not_found_backs_off_exponentially(consecutivos, horas):
+    proximo, motivo = compute_next_scrape(
+        None, None, None, nao_encontrado=consecutivos, agora=AGORA
+    )
+
+    assert (_horas_ate(proximo), motivo) == (horas, "nao encontrado")
@@ -0,0 +1,102 @@
+import asyncio
+from functools import partial
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.scrapers import http_scraper, runner
+from src.scrapers.http_scraper import HttpTrackingScraper
+
+HISTORICO = {"historico": [{"data": "2025-01-01T09:00:00", "status": "Coletado"}]}
+KWARGS = {"nota_fiscal": "1.234", "cnpj": "12.345.678/0001-99"}
+
+
+async def _rastreamento(request):
+    nota = request.query.get("nf")
+    if nota == "404":
+        raise web.HTTPNotFound()
+    if nota == "lenta":
+        await asyncio.sleep(1)
+    if nota == "500":
+        raise web.HTTPInternalServerError()
+    assert request.query["cnpj"] == "12345678000199"
+    return web.json_response(HISTORICO)
+
+
+@pytest_asyncio.fixture
+async def endpoint():
+    """Tracking endpoint served locally; returns a config for a given NF."""
+    app = web.Application()
+    app.router.add_get("/rastreamento", _rastreamento)
+    server = TestServer(app)
+    await server.start_server()
+
+    def config(nota: str = "{nota_fiscal_digits}") -> dict:
+        return {
+            "url": str(server.make_url("/rastreamento")),
+            "params": {"cnpj": "{cnpj_digits}", "nf": nota},
+            "timeout": 0.3,
+        }
+
+    yield config
+    await http_scraper.close_http_sessions()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_success_returns_the_backend_json_as_capture(endpoint):
+    result = await HttpTrackingScraper("jamef", endpoint()).execute(**KWARGS)
+
+    assert result["status"] == "sucesso"
+    assert result["dados"]["capturas"][0]["body"] == HISTORICO
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("nota, tipo", [("404", "not_found"), ("lenta", "timeout")])
+async def test_failures_are_typed(endpoint, nota, tipo):
+    result = await HttpTrackingScraper("jamef", endpoint(nota)).execute(**KWARGS)
+
+    assert result["status"] == "falha"
+    assert result["erro"]["tipo"] == tipo
+
+
+class FakePlaywrightScraper:
+    calls = 0
+
+    async def execute(self, **kwargs):
+        FakePlaywrightScraper.calls += 1
+        return {"status": "sucesso", "dados": {"origem": "playwright"}, "erro": None}
+
+
+@pytest.mark.asyncio
+async def test_run_engines_falls_back_to_playwright_when_http_fails(endpoint):
+    engines = [
+        partial(HttpTrackingScraper, "jamef", endpoint("500")),
+        FakePlaywrightScraper,
+    ]
+
+    result = await runner._run_engines(
+        engines,
+        lambda dados, cnpj, nf: {"informacoes_gerais": dados},
+        KWARGS,
+        "jamef",
+        "1234",
+        "12345678000199",
+    )
+
+    assert FakePlaywrightScraper.calls == 1
+    assert result == {"informacoes_gerais": {"origem": "playwright"}}
+
+
+def test_http_engine_comes_first_when_configured(monkeypatch):
+    monkeypatch.setattr(
+        http_scraper, "HTTP_TRACKING_ENDPOINTS", {"jamef": {"url": "http://x"}}
+    )
+
+    engines = runner._engines("jamef")
+
+    assert [getattr(e, "func", e) for e in engines] == [
+        HttpTrackingScraper,
+        runner.JamefScraper,
+    ]
+    assert runner._engines("braspress") == [runner.BrasspressScraper]
@@ -0,0 +1,110 @@
+from sqlalchemy import create_engine, delete, insert, select
+from src.db import migrations, models
+from src.utils.credentials_crypto import encrypt_credentials, options_fingerprint
+
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    migrations.run_migrations(engine)
+    return engine
+
+
+def _rerun(engine, version: int, index: str):
+    """Simulates a database created before migration ``version``."""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"DROP INDEX {index}")
+        conn.execute(
+            delete(models.SchemaVersion).where(models.SchemaVersion.version >= version)
+        )
+
+
+def test_duplicate_active_tasks_are_failed_before_the_unique_index(tmp_path):
+    engine = _engine(tmp_path)
+    _rerun(engine, 5, "uq_scraping_tasks_ativa")
+    tarefa = {"transportadora": "jamef", "numero_nf": "1", "cnpj_destinatario": "9"}
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.ScrapingTask),
+            [
+                {"task_id": "t1", "status": "IN_PROGRESS", **tarefa},
+                {"task_id": "t2", "status": "PENDING", **tarefa},
+            ],
+        )
+
+    migrations.run_migrations(engine)
+
+    with engine.connect() as conn:
+        status = dict(
+            conn.execute(
+                select(models.ScrapingTask.task_id, models.ScrapingTask.status)
+            ).all()
+        )
+    assert status == {"t1": "IN_PROGRESS", "t2": "FAILED"}
+
+
+def test_duplicate_entregas_are_merged_into_the_oldest(tmp_path):
+    engine = _engine(tmp_path)
+    _rerun(engine, 3, "uq_entregas_transportadora_numero_nf")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX uq_entrega_movimentacoes_entrega_chave")
+        entrega = {"transportadora": "jamef", "codigo_rastreio": "1", "numero_nf": "1"}
+        conn.execute(
+            insert(models.Entrega),
+            [{"id": 1, **entrega}, {"id": 2, **entrega}],
+        )
+        conn.execute(
+            insert(models.EntregaMovimentacao),
+            [
+                {"entrega_id": 1, "movimento": "Coletado", "chave": "a"},
+                {"entrega_id": 2, "movimento": "Coletado", "chave": "a"},
+                {"entrega_id": 2, "movimento": "Em trânsito", "chave": "b"},
+            ],
+        )
+        conn.execute(insert(models.MovimentacaoNotificacao).values(entrega_id=2))
+        conn.execute(
+            insert(models.ScrapingTask).values(
+                task_id="t1", status="SUCCESS", entrega_id=2
+            )
+        )
+
+    migrations.run_migrations(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(select(models.Entrega.id)).scalars().all() == [1]
+        movimentos = conn.execute(
+            select(
+                models.EntregaMovimentacao.entrega_id, models.EntregaMovimentacao.chave
+            ).order_by(models.EntregaMovimentacao.chave)
+        ).all()
+        assert [tuple(m) for m in movimentos] == [(1, "a"), (1, "b")]
+        assert conn.execute(
+            select(models.MovimentacaoNotificacao.entrega_id)
+        ).scalars().all() == [1]
+        assert conn.execute(select(models.ScrapingTask.entrega_id)).scalar_one() == 1
+
+
+def test_active_tasks_get_the_fingerprint_of_their_options(tmp_path):
+    engine = _engine(tmp_path)
+    _rerun(engine, 6, "uq_scraping_tasks_ativa")
+    credentials = {"login": "cliente", "senha": "segredo"}
+    tarefa = {"transportadora": "viaverde", "numero_nf": "1", "cnpj_destinatario": "9"}
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE scraping_tasks DROP COLUMN opcoes_hash")
+        conn.exec_driver_sql(
+            "INSERT INTO scraping_tasks (task_id, status, transportadora, "
+            "numero_nf, cnpj_destinatario, payload, credentials_enc, "
+            "reagendamentos, created_at) VALUES ('t1', 'PENDING', :transportadora, "
+            ":numero_nf, :cnpj_destinatario, :payload, :credentials_enc, 0, "
+            "CURRENT_TIMESTAMP)",
+            {
+                **tarefa,
+                "payload": '{"bypass_cache": true}',
+                "credentials_enc": encrypt_credentials(credentials),
+            },
+        )
+
+    migrations.run_migrations(engine)
+
+    with engine.connect() as conn:
+        opcoes_hash = conn.execute(select(models.ScrapingTask.opcoes_hash)).scalar_one()
+    assert opcoes_hash == options_fingerprint(credentials, True)
@@ -0,0 +1,30 @@
+from src.utils.normalize_scrap_data import normalize_jamef
+
+DETALHES = (
+    "Data: 02/01/2025 10:00\n\nStatus: EM TRANSITO\n\nEstado origem: SP\n\n"
+    "Município origem: SAO PAULO\n\nEstado destino: PR\n\n"
+    "Município destino: CURITIBA"
+)
+
+
+def test_capture_without_tracking_events_falls_back_to_the_page_text():
+    dados = {
+        "detalhes": DETALHES,
+        "capturas": [{"url": "/api/rastreamento", "body": {"mensagem": "ok"}}],
+    }
+
+    normalized = normalize_jamef(dados, "12345678000199", "100")
+
+    assert [e["status"] for e in normalized["historico"]] == ["EM TRANSITO"]
+
+
+def test_mapped_capture_is_preferred_over_the_page_text():
+    evento = {"data": "03/01/2025 08:00", "status": "ENTREGUE"}
+    dados = {
+        "detalhes": DETALHES,
+        "capturas": [{"url": "/api/historico", "body": {"historico": [evento]}}],
+    }
+
+    normalized = normalize_jamef(dados, "12345678000199", "100")
+
+    assert [e["status"] for e in normalized["historico"]] == ["ENTREGUE"]
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from src.scrapers.page_pool import WarmPagePool
+from src.scrapers.viaverde_scraper import ViaVerdeScraper
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+
+class FakeContext:
+    async def new_page(self):
+        return FakePage()
+
+
+class FakeBrowserPool:
+    def __init__(self):
+        self.leased = 0
+
+    async def acquire(self, carrier, **options):
+        self.leased += 1
+        return SimpleNamespace(
+            context=FakeContext(), pooled=SimpleNamespace(healthy=True)
+        )
+
+    async def release(self, lease):
+        self.leased -= 1
+
+
+async def _noop_warmer(page):
+    return None
+
+
+async def _settle(pool: WarmPagePool):
+    await asyncio.gather(*pool._refills.values())
+
+
+@pytest.fixture
+def warm_pool():
+    pool = WarmPagePool(
+        FakeBrowserPool(),
+        {"pages_per_carrier": {"default": 2}, "sweep_interval_seconds": 0},
+    )
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_warm_pages_are_capped_per_carrier_across_keys(warm_pool):
+    for key in ("viaverde:a", "viaverde:b", "viaverde:c"):
+        warm_pool.schedule_refill(key, "viaverde", _noop_warmer)
+    await _settle(warm_pool)
+
+    assert sum(warm_pool.stats().values()) == 2
+    assert warm_pool.browser_pool.leased == 2
+
+
+@pytest.mark.asyncio
+async def test_sweep_releases_stale_pages(warm_pool):
+    warm_pool.schedule_refill("jamef", "jamef", _noop_warmer)
+    await _settle(warm_pool)
+    warm_pool._pages["jamef"][0].page.closed = True
+
+    await warm_pool.sweep()
+
+    assert warm_pool.stats() == {"jamef": 1}
+    assert warm_pool.browser_pool.leased == 1
+
+
+@pytest.mark.asyncio
+async def test_sweep_releases_pages_idle_for_too_long(warm_pool):
+    warm_pool.config["max_idle_seconds"] = 60
+    warm_pool.schedule_refill("jamef", "jamef", _noop_warmer)
+    await _settle(warm_pool)
+    for warm in warm_pool._pages["jamef"]:
+        warm.warmed_at -= 61
+
+    await warm_pool.sweep()
+
+    assert warm_pool.stats() == {"jamef": 0}
+    assert warm_pool.browser_pool.leased == 0
+
+
+@pytest.mark.asyncio
+async def test_take_releases_stale_pages_and_keeps_track_of_it(warm_pool):
+    warm_pool.schedule_refill("jamef", "jamef", _noop_warmer)
+    await _settle(warm_pool)
+    warm_pool._pages["jamef"][0].page.closed = True
+
+    warm = warm_pool.take("jamef")
+    assert warm is not None
+    assert len(warm_pool._releases) == 1
+    await asyncio.gather(*warm_pool._releases)
+
+    assert not warm_pool._releases
+    # Resta só o contexto da página entregue
+    assert warm_pool.browser_pool.leased == 1
+
+
+def test_viaverde_warm_key_depends_on_the_password():
+    scraper = ViaVerdeScraper()
+    key = scraper.warm_key(login="cliente", senha="a", n_rastreio="1")
+
+    assert key != scraper.warm_key(login="cliente", senha="b", n_rastreio="1")
+    assert "cliente" not in key
@@ -0,0 +1,147 @@
+import asyncio
+import time
+import pytest
+from src.scrapers import rate_limiter
+from src.scrapers.rate_limiter import CarrierGovernor
+
+
+@pytest.fixture
+def process_share():
+    """Sets the process share for one test and restores a single process."""
+    yield rate_limiter.set_process_share
+    rate_limiter.set_process_share(1)
+
+
+@pytest.mark.asyncio
+async def test_single_process_uses_configured_limits_with_full_bucket():
+    state = CarrierGovernor()._state("default")
+
+    assert state.limits["max_in_flight"] == 4
+    assert state.bucket.tokens == 4
+
+
+@pytest.mark.asyncio
+async def test_splittable_carrier_gets_an_empty_share_per_process(process_share):
+    process_share(2, 0)
+    state = CarrierGovernor()._state("default")
+
+    assert state.limits["max_in_flight"] == 2
+    assert state.limits["burst"] == 2
+    assert state.limits["rate_per_minute"] == 15
+    assert state.bucket.tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_exclusive_carrier_keeps_whole_limit_without_burst(process_share):
+    process_share(3, 0)
+    state = CarrierGovernor()._state("braspress")
+
+    assert rate_limiter.is_exclusive("braspress")
+    assert state.limits["max_in_flight"] == 1
+    assert state.bucket.tokens == 0
+
+
+def test_exclusive_carrier_is_claimed_by_a_single_process(process_share):
+    owners = []
+    for index in range(3):
+        process_share(3, index)
+        if "braspress" not in rate_limiter.excluded_carriers(["Braspress", "jamef"]):
+            owners.append(index)
+
+    assert owners == [rate_limiter.carrier_owner("braspress")]
+
+
+@pytest.mark.parametrize("process_count", range(2, 9))
+def test_exclusive_carriers_are_dealt_round_robin(
+    process_share, monkeypatch, process_count
+):
+    monkeypatch.setattr(
+        rate_limiter,
+        "CARRIER_RATE_LIMITS",
+        {"default": {"rate_per_minute": 1, "burst": 1, "max_in_flight": 1}},
+    )
+    carriers = ["accert", "braspress", "jamef", "viaverde"]
+    claimed = {}
+    for index in range(process_count):
+        process_share(process_count, index)
+        excluded = rate_limiter.excluded_carriers(carriers)
+        claimed[index] = [c for c in carriers if c not in excluded]
+
+    # Cada transportadora em um único processo, espalhadas ao máximo
+    assert sorted(c for owned in claimed.values() for c in owned) == carriers
+    assert max(len(owned) for owned in claimed.values()) == -(-4 // process_count)
+    assert sum(1 for owned in claimed.values() if owned) == min(4, process_count)
+
+
+@pytest.mark.asyncio
+async def test_splittable_limits_give_the_remainder_to_the_first_processes(
+    process_share,
+):
+    limits = {"jamef": {"rate_per_minute": 60, "burst": 5, "max_in_flight": 5}}
+    shares = []
+    for index in range(3):
+        process_share(3, index)
+        state = CarrierGovernor(limits)._state("jamef")
+        shares.append((state.limits["max_in_flight"], state.limits["burst"]))
+
+    assert shares == [(2, 2), (2, 2), (1, 1)]
+
+
+def test_nothing_is_excluded_with_a_single_process():
+    assert rate_limiter.excluded_carriers(["braspress", "jamef"]) == []
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spends_the_burst_then_waits_for_the_rate():
+    bucket = rate_limiter.TokenBucket(rate_per_minute=600, burst=2)
+    started = time.monotonic()
+
+    await bucket.acquire()
+    await bucket.acquire()
+    burst_elapsed = time.monotonic() - started
+    await bucket.acquire()
+
+    assert burst_elapsed < 0.05
+    # 600/min = um token a cada 0,1 s
+    assert time.monotonic() - started >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_charges_costs_above_its_size_over_refills():
+    bucket = rate_limiter.TokenBucket(rate_per_minute=600, burst=2)
+    started = time.monotonic()
+
+    # Lote de burst + 2: as 2 fichas extras esperam 2 reposições (0,1 s cada)
+    await bucket.acquire(tokens=4)
+
+    assert time.monotonic() - started >= 0.19
+    assert bucket.tokens < 1
+
+
+@pytest.mark.asyncio
+async def test_governor_limits_jobs_in_flight():
+    governor = CarrierGovernor(
+        {"jamef": {"rate_per_minute": 60000, "burst": 10, "max_in_flight": 1}}
+    )
+    first_in = asyncio.Event()
+    release_first = asyncio.Event()
+
+    async def first_job():
+        async with governor.slot("jamef"):
+            first_in.set()
+            await release_first.wait()
+
+    async def second_job():
+        async with governor.slot("JAMEF"):
+            return governor.stats()["jamef"]["in_flight"]
+
+    first = asyncio.create_task(first_job())
+    await first_in.wait()
+    second = asyncio.create_task(second_job())
+    await asyncio.sleep(0.01)
+
+    assert governor.stats()["jamef"]["waiting"] == 1
+    release_first.set()
+    assert await second == 1
+    await first
+    assert governor.stats()["jamef"]["jobs"] == 2
@@ -0,0 +1,64 @@
+import pytest
+from src.scrapers import result_cache as result_cache_module
+from src.scrapers.result_cache import ResultCache
+
+RESULT = {"informacoes_gerais": {"numero_nf": "1"}, "historico": []}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _cache(**config) -> ResultCache:
+    return ResultCache(
+        {"enabled": True, "max_entries": 2, "ttl_seconds": {"default": 60}, **config}
+    )
+
+
+def test_hit_returns_a_copy_under_a_normalized_key():
+    cache = _cache()
+    cache.put("Jamef", " 1 ", "9", RESULT)
+
+    hit = cache.get("jamef", "1", "9")
+    hit["historico"].append("alterado")
+
+    assert cache.get("JAMEF", "1", "9") == RESULT
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire_after_the_carrier_ttl(clock):
+    cache = _cache(ttl_seconds={"default": 60, "braspress": 10})
+    cache.put("jamef", "1", "9", RESULT)
+    cache.put("braspress", "1", "9", RESULT)
+
+    clock[0] += 30
+
+    assert cache.get("jamef", "1", "9") == RESULT
+    assert cache.get("braspress", "1", "9") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache()
+    cache.put("jamef", "1", "9", RESULT)
+    cache.put("jamef", "2", "9", RESULT)
+    cache.get("jamef", "1", "9")
+
+    cache.put("jamef", "3", "9", RESULT)
+
+    assert cache.get("jamef", "2", "9") is None
+    assert cache.get("jamef", "1", "9") == RESULT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_ttl_or_disabled_cache_stores_nothing():
+    cache = _cache(ttl_seconds={"default": 0})
+    cache.put("jamef", "1", "9", RESULT)
+    assert cache.get("jamef", "1", "9") is None
+
+    cache = _cache(enabled=False)
+    cache.put("jamef", "1", "9", RESULT)
+    assert cache.get("jamef", "1", "9") is None
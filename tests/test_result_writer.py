@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from sqlalchemy import select
+from src.db import models
+from src.worker.result_writer import ResultWriter
+
+
+async def _add_task(db, task_id: str):
+    db.add(models.ScrapingTask(task_id=task_id, status="SUCCESS"))
+    await db.flush()
+    return task_id
+
+
+async def _add_task_and_fail(db, task_id: str):
+    await _add_task(db, task_id)
+    raise ValueError("resultado inválido")
+
+
+async def _task_ids(session_factory) -> list:
+    async with session_factory() as db:
+        result = await db.execute(
+            select(models.ScrapingTask.task_id).order_by(models.ScrapingTask.task_id)
+        )
+        return list(result.scalars())
+
+
+def _writer(session_factory) -> ResultWriter:
+    writer = ResultWriter(
+        {"enabled": True, "flush_interval_ms": 50, "max_batch": 10},
+        session_factory=session_factory,
+    )
+    writer.start()
+    return writer
+
+
+@pytest.mark.asyncio
+async def test_failing_write_does_not_discard_the_rest_of_the_batch(
+    async_session_factory,
+):
+    writer = _writer(async_session_factory)
+
+    results = await asyncio.gather(
+        writer.submit(_add_task, "t1"),
+        writer.submit(_add_task_and_fail, "t2"),
+        writer.submit(_add_task, "t3"),
+        return_exceptions=True,
+    )
+    await writer.stop()
+
+    assert results[0] == "t1" and results[2] == "t3"
+    assert isinstance(results[1], ValueError)
+    assert await _task_ids(async_session_factory) == ["t1", "t3"]
+    assert writer.stats["batches"] == 1
+    assert writer.stats["failed"] == 1
+
+
+class FirstCommitFails:
+    """Session factory whose first session fails to commit (e.g. locked)."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+        self.failed = False
+
+    def __call__(self):
+        session = self.session_factory()
+        if not self.failed:
+            self.failed = True
+
+            async def commit():
+                raise RuntimeError("database is locked")
+
+            session.commit = commit
+        return session
+
+
+@pytest.mark.asyncio
+async def test_batch_is_retried_one_by_one_after_a_failed_commit(
+    async_session_factory,
+):
+    writer = _writer(FirstCommitFails(async_session_factory))
+
+    results = await asyncio.gather(
+        writer.submit(_add_task, "t1"), writer.submit(_add_task, "t2")
+    )
+    await writer.stop()
+
+    assert results == ["t1", "t2"]
+    assert await _task_ids(async_session_factory) == ["t1", "t2"]
+    assert writer.stats["batches"] == 2
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from src.scrapers import circuit_breaker, runner
+from src.scrapers.rate_limiter import CarrierGovernor
+
+SEM_LIMITE = {"rate_per_minute": 60000, "burst": 100, "max_in_flight": 100}
+
+
+def _falha(tipo: str) -> dict:
+    return {"status": "falha", "dados": None, "erro": {"tipo": tipo}}
+
+
+@pytest.fixture
+def engines_return(monkeypatch):
+    """Makes ``run_scraper`` return ``result`` without opening a browser."""
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+    monkeypatch.setattr(
+        runner, "get_governor", lambda: CarrierGovernor({"jamef": SEM_LIMITE})
+    )
+
+    def patch(result):
+        async def fake_run_engines(*args, **kwargs):
+            return result
+
+        monkeypatch.setattr(runner, "_run_engines", fake_run_engines)
+
+    return patch
+
+
+async def _run_jobs(count: int):
+    for _ in range(count):
+        await runner.run_scraper("jamef", "123", "00000000000000", bypass_cache=True)
+
+
+@pytest.mark.asyncio
+async def test_not_found_does_not_open_the_breaker(engines_return):
+    engines_return(_falha("not_found"))
+
+    await _run_jobs(10)
+
+    assert circuit_breaker.get_breaker("jamef").state == circuit_breaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_timeouts_open_the_breaker(engines_return):
+    engines_return(_falha("timeout"))
+
+    await _run_jobs(5)
+
+    assert circuit_breaker.get_breaker("jamef").state == circuit_breaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_gives_the_half_open_slot_back(
+    engines_return, monkeypatch
+):
+    breaker = circuit_breaker.get_breaker("jamef")
+    breaker._open()
+    breaker.opened_at = time.monotonic() - breaker.config["cooldown_seconds"]
+    started = asyncio.Event()
+
+    async def hanging_run_engines(*args, **kwargs):
+        started.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(runner, "_run_engines", hanging_run_engines)
+    probe = asyncio.create_task(_run_jobs(1))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    engines_return({"informacoes_gerais": {"numero_nf": "123"}, "historico": []})
+    await _run_jobs(1)
+    assert breaker.state == circuit_breaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_prewarm_skips_carriers_without_default_credentials(monkeypatch):
+    warmed = []
+    monkeypatch.delenv("VIAVERDE_USER", raising=False)
+    monkeypatch.setattr(runner, "load_dotenv", lambda: None)
+    monkeypatch.setattr(
+        runner.JamefScraper,
+        "schedule_warm_pages",
+        lambda self, **kwargs: warmed.append(self.name),
+    )
+    monkeypatch.setattr(
+        runner.ViaVerdeScraper,
+        "schedule_warm_pages",
+        lambda self, **kwargs: warmed.append(self.name),
+    )
+
+    await runner.prewarm_pages(["jamef", "viaverde"])
+
+    assert warmed == ["jamef"]
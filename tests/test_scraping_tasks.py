@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+import json
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from src.db import models
+from src.entregas import (
+    entregas_async_crud,
+    entregas_crud,
+    entregas_handler,
+    entregas_models,
+    entregas_service,
+)
+from src.utils.credentials_crypto import decrypt_credentials
+
+CREDENTIALS = {"login": "cliente", "senha": "segredo"}
+
+
+def _scrap_request(numero_nf="100", credentials=None):
+    return entregas_models.EntregaScrapRequest(
+        transportadora="viaverde",
+        numero_nf=numero_nf,
+        cnpj_destinatario="12345678000199",
+        credentials=credentials,
+    )
+
+
+def test_create_scraping_task_keeps_credentials_out_of_payload(db_session):
+    task = entregas_crud.create_scraping_task(
+        db_session, "t1", _scrap_request(credentials=CREDENTIALS), user_id=None
+    )
+
+    assert "segredo" not in task.payload
+    assert json.loads(task.payload).get("credentials") is None
+    assert "segredo" not in task.credentials_enc
+    assert decrypt_credentials(task.credentials_enc) == CREDENTIALS
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", ["SUCCESS", "FAILED"])
+async def test_finish_scraping_task_erases_credentials(async_db, status):
+    async_db.add(
+        models.ScrapingTask(
+            task_id="t1", status="IN_PROGRESS", payload="{}", credentials_enc="x"
+        )
+    )
+    await async_db.commit()
+
+    await entregas_async_crud.finish_scraping_task(async_db, "t1", status)
+    await async_db.commit()
+
+    task = (await async_db.execute(select(models.ScrapingTask))).scalar_one()
+    assert task.status == status
+    assert task.credentials_enc is None
+
+
+async def _leased_task(db, owner="worker-a"):
+    db.add(
+        models.ScrapingTask(
+            task_id="t1", status="IN_PROGRESS", payload="{}", lease_owner=owner
+        )
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_finish_scraping_task_requires_the_lease(async_db):
+    await _leased_task(async_db, owner="worker-b")
+
+    updated = await entregas_async_crud.finish_scraping_task(
+        async_db, "t1", "SUCCESS", "worker-a"
+    )
+    await async_db.commit()
+
+    task = (await async_db.execute(select(models.ScrapingTask))).scalar_one()
+    assert not updated
+    assert task.status == "IN_PROGRESS"
+    assert task.lease_owner == "worker-b"
+
+
+SCRAPED_DATA = {
+    "informacoes_gerais": {
+        "transportadora": "jamef",
+        "codigo_rastreio": "100",
+        "numero_nf": "100",
+    },
+    "historico": [{"status": "Coletado", "timestamp": "2025-01-01T09:00:00"}],
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "lease_owner, status, entregas",
+    [("worker-a", "SUCCESS", 1), ("worker-b", "IN_PROGRESS", 0)],
+)
+async def test_result_is_written_only_by_the_lease_holder(
+    async_db, lease_owner, status, entregas
+):
+    await _leased_task(async_db, owner=lease_owner)
+
+    await entregas_handler.apply_scraped_data(
+        async_db, _scrap_request(), None, "t1", SCRAPED_DATA, "worker-a"
+    )
+    await async_db.commit()
+
+    task = (await async_db.execute(select(models.ScrapingTask))).scalar_one()
+    stored = (await async_db.execute(select(models.Entrega))).scalars().all()
+    assert task.status == status
+    assert len(stored) == entregas
+
+
+def test_second_active_task_for_the_same_delivery_is_rejected(db_session):
+    entregas_crud.create_scraping_task(db_session, "t1", _scrap_request(), None)
+
+    with pytest.raises(IntegrityError):
+        entregas_crud.create_scraping_task(db_session, "t2", _scrap_request(), None)
+
+
+def test_initiate_scraping_reuses_task_enqueued_by_another_process(
+    db_session, monkeypatch
+):
+    entregas_crud.create_scraping_task(db_session, "t1", _scrap_request(), None)
+    lookups = []
+    get_active = entregas_crud.get_active_scraping_task
+
+    def racing_lookup(*args):
+        # A primeira busca não vê a tarefa criada pelo outro processo
+        lookups.append(args)
+        return None if len(lookups) == 1 else get_active(*args)
+
+    monkeypatch.setattr(entregas_crud, "get_active_scraping_task", racing_lookup)
+
+    task_id = entregas_service.initiate_scraping(_scrap_request(), db_session, None)
+
+    assert task_id == "t1"
+    assert db_session.query(models.ScrapingTask).count() == 1
+
+
+@pytest.mark.parametrize(
+    "options, reused",
+    [
+        ({"credentials": CREDENTIALS}, True),
+        ({"credentials": {"login": "outro", "senha": "x"}}, False),
+        ({"credentials": CREDENTIALS, "bypass_cache": True}, False),
+    ],
+)
+def test_only_requests_with_the_same_options_share_a_task(db_session, options, reused):
+    first = entregas_service.initiate_scraping(
+        _scrap_request(credentials=CREDENTIALS), db_session, None
+    )
+    scrap_request = _scrap_request().model_copy(update=options)
+
+    second = entregas_service.initiate_scraping(scrap_request, db_session, None)
+
+    assert (second == first) is reused
+    assert db_session.query(models.ScrapingTask).count() == (1 if reused else 2)
+
+
+async def _enqueue(db, task_id, transportadora="jamef", **values):
+    values = {
+        "status": "PENDING",
+        "available_at": datetime.utcnow() - timedelta(seconds=1),
+        **values,
+    }
+    db.add(
+        models.ScrapingTask(
+            task_id=task_id,
+            transportadora=transportadora,
+            numero_nf=task_id,
+            cnpj_destinatario="9",
+            payload="{}",
+            **values,
+        )
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_claimed_task_is_not_claimed_again_while_leased(async_db):
+    await _enqueue(async_db, "t1")
+
+    first = await entregas_async_crud.claim_scraping_tasks(async_db, 5, "a", 60)
+    second = await entregas_async_crud.claim_scraping_tasks(async_db, 5, "b", 60)
+
+    assert [task.task_id for task in first] == ["t1"]
+    assert first[0].lease_owner == "a"
+    assert second == []
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed_by_another_worker(async_db):
+    await _enqueue(
+        async_db,
+        "t1",
+        status="IN_PROGRESS",
+        lease_owner="a",
+        lease_expires_at=datetime.utcnow() - timedelta(seconds=1),
+    )
+
+    claimed = await entregas_async_crud.claim_scraping_tasks(async_db, 5, "b", 60)
+    renewed = await entregas_async_crud.renew_scraping_task_leases(
+        async_db, "a", ["t1"], 60
+    )
+
+    assert [(task.task_id, task.lease_owner) for task in claimed] == [("t1", "b")]
+    assert renewed == 0
+
+
+@pytest.mark.asyncio
+async def test_future_and_excluded_tasks_are_not_claimed(async_db):
+    await _enqueue(async_db, "t1", available_at=datetime.utcnow() + timedelta(hours=1))
+    await _enqueue(async_db, "t2", transportadora="Braspress")
+    await _enqueue(async_db, "t3")
+
+    claimed = await entregas_async_crud.claim_scraping_tasks(
+        async_db, 5, "a", 60, exclude_transportadoras=["braspress"]
+    )
+
+    assert [task.task_id for task in claimed] == ["t3"]
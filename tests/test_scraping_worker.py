@@ -0,0 +1,107 @@
+import pytest
+from sqlalchemy import select
+from src.configs.config import WORKER_CONFIG
+from src.db import models
+from src.entregas import entregas_handler, entregas_models
+from src.worker import scraping_worker
+from src.worker.result_writer import ResultWriter
+
+CREDENTIALS = {"login": "cliente", "senha": "segredo"}
+
+
+def _job(numero_nf, transportadora="viaverde", credentials=CREDENTIALS):
+    scrap_request = entregas_models.EntregaScrapRequest(
+        transportadora=transportadora,
+        numero_nf=numero_nf,
+        cnpj_destinatario="12345678000199",
+        credentials=credentials,
+    )
+    return (scrap_request, None, f"t{numero_nf}")
+
+
+def _task_ids(batches) -> list:
+    return sorted([task_id for _, _, task_id in batch] for batch in batches)
+
+
+def test_batch_carrier_tasks_sharing_credentials_run_together():
+    jobs = [
+        _job("1"),
+        _job("2", transportadora="jamef", credentials=None),
+        _job("3"),
+        _job("4", credentials={"login": "outro", "senha": "x"}),
+    ]
+
+    batches = scraping_worker._batches(jobs)
+
+    assert _task_ids(batches) == [["t1", "t3"], ["t2"], ["t4"]]
+
+
+def test_batches_are_capped_by_max_batch_size(monkeypatch):
+    monkeypatch.setitem(WORKER_CONFIG, "max_batch_size", 2)
+
+    batches = scraping_worker._batches([_job(str(nf)) for nf in range(5)])
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_run_task_batch_scrapes_once_and_applies_each_result(
+    async_session_factory, monkeypatch
+):
+    async with async_session_factory() as db:
+        for numero_nf in ("1", "2"):
+            db.add(
+                models.ScrapingTask(
+                    task_id=f"t{numero_nf}",
+                    status="IN_PROGRESS",
+                    payload="{}",
+                    lease_owner="worker-a",
+                )
+            )
+        await db.commit()
+
+    calls = []
+
+    async def fake_run_scraper_many(transportadora, numeros_nf, **kwargs):
+        calls.append(numeros_nf)
+        return {
+            "1": {
+                "informacoes_gerais": {
+                    "transportadora": "viaverde",
+                    "codigo_rastreio": "1",
+                    "numero_nf": "1",
+                },
+                "historico": [
+                    {"status": "Coletado", "timestamp": "2025-01-01T09:00:00"}
+                ],
+            },
+            "2": {"status": "erro", "erro": {"tipo": "timeout", "mensagem": "lento"}},
+        }
+
+    monkeypatch.setattr(
+        entregas_handler.runner, "run_scraper_many", fake_run_scraper_many
+    )
+    writer = ResultWriter(
+        {"enabled": True, "flush_interval_ms": 10, "max_batch": 10},
+        session_factory=async_session_factory,
+    )
+    writer.start()
+
+    await entregas_handler.run_task_batch(
+        [_job("1"), _job("2")], writer=writer, owner="worker-a"
+    )
+    await writer.stop()
+
+    async with async_session_factory() as db:
+        tasks = (
+            await db.execute(
+                select(models.ScrapingTask).order_by(models.ScrapingTask.task_id)
+            )
+        ).scalars()
+        entregas = (await db.execute(select(models.Entrega))).scalars().all()
+        assert [(task.task_id, task.status) for task in tasks] == [
+            ("t1", "SUCCESS"),
+            ("t2", "FAILED"),
+        ]
+    assert calls == [["1", "2"]]
+    assert [entrega.numero_nf for entrega in entregas] == ["1"]
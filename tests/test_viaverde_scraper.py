@@ -0,0 +1,87 @@
+import pytest
+from src.scrapers.base_scraper import NotFoundError
+from src.scrapers.viaverde_scraper import ViaVerdeScraper
+
+
+class FakeLocator:
+    def __init__(self, count):
+        self._count = count
+
+    async def count(self):
+        return self._count
+
+
+class FakePage:
+    def __init__(self, logged_out=False):
+        self.logged_out = logged_out
+
+    def locator(self, selector):
+        return FakeLocator(1 if self.logged_out and selector == "#login" else 0)
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    """Via Verde scraper whose steps answer from ``scraper.outcomes``."""
+    scraper = ViaVerdeScraper()
+    scraper.page = FakePage()
+    scraper.outcomes = {}
+    scraper.reopened = []
+
+    async def create_page():
+        return scraper.page
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def pesquisar(page, n_rastreio):
+        outcome = scraper.outcomes.get(n_rastreio)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return scraper.success_response({"n_rastreio": n_rastreio})
+
+    async def reabrir(page, log_prefix, login, senha):
+        scraper.reopened.append(log_prefix)
+        return scraper.success_response({})
+
+    monkeypatch.setattr(scraper, "create_page", create_page)
+    monkeypatch.setattr(scraper, "open_landing_page", noop)
+    monkeypatch.setattr(scraper, "_abrir_consulta_por_documento", noop)
+    monkeypatch.setattr(scraper, "_capture_artifacts", noop)
+    monkeypatch.setattr(scraper, "_pesquisar", pesquisar)
+    monkeypatch.setattr(scraper, "_reabrir_consulta", reabrir)
+    return scraper
+
+
+async def _scrape(scraper, *numeros):
+    items = [{"n_rastreio": n} for n in numeros]
+    return await scraper.scrape_many(items, login="cliente", senha="segredo")
+
+
+@pytest.mark.asyncio
+async def test_not_found_keeps_the_consultation_page(scraper):
+    scraper.outcomes["2"] = NotFoundError("Nenhum registro encontrado")
+
+    results = await _scrape(scraper, "1", "2", "3")
+
+    assert [r["status"] for r in results] == ["sucesso", "falha", "sucesso"]
+    assert results[1]["erro"]["tipo"] == "not_found"
+    assert scraper.reopened == []
+
+
+@pytest.mark.asyncio
+async def test_exception_reopens_the_consultation_page(scraper):
+    scraper.outcomes["2"] = RuntimeError("tela inesperada")
+
+    await _scrape(scraper, "1", "2", "3")
+
+    assert len(scraper.reopened) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_session_reopens_after_not_found(scraper):
+    scraper.page.logged_out = True
+    scraper.outcomes["1"] = NotFoundError("Nenhum registro encontrado")
+
+    await _scrape(scraper, "1")
+
+    assert len(scraper.reopened) == 1
@@ -0,0 +1,111 @@
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from src.scrapers.wait_engine import WaitEngine
+
+
+class FakeFrame:
+    def __init__(self, loaded=True):
+        self.loaded = loaded
+        self.selectors = []
+
+    async def wait_for_load_state(self, state, timeout=None):
+        if not self.loaded:
+            raise PlaywrightTimeoutError("iframe não carregou")
+
+    async def wait_for_selector(self, selector, state="visible", timeout=None):
+        self.selectors.append((selector, state))
+        return selector
+
+
+class FakeHandle:
+    def __init__(self, frame):
+        self.frame = frame
+
+    async def content_frame(self):
+        return self.frame
+
+
+class FakePage:
+    """Page that answers ``evaluate`` with ``result`` and knows ``selectors``."""
+
+    def __init__(self, result=True, selectors=(), frame=None):
+        self.result = result
+        self.selectors = set(selectors)
+        self.frame = frame
+        self.evaluated = []
+
+    async def evaluate(self, script, arg=None):
+        self.evaluated.append((script, arg))
+        return self.result
+
+    async def wait_for_selector(self, selector, state="visible", timeout=None):
+        if selector not in self.selectors:
+            raise PlaywrightTimeoutError(f"{selector} não apareceu")
+        if self.frame is not None:
+            return FakeHandle(self.frame)
+        return selector
+
+
+@pytest.mark.asyncio
+async def test_condition_passes_predicate_and_timeout_to_the_observer():
+    page = FakePage(result=True)
+    waits = WaitEngine()
+
+    await waits.condition(page, "el => !!el", arg="#x", timeout=1500)
+
+    script, arg = page.evaluated[0]
+    assert "MutationObserver" in script and "el => !!el" in script
+    assert arg == ["#x", 1500]
+    assert waits.report()["waits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_condition_raises_timeout_when_predicate_never_holds():
+    waits = WaitEngine()
+
+    with pytest.raises(PlaywrightTimeoutError):
+        await waits.condition(FakePage(result=False), "() => false", timeout=10)
+
+    assert waits.report()["waits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dom_quiet_waits_for_the_page_to_settle():
+    page = FakePage()
+
+    await WaitEngine().dom_quiet(page, quiet_ms=50, timeout=500)
+
+    assert page.evaluated[0][1] == [50, 500]
+
+
+@pytest.mark.asyncio
+async def test_selector_timeout_is_propagated_and_accounted():
+    waits = WaitEngine()
+
+    assert await waits.selector(FakePage(selectors=["#ok"]), "#ok") == "#ok"
+    with pytest.raises(PlaywrightTimeoutError):
+        await waits.selector(FakePage(), "#missing", timeout=10)
+
+    assert waits.report()["waits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_frame_loaded_returns_the_ready_frame():
+    frame = FakeFrame()
+    page = FakePage(selectors=["iframe"], frame=frame)
+
+    assert await WaitEngine().frame_loaded(page, "iframe", "#pronto") is frame
+    assert frame.selectors == [("#pronto", "attached")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "page",
+    [
+        FakePage(),
+        FakePage(selectors=["iframe"], frame=FakeFrame(loaded=False)),
+    ],
+)
+async def test_frame_loaded_times_out_when_the_iframe_is_not_ready(page):
+    with pytest.raises(PlaywrightTimeoutError):
+        await WaitEngine().frame_loaded(page, "iframe", timeout=10)